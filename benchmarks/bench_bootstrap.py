@@ -0,0 +1,58 @@
+# The drivers import pandas lazily when they return their results: import it here, so that the peak memory of the
+# first measured call does not count the import
+import pandas  # noqa: F401
+
+from pyretest import bootstrap_confidence_interval, bootstrap_sample_size_cohen_kappa, bootstrap_power_surface
+
+from benchmarks.common import make_questions
+
+
+class BootstrapConfidenceInterval:
+    params = ([100, 1000], ["responses", "tables"])
+    param_names = ["n", "simulation"]
+
+    def setup(self, n, simulation):
+        self.questions = make_questions(10, 5)
+
+    def time_bootstrap_confidence_interval(self, n, simulation):
+        bootstrap_confidence_interval(self.questions, n, n_bootstrap=200, seed=0, simulation=simulation)
+
+    def peakmem_bootstrap_confidence_interval(self, n, simulation):
+        bootstrap_confidence_interval(self.questions, n, n_bootstrap=200, seed=0, simulation=simulation)
+
+
+class BootstrapSampleSize:
+    params = (["grid", "adaptive", "common_random_numbers", "tables"],)
+    param_names = ["mode"]
+
+    def setup(self, mode):
+        self.questions = make_questions(10, 5)
+        self.options = {"grid": {},
+                        "adaptive": {"search": "adaptive"},
+                        "common_random_numbers": {"common_random_numbers": True},
+                        "tables": {"simulation": "tables"}}[mode]
+
+    def time_bootstrap_sample_size(self, mode):
+        bootstrap_sample_size_cohen_kappa(self.questions, 200, start_n=20, n_step=20, n_bootstrap=200, seed=0,
+                                          reliability=0.05, **self.options)
+
+    def peakmem_bootstrap_sample_size(self, mode):
+        bootstrap_sample_size_cohen_kappa(self.questions, 200, start_n=20, n_step=20, n_bootstrap=200, seed=0,
+                                          reliability=0.05, **self.options)
+
+
+class BootstrapPowerSurface:
+    params = ([1, 4],)
+    param_names = ["n_reliabilities"]
+
+    def setup(self, n_reliabilities):
+        self.questions = make_questions(10, 5)
+        self.reliabilities = [0.05 * (i + 1) for i in range(n_reliabilities)]
+
+    def time_bootstrap_power_surface(self, n_reliabilities):
+        bootstrap_power_surface(self.questions, 200, self.reliabilities, weight_types=[None, "quadratic"],
+                                alphas=[0.05, 0.01], start_n=20, n_step=20, n_bootstrap=200, seed=0)
+
+    def peakmem_bootstrap_power_surface(self, n_reliabilities):
+        bootstrap_power_surface(self.questions, 200, self.reliabilities, weight_types=[None, "quadratic"],
+                                alphas=[0.05, 0.01], start_n=20, n_step=20, n_bootstrap=200, seed=0)
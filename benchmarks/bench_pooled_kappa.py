@@ -0,0 +1,39 @@
+from pyretest import pooled_cohen_kappa, pooled_kappa_from_packed, pack_codes, sample_questionnaire_codes, \
+    contingency_tables, pooled_kappa_from_tables
+
+from benchmarks.common import make_questions, make_samples
+
+
+class PooledCohenKappa:
+    params = ([100, 1000, 10000], [5, 50], [2, 7], [None, "quadratic"])
+    param_names = ["n", "n_items", "n_categories", "weight_type"]
+
+    def setup(self, n, n_items, n_categories, weight_type):
+        self.questions = make_questions(n_items, n_categories)
+        self.samples_a, self.samples_b = make_samples(self.questions, n)
+
+    def time_pooled_cohen_kappa(self, n, n_items, n_categories, weight_type):
+        pooled_cohen_kappa(self.samples_a, self.samples_b, weight_type=weight_type, questions=self.questions)
+
+    def peakmem_pooled_cohen_kappa(self, n, n_items, n_categories, weight_type):
+        pooled_cohen_kappa(self.samples_a, self.samples_b, weight_type=weight_type, questions=self.questions)
+
+
+class BinaryPooledKappa:
+    params = ([500, 5000], ["tables", "packed"])
+    param_names = ["n_items", "kernel"]
+
+    def setup(self, n_items, kernel):
+        questions = make_questions(n_items, 2)
+        self.codes_a = sample_questionnaire_codes(questions, 1000, replicates=10, seed=1)
+        self.codes_b = sample_questionnaire_codes(questions, 1000, replicates=10, seed=2)
+        self.n_categories = [2] * n_items
+
+    def time_binary_pooled_kappa(self, n_items, kernel):
+        if kernel == "packed":
+            pooled_kappa_from_packed(pack_codes(self.codes_a), pack_codes(self.codes_b))
+        else:
+            pooled_kappa_from_tables(contingency_tables(self.codes_a, self.codes_b, self.n_categories))
+
+    def peakmem_binary_pooled_kappa(self, n_items, kernel):
+        self.time_binary_pooled_kappa(n_items, kernel)
@@ -0,0 +1,56 @@
+from pyretest import sample_questionnaire, sample_questionnaire_codes, make_reliable, make_reliable_codes
+
+from benchmarks.common import make_questions
+
+
+class SampleQuestionnaire:
+    params = ([100, 1000, 10000], [5, 50], [2, 7])
+    param_names = ["n", "n_items", "n_categories"]
+
+    def setup(self, n, n_items, n_categories):
+        self.questions = make_questions(n_items, n_categories)
+
+    def time_sample_questionnaire(self, n, n_items, n_categories):
+        sample_questionnaire(self.questions, n)
+
+    def time_sample_questionnaire_codes(self, n, n_items, n_categories):
+        sample_questionnaire_codes(self.questions, n, seed=0)
+
+    def peakmem_sample_questionnaire(self, n, n_items, n_categories):
+        sample_questionnaire(self.questions, n)
+
+    def peakmem_sample_questionnaire_codes(self, n, n_items, n_categories):
+        sample_questionnaire_codes(self.questions, n, seed=0)
+
+
+class MakeReliable:
+    # Reference for MakeReliableCodes: the list based make_reliable on a single (n, n_items) sample
+    params = ([100, 1000, 10000], [5, 50])
+    param_names = ["n", "n_items"]
+
+    def setup(self, n, n_items):
+        questions = make_questions(n_items, 5)
+        self.codes_a = sample_questionnaire_codes(questions, n, seed=0)
+        self.codes_b = sample_questionnaire_codes(questions, n, seed=1)
+
+    def time_make_reliable(self, n, n_items):
+        make_reliable(self.codes_a.copy(), self.codes_b, 0.3)
+
+    def peakmem_make_reliable(self, n, n_items):
+        make_reliable(self.codes_a.copy(), self.codes_b, 0.3)
+
+
+class MakeReliableCodes:
+    params = ([100, 1000], [5, 50], ["exact", "bernoulli"])
+    param_names = ["n", "n_items", "mode"]
+
+    def setup(self, n, n_items, mode):
+        questions = make_questions(n_items, 5)
+        self.codes_a = sample_questionnaire_codes(questions, n, replicates=100, seed=0)
+        self.codes_b = sample_questionnaire_codes(questions, n, replicates=100, seed=1)
+
+    def time_make_reliable_codes(self, n, n_items, mode):
+        make_reliable_codes(self.codes_a.copy(), self.codes_b, 0.3, mode=mode, seed=0)
+
+    def peakmem_make_reliable_codes(self, n, n_items, mode):
+        make_reliable_codes(self.codes_a.copy(), self.codes_b, 0.3, mode=mode, seed=0)
@@ -0,0 +1,23 @@
+import numpy as np
+
+from pyretest import Question, sample_questionnaire_codes, decode_responses
+
+
+def make_questions(n_items, n_categories, seed=0):
+    """
+    Questionnaire of n_items questions with n_categories integer values and random probabilities.
+    """
+    rng = np.random.default_rng(seed)
+    return [Question(list(range(1, n_categories + 1)), rng.random(n_categories) + 0.1) for _ in range(n_items)]
+
+
+def make_samples(questions, n, reliability=0.2, seed=0):
+    """
+    Paired answers of n subjects, a fraction reliability of the answers of the retest being copied from the test.
+    """
+    rng = np.random.default_rng(seed)
+    codes_a = sample_questionnaire_codes(questions, n, seed=rng)
+    codes_b = sample_questionnaire_codes(questions, n, seed=rng)
+    copied = rng.random(codes_a.shape) < reliability
+    codes_b[copied] = codes_a[copied]
+    return decode_responses(codes_a, questions), decode_responses(codes_b, questions)
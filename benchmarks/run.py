@@ -0,0 +1,137 @@
+"""
+Run the benchmarks without asv, and compare them to a stored baseline.
+
+The benchmarks follow the asv conventions: classes with params, param_names and setup, whose time_* methods are timed
+and whose peakmem_* methods are measured. Here the peak memory is the peak of the allocations traced by tracemalloc
+(numpy arrays included) during one call, rather than the resident set size of the process.
+
+Usage:
+    python -m benchmarks.run                                  # run everything
+    python -m benchmarks.run -b PooledCohenKappa -b sampler   # only the benchmarks whose name contains a pattern
+    python -m benchmarks.run --save benchmarks/baseline.json  # store the results as the new baseline
+    python -m benchmarks.run --compare benchmarks/baseline.json --factor 1.5
+
+With --compare, the exit status is 1 if a benchmark is slower (or uses more memory) than the baseline by more than
+factor. The baseline depends on the machine, so store one before a change and compare after it on the same machine.
+"""
+import argparse
+import importlib
+import itertools
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+BENCHMARK_MODULES = ["bench_sampler", "bench_pooled_kappa", "bench_bootstrap"]
+
+
+def iter_benchmarks(patterns=None):
+    """
+    Yield the benchmarks of BENCHMARK_MODULES as (name, class, method name, params).
+
+    :param patterns: List[str] only yield the benchmarks whose name contains one of the patterns
+    """
+    for module_name in BENCHMARK_MODULES:
+        module = importlib.import_module(f"benchmarks.{module_name}")
+        for class_name, cls in vars(module).items():
+            if not isinstance(cls, type) or cls.__module__ != module.__name__:
+                continue
+            params = getattr(cls, "params", ())
+            if params and not isinstance(params[0], (list, tuple)):
+                params = (params,)
+            for method_name in sorted(vars(cls)):
+                if not method_name.startswith(("time_", "peakmem_")):
+                    continue
+                for combination in itertools.product(*params):
+                    name = f"{module_name}.{class_name}.{method_name}({', '.join(map(repr, combination))})"
+                    if patterns and not any(pattern in name for pattern in patterns):
+                        continue
+                    yield name, cls, method_name, combination
+
+
+def measure(cls, method_name, params, repeat=5, min_time=0.2):
+    """
+    Time a benchmark (best of repeat runs of enough calls to last min_time, in seconds per call), or measure its peak
+    traced memory (in bytes).
+    """
+    instance = cls()
+    if hasattr(instance, "setup"):
+        instance.setup(*params)
+    method = getattr(instance, method_name)
+    try:
+        if method_name.startswith("peakmem_"):
+            tracemalloc.start()
+            method(*params)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return peak
+
+        timer = timeit.Timer(lambda: method(*params))
+        number = 1
+        while timer.timeit(number) < min_time and number < 10 ** 6:
+            number *= 10
+        return min(timer.repeat(repeat=repeat, number=number)) / number
+    finally:
+        if hasattr(instance, "teardown"):
+            instance.teardown(*params)
+
+
+def format_value(name, value):
+    if value is None:
+        return "-"
+    if ".peakmem_" in name:
+        return f"{value / 2 ** 20:.2f} MiB"
+    return f"{value * 1e3:.3f} ms"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the pyretest benchmarks.")
+    parser.add_argument("-b", "--bench", action="append", help="only run the benchmarks containing this pattern")
+    parser.add_argument("--save", help="write the results to this json file")
+    parser.add_argument("--compare", help="compare the results to this json file")
+    parser.add_argument("--factor", type=float, default=1.5,
+                        help="ratio to the baseline above which a benchmark is a regression (default: 1.5)")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timed repeats (default: 5)")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+
+    # Keep the progress bars of the bootstrap drivers out of the output
+    with open(os.devnull, "w") as devnull:
+        results = {}
+        regressions = []
+        for name, cls, method_name, params in iter_benchmarks(args.bench):
+            stderr, sys.stderr = sys.stderr, devnull
+            try:
+                value = measure(cls, method_name, params, repeat=args.repeat)
+            finally:
+                sys.stderr = stderr
+            results[name] = value
+            line = f"{name:<100} {format_value(name, value):>14}"
+            if name in baseline and baseline[name]:
+                ratio = value / baseline[name]
+                line += f" {format_value(name, baseline[name]):>14} {ratio:6.2f}x"
+                if ratio > args.factor:
+                    regressions.append(name)
+                    line += " REGRESSION"
+            print(line, flush=True)
+
+    if args.save:
+        import platform
+        import numpy as np
+        with open(args.save, "w") as file:
+            json.dump({"machine": platform.platform(), "python": platform.python_version(),
+                       "numpy": np.__version__, "results": results}, file, indent=2, sort_keys=True)
+            file.write("\n")
+    if regressions:
+        print(f"{len(regressions)} benchmarks are more than {args.factor}x slower than the baseline")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,2 +1,9 @@
-from pyretest.pooled_kappa import pooled_cohen_kappa, bootstrap_sample_size_cohen_kappa, bootstrap_confidence_interval
-from pyretest.sampler import sample_questionnaire, Question, make_reliable
+__version__ = "1.3"
+
+from pyretest.pooled_kappa import pooled_cohen_kappa, batched_pooled_cohen_kappa, bootstrap_sample_size_cohen_kappa, \
+    bootstrap_confidence_interval, empirical_bootstrap_confidence_interval, jackknife_standard_error, \
+    contingency_tables, pooled_kappa_from_tables, pooled_kappa_from_packed, pooled_kappa_from_codes, KappaAccumulator, \
+    ResultCache, BootstrapHook, TqdmHook, LoggingHook, bootstrap_power_surface, WorkUnit, plan_work_units, \
+    run_work_unit, reduce_work_units
+from pyretest.sampler import sample_questionnaire, sample_questionnaire_codes, encode_responses, decode_responses, \
+    Question, QuestionnairePlan, make_reliable, make_reliable_codes, pack_codes, unpack_codes
@@ -0,0 +1,5 @@
+import sys
+
+from pyretest.cli import main
+
+sys.exit(main())
@@ -0,0 +1,213 @@
+"""
+Command line runner of sample size and confidence interval jobs.
+
+Usage:
+    pyretest run jobs.yaml                 # run the jobs of the spec, resuming from their checkpoints
+    pyretest run jobs.json --workers 8     # with a budget of 8 worker processes shared by all the jobs
+    python -m pyretest run jobs.yaml
+
+The spec is a json or yaml (with pyyaml installed) file such as:
+    questions:                             # or questionnaire: path to a json/yaml file with this list
+      - values: [1, 2, 3, 4]
+        probabilities: [0.1, 0.2, 0.3, 0.4]
+    workers: 4                             # worker processes shared by the jobs (default: 1)
+    checkpoint: checkpoints                # directory of the checkpoints (default: <spec name>.checkpoint)
+    jobs:
+      - name: main                         # name of the checkpoint of the job (default: its position)
+        type: sample_size                  # bootstrap_sample_size_cohen_kappa, or confidence_interval
+        output: power.csv                  # power table, or interval, as .csv or .parquet
+        max_n: 400                         # the other keys are the arguments of the function
+        reliability: 0.1
+        seed: 42
+
+Each job keeps the blocks of bootstrap samples it simulated in its checkpoint directory, i.e. every replicate batch of
+every sample size, so a job run again after a crash, or with more sample sizes or samples, only simulates what is
+missing. Without a seed, the seed drawn at the first run is kept in the checkpoint. The relative paths are relative to
+the directory of the spec.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_TYPES = ["sample_size", "confidence_interval"]
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv=None):
+    """
+    Entry point of the pyretest console script.
+
+    :return: exit status, 0 if all the jobs succeeded
+    """
+    parser = argparse.ArgumentParser(prog="pyretest", description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="run the jobs of a json or yaml spec")
+    run_parser.add_argument("spec", help="path of the job spec")
+    run_parser.add_argument("--workers", type=int, help="worker processes shared by the jobs, overrides the spec")
+    run_parser.add_argument("--checkpoint", help="directory of the checkpoints, overrides the spec")
+    run_parser.add_argument("--jobs", action="append", help="only run the jobs of this name")
+    run_parser.add_argument("--quiet", action="store_true", help="only log the errors")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR if args.quiet else logging.INFO, format="%(asctime)s %(message)s")
+    try:
+        spec = load_spec(args.spec)
+        jobs = spec["jobs"]
+        if args.jobs:
+            jobs = [job for job in jobs if job["name"] in args.jobs]
+        failures = run_jobs(jobs, spec["questions"], args.checkpoint or spec["checkpoint"],
+                            spec["workers"] if args.workers is None else args.workers)
+    except (OSError, ImportError, ValueError, KeyError) as e:
+        logger.error("pyretest: %s", e)
+        return 2
+    return 1 if failures else 0
+
+
+def load_spec(path):
+    """
+    Load a job spec, with the questions loaded, the defaults filled and the paths made absolute.
+
+    :param path: path of a json or yaml spec, see the documentation of the module
+    :return: dict with the keys 'questions', 'workers', 'checkpoint' and 'jobs'
+    """
+    from pyretest.sampler import Question
+    directory = os.path.dirname(os.path.abspath(path))
+    spec = _load_file(path)
+    if not isinstance(spec, dict) or not isinstance(spec.get("jobs"), list):
+        raise ValueError(f"{path}: the spec must have a list of jobs")
+
+    questions = spec.get("questions")
+    if "questionnaire" in spec:
+        questions = _load_file(os.path.join(directory, spec["questionnaire"]))
+    if not questions:
+        raise ValueError(f"{path}: the spec must have questions or a questionnaire")
+    questions = [Question(question["values"], question["probabilities"]) for question in questions]
+
+    jobs = []
+    for i, job in enumerate(spec["jobs"]):
+        job = dict(job)
+        job["name"] = str(job.get("name", i))
+        job.setdefault("type", "sample_size")
+        if job["type"] not in JOB_TYPES:
+            raise ValueError(f"{path}: the type of job {job['name']} must be one of {', '.join(JOB_TYPES)}")
+        if "output" not in job:
+            raise ValueError(f"{path}: job {job['name']} has no output")
+        job["output"] = os.path.join(directory, job["output"])
+        jobs.append(job)
+    if len({job["name"] for job in jobs}) < len(jobs):
+        raise ValueError(f"{path}: the names of the jobs must be unique")
+
+    checkpoint = spec.get("checkpoint", os.path.splitext(os.path.basename(path))[0] + ".checkpoint")
+    return {"questions": questions, "workers": spec.get("workers", 1),
+            "checkpoint": os.path.join(directory, checkpoint), "jobs": jobs}
+
+
+def run_jobs(jobs, questions, checkpoint, workers=1):
+    """
+    Run the jobs concurrently, their blocks of bootstrap samples sharing a pool of workers processes.
+
+    :param jobs: List[dict] jobs of a spec loaded by load_spec
+    :param questions: list of questions
+    :param checkpoint: directory of the checkpoints of the jobs
+    :param workers: number of worker processes shared by the jobs, 1 to run the jobs one after the other in the
+        calling process
+    :return: List[str] names of the jobs that failed
+    """
+    from pyretest.pooled_kappa.bootstrap import _pool
+    failures = []
+    with _pool(workers) as pool:
+        # The jobs only dispatch blocks to the pool, so a thread per job keeps the workers busy
+        with ThreadPoolExecutor(max_workers=1 if pool is None else max(len(jobs), 1)) as threads:
+            futures = {job["name"]: threads.submit(run_job, job, questions, checkpoint, pool) for job in jobs}
+            for name, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error("job %s failed: %r", name, e)
+                    failures.append(name)
+    return failures
+
+
+def run_job(job, questions, checkpoint, executor=None):
+    """
+    Run a job, resuming from its checkpoint, and write its output.
+
+    :param job: dict job of a spec loaded by load_spec
+    :param questions: list of questions
+    :param checkpoint: directory of the checkpoints of the jobs
+    :param executor: concurrent.futures.Executor to run the blocks on, None to run them in the calling process
+    :return: pd.DataFrame written to the output of the job
+    """
+    import pandas as pd
+    from pyretest.pooled_kappa import bootstrap_confidence_interval, bootstrap_sample_size_cohen_kappa, LoggingHook, \
+        ResultCache
+
+    arguments = {key: value for key, value in job.items() if key not in ["name", "type", "output"]}
+    directory = os.path.join(checkpoint, job["name"])
+    arguments["seed"] = _checkpoint_seed(directory, arguments.get("seed"))
+    arguments["cache"] = ResultCache(directory, max_bytes=None)
+    arguments["executor"] = executor
+    arguments["hook"] = LoggingHook(logging.getLogger(f"{__name__}.{job['name']}"))
+
+    logger.info("job %s: %s", job["name"], job["type"])
+    if job["type"] == "sample_size":
+        results = bootstrap_sample_size_cohen_kappa(questions, **arguments)
+        output = results.df
+        logger.info("job %s: sample size %s", job["name"], results.sample_size)
+    else:
+        output = pd.DataFrame([bootstrap_confidence_interval(questions, **arguments)._asdict()])
+    _write(output, job["output"])
+    logger.info("job %s: wrote %s", job["name"], job["output"])
+    return output
+
+
+def _checkpoint_seed(directory, seed):
+    """
+    Keep the seed of a job in its checkpoint, drawing one at the first run if the job has none.
+    """
+    import numpy as np
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "seed.json")
+    if seed is None and os.path.exists(path):
+        with open(path) as file:
+            return json.load(file)["seed"]
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    with open(path, "w") as file:
+        json.dump({"seed": seed}, file)
+    return seed
+
+
+def _load_file(path):
+    """
+    Load a json or yaml file, by its extension.
+    """
+    with open(path) as file:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("reading yaml specs requires pyyaml, pip install pyretest[yaml]")
+            return yaml.safe_load(file)
+        return json.load(file)
+
+
+def _write(output, path):
+    """
+    Write a dataframe to csv, or to parquet if the path ends with .parquet.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if path.endswith(".parquet"):
+        output.to_parquet(path, index=False)
+    else:
+        output.to_csv(path, index=False)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
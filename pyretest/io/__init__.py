@@ -0,0 +1,2 @@
+from pyretest.io.paired_responses import read_responses, iter_paired_codes, accumulate_paired_files, \
+    save_paired_codes, load_paired_codes
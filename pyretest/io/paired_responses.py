@@ -0,0 +1,244 @@
+import os
+import tempfile
+
+import numpy as np
+
+from pyretest.sampler import encode_responses
+
+
+def read_responses(path, questions, id_column=None, item_columns=None, chunksize=100000):
+    """
+    Read the answers of a questionnaire file chunk by chunk, encoded as category codes.
+
+    Supported formats, by extension:
+        - .csv (optionally compressed, e.g. .csv.gz): read with pandas in chunks of chunksize rows,
+        - .parquet or .pq: read with pyarrow in batches of chunksize rows (pip install pyarrow),
+        - .npy: array of answers of shape (n, n_columns), memory-mapped and read in slices of chunksize rows.
+
+    :param path: path of the file, one row per subject
+    :param questions: List[Question] used to encode the answers, in the order of the item columns
+    :param id_column: column with the subject id (index for .npy files), None to use the row position
+    :param item_columns: columns of the items in the order of the questions, default: all the columns but the id
+    :param chunksize: number of rows per chunk
+    :return: iterator over Tuple[np.ndarray, np.ndarray] ids of shape (n_chunk,) and codes of shape
+        (n_chunk, n_items) of each chunk
+    """
+    path = str(path)
+    if path.endswith(".npy"):
+        chunks = _read_npy(path, id_column, item_columns, chunksize)
+    elif path.endswith(".parquet") or path.endswith(".pq"):
+        chunks = _read_parquet(path, id_column, item_columns, chunksize)
+    elif ".csv" in path:
+        chunks = _read_csv(path, id_column, item_columns, chunksize)
+    else:
+        raise ValueError(f"unsupported file format: {path}, use .csv, .parquet or .npy")
+
+    start = 0
+    for ids, columns in chunks:
+        if len(columns) != len(questions):
+            raise ValueError(f"{path} has {len(columns)} item columns but there are {len(questions)} questions")
+        # Encode each typed column on its own, so the chunk is never converted to an object matrix
+        codes = np.stack([encode_responses(np.asarray(column)[:, None], [question])[:, 0]
+                          for column, question in zip(columns, questions)], axis=1)
+        if ids is None:
+            ids = np.arange(start, start + len(codes))
+        start += len(codes)
+        yield ids, codes
+
+
+def iter_paired_codes(test_path, retest_path, questions, id_column=None, item_columns=None, chunksize=100000):
+    """
+    Join the answers of the test and the retest files by subject id, chunk by chunk.
+
+    The codes of the test are written chunk by chunk to a temporary file and memory-mapped, so only the subject ids of
+    the test are kept in memory, and the retest is streamed. Only the subjects present in both files are yielded, in
+    the order of the retest. Ids of different types in the two files, e.g. integers in the test and strings in the
+    retest, are compared as strings. A subject id repeated in either file is an error rather than a guess of which
+    answers to pair: the test is checked before pairing, the retest as its chunks are paired, and the retest ids that
+    are not in the test, kept until the end, once the retest is read.
+
+    :param test_path: path of the file of the test (first rater)
+    :param retest_path: path of the file of the retest (second rater)
+    :param questions: List[Question] used to encode the answers
+    :param id_column: column with the subject id, None to join by row position
+    :param item_columns: columns of the items in the order of the questions, default: all the columns but the id
+    :param chunksize: number of rows per chunk
+    :return: iterator over Tuple[np.ndarray, np.ndarray] codes of shape (n_chunk, n_items) of the test and the retest
+    :raises ValueError: if a subject id is repeated in the test or in the retest, or if no subject of the retest is in
+        the test
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        codes_path = os.path.join(directory, "test.codes")
+        test_ids = []
+        dtype = None
+        with open(codes_path, "wb") as file:
+            for ids, codes in read_responses(test_path, questions, id_column, item_columns, chunksize):
+                dtype = codes.dtype
+                codes.tofile(file)
+                test_ids.append(ids)
+        if dtype is None:
+            return
+        test_ids = np.concatenate(test_ids)
+        if len(test_ids) == 0:
+            return
+        test_codes = np.memmap(codes_path, dtype=dtype, mode="r", shape=(len(test_ids), len(questions)))
+
+        # The sorted ids of the test, as they are or as strings, built when first needed
+        indexes = {}
+
+        def index(as_strings):
+            if as_strings not in indexes:
+                keys = test_ids.astype(str) if as_strings else test_ids
+                order = np.argsort(keys, kind="stable")
+                sorted_ids = keys[order]
+                _check_unique(sorted_ids, test_path)
+                indexes[as_strings] = order, sorted_ids
+            return indexes[as_strings]
+
+        index(not _numeric(test_ids))
+        # Whether each subject of the test was paired, to find the ids repeated in the retest across its chunks, and
+        # the ids of the retest missing from the test, checked once the retest is read
+        paired = np.zeros(len(test_ids), dtype=bool)
+        missing = []
+        n_retest = 0
+        for ids, codes_b in read_responses(retest_path, questions, id_column, item_columns, chunksize):
+            as_strings = not (_numeric(test_ids) and _numeric(ids))
+            order, sorted_ids = index(as_strings)
+            keys = ids.astype(str) if as_strings else ids
+            _check_unique(np.sort(keys, kind="stable"), retest_path)
+            positions = np.minimum(np.searchsorted(sorted_ids, keys), len(sorted_ids) - 1)
+            found = sorted_ids[positions] == keys
+            rows = order[positions[found]]
+            if np.any(paired[rows]):
+                raise ValueError(f"the subject id {keys[found][paired[rows]][0].item()!r} is repeated in {retest_path}")
+            paired[rows] = True
+            missing.append(keys[~found])
+            n_retest += len(ids)
+            yield np.asarray(test_codes[rows]), codes_b[found]
+        del test_codes
+        if missing:
+            if not all(_numeric(keys) for keys in missing):
+                missing = [keys.astype(str) for keys in missing]
+            _check_unique(np.sort(np.concatenate(missing)), retest_path)
+        if n_retest > 0 and not paired.any():
+            raise ValueError(f"none of the subject ids of {retest_path} is in {test_path}")
+
+
+def accumulate_paired_files(test_path, retest_path, questions, id_column=None, item_columns=None, chunksize=100000,
+                            accumulator=None):
+    """
+    Stream the paired answers of the test and the retest files into a KappaAccumulator.
+
+    :param accumulator: KappaAccumulator to update, default: a new one built from the questions
+    :return: KappaAccumulator, e.g. call .kappa(weight_type) to compute the pooled Cohen's Kappa
+    """
+    from pyretest.pooled_kappa import KappaAccumulator
+    if accumulator is None:
+        accumulator = KappaAccumulator(questions)
+    for codes_a, codes_b in iter_paired_codes(test_path, retest_path, questions, id_column, item_columns, chunksize):
+        accumulator.update_codes(codes_a, codes_b)
+    return accumulator
+
+
+def save_paired_codes(path, paired_codes):
+    """
+    Persist paired codes as a single .npy array of shape (2, n, n_items), to be loaded zero-copy by load_paired_codes.
+
+    The chunks are streamed to temporary files next to path, then copied into the memory-mapped array once the number
+    of subjects is known, so the codes are never all in memory.
+
+    :param path: path of the .npy file
+    :param paired_codes: iterable of Tuple[np.ndarray, np.ndarray] chunks of codes of the test and the retest, e.g.
+        iter_paired_codes(...), all of the same dtype and number of items
+    :return: number of subjects saved
+    """
+    path = str(path)
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as directory:
+        raw_paths = [os.path.join(directory, "test.codes"), os.path.join(directory, "retest.codes")]
+        n, n_items, dtype = 0, 0, np.dtype(np.uint8)
+        with open(raw_paths[0], "wb") as file_a, open(raw_paths[1], "wb") as file_b:
+            for i, (codes_a, codes_b) in enumerate(paired_codes):
+                codes_a, codes_b = np.asarray(codes_a), np.asarray(codes_b)
+                if i == 0:
+                    n_items, dtype = codes_a.shape[1], np.result_type(codes_a, codes_b)
+                if codes_a.shape != codes_b.shape or codes_a.shape[1] != n_items or \
+                        not np.can_cast(np.result_type(codes_a, codes_b), dtype):
+                    raise ValueError("the chunks must have the same number of items and dtype")
+                codes_a.astype(dtype, copy=False).tofile(file_a)
+                codes_b.astype(dtype, copy=False).tofile(file_b)
+                n += len(codes_a)
+
+        paired = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(2, n, n_items))
+        if n * n_items > 0:
+            # Copy the codes in slices of about 16 MiB
+            step = max(1, 2 ** 24 // (n_items * dtype.itemsize))
+            for side, raw_path in enumerate(raw_paths):
+                codes = np.memmap(raw_path, dtype=dtype, mode="r", shape=(n, n_items))
+                for start in range(0, n, step):
+                    paired[side, start:start + step] = codes[start:start + step]
+                del codes
+        paired.flush()
+        del paired
+    return n
+
+
+def load_paired_codes(path):
+    """
+    Memory-map paired codes saved by save_paired_codes.
+
+    :param path: path of the .npy file
+    :return: Tuple[np.memmap, np.memmap] read-only codes of shape (n, n_items) of the test and the retest
+    """
+    paired = np.load(str(path), mmap_mode="r")
+    return paired[0], paired[1]
+
+
+def _check_unique(sorted_ids, path):
+    """
+    Raise a ValueError naming the first repeated subject id of sorted ids read from path.
+    """
+    repeated = sorted_ids[1:][sorted_ids[1:] == sorted_ids[:-1]]
+    if len(repeated) > 0:
+        raise ValueError(f"the subject id {repeated[0].item()!r} is repeated in {path}")
+
+
+def _numeric(ids):
+    """
+    Whether the subject ids are numbers, compared as they are, rather than compared as strings.
+    """
+    return ids.dtype.kind in "biuf"
+
+
+def _read_csv(path, id_column, item_columns, chunksize):
+    import pandas as pd
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        yield _split_columns(chunk, id_column, item_columns)
+
+
+def _read_parquet(path, id_column, item_columns, chunksize):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("reading parquet files requires pyarrow: pip install pyarrow")
+    columns = None if item_columns is None else ([] if id_column is None else [id_column]) + list(item_columns)
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+        yield _split_columns(batch.to_pandas(), id_column, item_columns)
+
+
+def _read_npy(path, id_column, item_columns, chunksize):
+    answers = np.load(path, mmap_mode="r")
+    columns = [col for col in range(answers.shape[1]) if col != id_column] if item_columns is None \
+        else list(item_columns)
+    for start in range(0, answers.shape[0], chunksize):
+        chunk = answers[start:start + chunksize]
+        yield None if id_column is None else np.asarray(chunk[:, id_column]), [chunk[:, col] for col in columns]
+
+
+def _split_columns(frame, id_column, item_columns):
+    """
+    Split a chunk of a dataframe in the ids and the answers of each item.
+    """
+    if item_columns is None:
+        item_columns = [column for column in frame.columns if column != id_column]
+    ids = None if id_column is None else frame[id_column].to_numpy()
+    return ids, [frame[column].to_numpy() for column in item_columns]
@@ -1,2 +1,11 @@
+from pyretest.pooled_kappa.accumulator import KappaAccumulator
+from pyretest.pooled_kappa.analytic import pooled_kappa_asymptotic_variance, analytic_power
 from pyretest.pooled_kappa.bootstrap import bootstrap_confidence_interval, bootstrap_sample_size_cohen_kappa
-from pyretest.pooled_kappa.pooled_cohen_kappa import pooled_cohen_kappa
\ No newline at end of file
+from pyretest.pooled_kappa.cache import ResultCache
+from pyretest.pooled_kappa.contingency import contingency_tables, pooled_kappa_from_tables, pooled_kappa_from_packed, \
+    pooled_kappa_from_codes, category_buckets, bucket_contingency_tables, weight_matrix
+from pyretest.pooled_kappa.empirical import empirical_bootstrap_confidence_interval, jackknife_standard_error
+from pyretest.pooled_kappa.hooks import BootstrapHook, TqdmHook, LoggingHook
+from pyretest.pooled_kappa.pooled_cohen_kappa import pooled_cohen_kappa, batched_pooled_cohen_kappa
+from pyretest.pooled_kappa.shards import WorkUnit, plan_work_units, run_work_unit, reduce_work_units
+from pyretest.pooled_kappa.sweep import bootstrap_power_surface
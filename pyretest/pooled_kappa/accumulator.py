@@ -0,0 +1,93 @@
+import numpy as np
+
+from pyretest.pooled_kappa.contingency import contingency_tables, pooled_kappa_from_tables
+
+
+class KappaAccumulator:
+    """
+    Accumulate the contingency tables of paired responses chunk by chunk, to compute the pooled Cohen's Kappa of
+    datasets that do not fit in memory.
+
+    Only the c x c table of each item is kept, so the memory is O(n_items * c^2) whatever the number of subjects.
+    Accumulators built on different shards (e.g. in different processes, they can be pickled) are combined with merge,
+    and the unweighted or weighted pooled kappa can be computed at any point.
+
+    Usage:
+        accumulator = KappaAccumulator(questions)
+        for chunk_a, chunk_b in chunks:
+            accumulator.update(chunk_a, chunk_b)
+        k = accumulator.kappa(weight_type="linear")
+    """
+
+    def __init__(self, questions=None, n_categories=None):
+        """
+        :param questions: List[Question] used to encode the answers, their order defines the weights
+        :param n_categories: List[int] number of values of each item, if the accumulator is only fed with codes
+        """
+        if questions is None and n_categories is None:
+            raise ValueError("questions or n_categories must be provided")
+        self.questions = questions
+        self.n_categories = [len(question.values) for question in questions] if n_categories is None \
+            else list(n_categories)
+        self.tables = [np.zeros((c, c), dtype=np.int64) for c in self.n_categories]
+
+    @property
+    def n(self):
+        """
+        Number of subjects accumulated.
+        """
+        return int(self.tables[0].sum()) if self.tables else 0
+
+    def update(self, samples_a, samples_b):
+        """
+        Add a chunk of paired answers.
+
+        :param samples_a: array-like of answers of shape (n_chunk, n_items) from the first rater
+        :param samples_b: array-like of answers of shape (n_chunk, n_items) from the second rater, same subjects
+        :return: self
+        """
+        from pyretest.sampler import encode_responses
+        if self.questions is None:
+            raise ValueError("questions must be provided to encode the answers, use update_codes instead")
+        return self.update_codes(encode_responses(samples_a, self.questions),
+                                 encode_responses(samples_b, self.questions))
+
+    def update_codes(self, codes_a, codes_b):
+        """
+        Add a chunk of paired answers encoded as category codes (index of the answer in question.values).
+
+        :param codes_a: array-like of codes of shape (n_chunk, n_items) from the first rater
+        :param codes_b: array-like of codes of shape (n_chunk, n_items) from the second rater, same subjects
+        :return: self
+        """
+        codes_a = np.asarray(codes_a)
+        codes_b = np.asarray(codes_b)
+        if codes_a.shape != codes_b.shape or codes_a.ndim != 2 or codes_a.shape[1] != len(self.n_categories):
+            raise ValueError("codes_a and codes_b must be of shape (n_chunk, n_items)")
+        for table, chunk_table in zip(self.tables, contingency_tables(codes_a, codes_b, self.n_categories)):
+            table += chunk_table
+        return self
+
+    def merge(self, other):
+        """
+        Add the tables of another accumulator, e.g. built on another shard of the subjects.
+
+        :param other: KappaAccumulator with the same number of values for each item
+        :return: self
+        """
+        if other.n_categories != self.n_categories:
+            raise ValueError("the accumulators must have the same number of values for each item")
+        for table, other_table in zip(self.tables, other.tables):
+            table += other_table
+        return self
+
+    def kappa(self, weight_type=None):
+        """
+        Compute the pooled Cohen's Kappa of the subjects accumulated so far.
+
+        :param weight_type: Union[None, "linear", "quadratic"] weights type to use for the agreement calculation
+        :return: pooled Cohen's Kappa
+        """
+        if self.n == 0:
+            return 0
+        return pooled_kappa_from_tables(self.tables, weight_type=weight_type)
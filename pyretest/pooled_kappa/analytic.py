@@ -0,0 +1,132 @@
+from statistics import NormalDist
+
+import numpy as np
+
+from pyretest.pooled_kappa.contingency import weight_matrix
+
+# Smallest sample size for which the analytic results agree with the bootstrap, see analytic_confidence_interval
+MIN_ANALYTIC_N = 50
+
+
+def pooled_kappa_asymptotic_variance(questions, n, weight_type=None, reliability=None):
+    """
+    Compute the expected pooled Cohen's Kappa of n simulated samples and its asymptotic (delta method) variance.
+
+    The samples are simulated as in the bootstrap functions: the answers of both raters are drawn from the
+    probabilities of the questions, and with a reliability the answers copied by make_reliable agree. The kappa is a
+    smooth function of the contingency tables of the items, whose covariance is multinomial within the copied and the
+    independent samples, so its variance is approximated by g' Cov g with g the gradient of the kappa at the expected
+    tables.
+
+    :param questions: list of questions
+    :param n: number of samples
+    :param weight_type: weighting scheme to use either None, 'linear', or 'quadratic' (default: None)
+    :param reliability: reliability of the retest, None (or 0) for independent raters (default: None)
+    :return: Tuple[float, float] expected kappa and its variance
+    """
+    from pyretest.pooled_kappa.bootstrap import _n_copied_answers
+
+    n_items = len(questions)
+    n_copied = np.zeros(n_items) if reliability is None else _n_copied_answers(n, n_items, reliability)
+
+    # Expected tables, agreement and expected random agreement of each item
+    items = []
+    for col, question in enumerate(questions):
+        probabilities = np.asarray(question.probabilities, dtype=float)
+        probabilities = probabilities / probabilities.sum()
+        weights = weight_matrix(len(probabilities), weight_type)
+        independent = np.outer(probabilities, probabilities)
+        copied = np.diag(probabilities)
+        table = (n_copied[col] * copied + (n - n_copied[col]) * independent) / n
+        items.append((weights, table, independent, copied, n_copied[col]))
+    accuracy = np.mean([np.sum(weights * table) for weights, table, _, _, _ in items])
+    expected_random_agreement = np.mean([table.sum(axis=1) @ weights @ table.sum(axis=0)
+                                         for weights, table, _, _, _ in items])
+    kappa = (accuracy - expected_random_agreement) / (1 - expected_random_agreement)
+
+    # Delta method, the items being independent given whether the samples are copied
+    variance = 0
+    for weights, table, independent, copied, m in items:
+        gradient_random_agreement = (weights @ table.sum(axis=0))[:, None] + (table.sum(axis=1) @ weights)[None, :]
+        gradient = (weights / (1 - expected_random_agreement)
+                    - gradient_random_agreement * (1 - accuracy) / (1 - expected_random_agreement) ** 2) / n_items
+        for count, cells in [(m, copied), (n - m, independent)]:
+            variance += count * (np.sum(cells * gradient ** 2) - np.sum(cells * gradient) ** 2) / n ** 2
+    return kappa, variance
+
+
+def analytic_confidence_interval(questions, n, weight_type=None, alpha=0.05):
+    """
+    Compute the confidence interval of the cohen kappa of independent raters from its asymptotic normal distribution.
+
+    This is the analytic counterpart of bootstrap_confidence_interval. Compared to 20000 bootstrap samples on binary,
+    5-point and 7-point questionnaires of 3 to 10 items, unweighted and quadratic, the standard deviation agrees to
+    within 2% and the bounds to within 0.003 for n >= MIN_ANALYTIC_N. Below that, the distribution of the kappa gets
+    skewed and discrete (at n = 20 the standard deviation is overestimated by up to 4% and the bounds are off by up to
+    0.008), and a warning suggests to use the bootstrap.
+
+    :param questions: list of questions
+    :param n: number of samples
+    :param weight_type: weighting scheme to use either None, 'linear', or 'quadratic' (default: None)
+    :param alpha: type I error rate (1-confidence) default: 0.05
+    :return: namedtuple("CIInfo", "mean lowerbound upperbound std")
+    """
+    from pyretest.pooled_kappa.bootstrap import CIInfo
+
+    _check_regime(n)
+    mean, variance = pooled_kappa_asymptotic_variance(questions, n, weight_type=weight_type)
+    std = np.sqrt(variance)
+    z = NormalDist().inv_cdf(1 - alpha / 2)
+    return CIInfo(mean, mean - z * std, mean + z * std, std)
+
+
+def analytic_power(questions, n, weight_type=None, reliability=0.1, alpha=0.05):
+    """
+    Compute the power of the one sided test of the cohen kappa against independent raters at the level alpha.
+
+    The test rejects when the kappa is above the (1 - alpha) quantile of its normal approximation under independence,
+    and the power is the probability of this event under the normal approximation with the given reliability.
+
+    :return: List with the values of POWER_COLUMNS ['n', 'power', 'upper_bound_ci', 'mean_kappa_h0', 'mean_kappa_h1']
+    """
+    mean_h0, variance_h0 = pooled_kappa_asymptotic_variance(questions, n, weight_type=weight_type)
+    mean_h1, variance_h1 = pooled_kappa_asymptotic_variance(questions, n, weight_type=weight_type,
+                                                            reliability=reliability)
+    upper_bound = mean_h0 + NormalDist().inv_cdf(1 - alpha) * np.sqrt(variance_h0)
+    power = 1 - NormalDist(mean_h1, np.sqrt(variance_h1)).cdf(upper_bound)
+    return [n, power, upper_bound, mean_h0, mean_h1]
+
+
+def analytic_sample_size_cohen_kappa(questions, max_n, weight_type=None, start_n=10, n_step=10, reliability=0.1,
+                                     alpha=0.05, beta=0.8):
+    """
+    Compute the sample size for the cohen kappa from the analytic power of each sample size.
+
+    This is the analytic counterpart of bootstrap_sample_size_cohen_kappa, with the same validity domain as
+    analytic_confidence_interval: the power agrees with the bootstrap to within 0.01 for n >= MIN_ANALYTIC_N, and is
+    overestimated by up to 0.06 at n = 20. A warning is emitted if the sample size found is below MIN_ANALYTIC_N.
+
+    :return: namedtuple("SSInfo", "sample_size df")
+    """
+    import pandas as pd
+    from pyretest.pooled_kappa.bootstrap import SSInfo, POWER_COLUMNS
+
+    power_by_n = pd.DataFrame([analytic_power(questions, n, weight_type=weight_type, reliability=reliability,
+                                              alpha=alpha)
+                               for n in range(start_n, max_n + 1, n_step)], columns=POWER_COLUMNS)
+    power_by_n_filtered = power_by_n[power_by_n['power'] >= beta]
+    if len(power_by_n_filtered) == 0:
+        return SSInfo(None, power_by_n)
+    sample_size = power_by_n_filtered['n'].min()
+    _check_regime(sample_size)
+    return SSInfo(sample_size, power_by_n)
+
+
+def _check_regime(n):
+    """
+    Warn if n is too small for the analytic results to agree with the bootstrap.
+    """
+    import warnings
+    if n < MIN_ANALYTIC_N:
+        warnings.warn(f"n={n} is below {MIN_ANALYTIC_N}, the analytic approximation may differ from the bootstrap: "
+                      f"use method='bootstrap'")
@@ -1,42 +1,106 @@
+import time
 from collections import namedtuple
+from contextlib import contextmanager
+from functools import partial
+from statistics import NormalDist
 
 import numpy as np
-from tqdm import tqdm
-import pandas as pd
+
+from pyretest.pooled_kappa.hooks import BootstrapHook, TqdmHook, PointStats, _phase, _add_timings
+from pyretest.sampler.sample_questionnaire import _n_copied_answers
 
 CIInfo = namedtuple("CIInfo", "mean lowerbound upperbound std")
 
+# Returned in sequential mode, with the number of bootstrap samples run and the Monte-Carlo error of the bounds
+SequentialCIInfo = namedtuple("SequentialCIInfo", CIInfo._fields + ("n_bootstrap", "mc_error"))
+
 
-def bootstrap_confidence_interval(questions, n, weight_type=None, n_bootstrap=1000, alpha=0.05, seed=None):
+def bootstrap_confidence_interval(questions, n, weight_type=None, n_bootstrap=1000, alpha=0.05, seed=None, n_jobs=1,
+                                  executor=None, batch_size=100, simulation="responses", method="bootstrap",
+                                  tolerance=None, cache=None, hook=None):
     """
     Compute the bootstrap confidence interval of the cohen kappa for the given questions.
 
+    The replicates are simulated in blocks of batch_size, each block drawing from its own stream spawned from
+    numpy.random.SeedSequence(seed). The global random state is left untouched, and for a given seed the results are
+    identical whatever the number of workers.
+
+    With simulation="tables", the contingency table of each item is drawn directly from a multinomial over its cells
+    instead of sampling the n answers, so the cost of a bootstrap sample does not depend on n.
+
+    With method="analytic", no sample is simulated: the interval is derived from the asymptotic normal distribution
+    of the kappa, see pyretest.pooled_kappa.analytic.analytic_confidence_interval for its validity domain.
+
+    With a tolerance, the bootstrap is sequential: blocks of batch_size samples are simulated until the Monte-Carlo
+    standard error of both bounds is at most tolerance, n_bootstrap being the maximum number of samples. The result is
+    a SequentialCIInfo reporting the number of samples run and the error achieved.
+
     :param questions: list of questions
     :param n: number of samples
     :param weight_type: weighting scheme to use either None, 'linear', or 'quadratic' (default: None)
     :param n_bootstrap: number of bootstrap samples
     :param alpha: type I error rate (1-confidence) default: 0.05
     :param seed: random seed
+    :param n_jobs: number of worker processes, -1 to use all the cpus (default: 1)
+    :param executor: concurrent.futures.Executor to run the blocks on, overrides n_jobs (default: None)
+    :param batch_size: number of bootstrap samples simulated per block (default: 100)
+    :param simulation: either 'responses' to sample the answers, or 'tables' to sample the contingency tables
+            (default: 'responses')
+    :param method: either 'bootstrap' or 'analytic' (default: 'bootstrap')
+    :param tolerance: Monte-Carlo standard error of the bounds at which to stop, None to always run n_bootstrap
+            samples (default: None)
+    :param cache: ResultCache (or its directory) keeping the simulated blocks on disk for later calls with the same
+            configuration, requires a seed (default: None)
+    :param hook: BootstrapHook receiving the progress and timings, e.g. LoggingHook(), None to report nothing
+            (default: None)
 
-    :return: namedtuple("CIInfo", "mean lowerbound upperbound std")
+    :return: namedtuple("CIInfo", "mean lowerbound upperbound std"), with a tolerance
+            namedtuple("SequentialCIInfo", "mean lowerbound upperbound std n_bootstrap mc_error")
     """
-    from pyretest import sample_questionnaire
-    from pyretest import pooled_cohen_kappa
+    if method == "analytic":
+        from pyretest.pooled_kappa.analytic import analytic_confidence_interval
+        return analytic_confidence_interval(questions, n, weight_type=weight_type, alpha=alpha)
+    if method != "bootstrap":
+        raise ValueError("method must be 'bootstrap' or 'analytic'")
 
-    import random
-    if seed is not None:
-        random.seed(seed)
+    cache = _check_cache(cache, seed)
+    hook = BootstrapHook() if hook is None else hook
 
     # Compute the cohen kappa for each bootstrap sample
-    cohen_kappa_bootstrap = []
-    for i in range(n_bootstrap):
-        samples_a = sample_questionnaire(questions, n)
-        samples_b = sample_questionnaire(questions, n)
-        cohen_kappa_bootstrap.append(
-            pooled_cohen_kappa(samples_a, samples_b, weight_type=weight_type, questions=questions))
-    # Compute the confidence interval
-    cohen_kappa_bootstrap = np.array(cohen_kappa_bootstrap)
-    cohen_kappa_bootstrap.sort()
+    with _pool(n_jobs, executor) as pool, _reporting(hook, f"Confidence interval of n={n}", 1):
+        simulator = _BootstrapSimulator(questions, weight_type, None, batch_size, np.random.SeedSequence(seed), pool,
+                                        simulation, cache, hook.profile)
+        progress = _Progress(hook, simulator)
+        if tolerance is None:
+            cohen_kappa_bootstrap, _ = next(simulator.iter_kappas([n], n_bootstrap))
+            with progress.reduction(n):
+                confidence_interval = _confidence_interval(cohen_kappa_bootstrap, alpha)
+            progress.done(n, n_bootstrap)
+            return confidence_interval
+
+        # Add blocks until both bounds are precise enough
+        budget = 0
+        while True:
+            budget = min(budget + batch_size, n_bootstrap)
+            cohen_kappa_bootstrap, _ = next(simulator.iter_kappas([n], budget))
+            with progress.reduction(n):
+                cohen_kappa_bootstrap.sort()
+                mc_error = max(_quantile_mc_error(cohen_kappa_bootstrap, alpha / 2),
+                               _quantile_mc_error(cohen_kappa_bootstrap, 1 - alpha / 2))
+            if mc_error <= tolerance or budget == n_bootstrap:
+                progress.done(n, budget)
+                return SequentialCIInfo(*_confidence_interval(cohen_kappa_bootstrap, alpha), budget, mc_error)
+            progress.lap(n)
+
+
+def _confidence_interval(cohen_kappa_bootstrap, alpha):
+    """
+    Compute the percentile confidence interval of the cohen kappa of the bootstrap samples.
+
+    :return: namedtuple("CIInfo", "mean lowerbound upperbound std")
+    """
+    cohen_kappa_bootstrap = np.sort(cohen_kappa_bootstrap)
+    n_bootstrap = len(cohen_kappa_bootstrap)
     lower_bound = cohen_kappa_bootstrap[int(n_bootstrap * alpha / 2)]
     upper_bound = cohen_kappa_bootstrap[int(n_bootstrap * (1 - alpha / 2))]
     mean = np.mean(cohen_kappa_bootstrap)
@@ -44,16 +108,82 @@ def bootstrap_confidence_interval(questions, n, weight_type=None, n_bootstrap=10
     return CIInfo(mean, lower_bound, upper_bound, std)
 
 
+def _quantile_mc_error(cohen_kappa_bootstrap, q):
+    """
+    Estimate the Monte-Carlo standard error of the q quantile of the cohen kappa of the bootstrap samples.
+
+    The standard error of the quantile of m samples is sqrt(q (1 - q) / m) / f, with f the density at the quantile. The
+    density is taken from a normal approximation of the kappa, which is more stable than the spacing of the few order
+    statistics in the tails.
+    """
+    std = np.std(cohen_kappa_bootstrap)
+    return np.sqrt(q * (1 - q) / len(cohen_kappa_bootstrap)) * std / NormalDist().pdf(NormalDist().inv_cdf(q))
+
+
+def _power_mc_error(row, cohen_kappa_bootstrap, cohen_kappa_bootstrap_reliable, alpha):
+    """
+    Estimate the Monte-Carlo standard error of the power of a row of _power_row.
+
+    The binomial error of the power at a fixed upper bound, with one success and one failure added so that it does not
+    vanish when the power is 0 or 1, is combined with the error of the upper bound times the density of the kappa under
+    H1 at the upper bound.
+    """
+    m = len(cohen_kappa_bootstrap_reliable)
+    power = (row[1] * m + 1) / (m + 2)
+    std_reliable = np.std(cohen_kappa_bootstrap_reliable)
+    density = 0 if std_reliable == 0 else NormalDist(row[4], std_reliable).pdf(row[2])
+    upper_bound_error = _quantile_mc_error(cohen_kappa_bootstrap, 1 - alpha)
+    return np.sqrt(power * (1 - power) / m + (density * upper_bound_error) ** 2)
+
+
 SSInfo = namedtuple("SSInfo", ["sample_size", "df"])
 
+POWER_COLUMNS = ['n', 'power', 'upper_bound_ci', 'mean_kappa_h0', 'mean_kappa_h1']
+
+
 def bootstrap_sample_size_cohen_kappa(questions, max_n, weight_type=None,
                                       start_n=10, n_step=10, reliability=0.1, n_bootstrap=1000,
-                                      alpha=0.05, beta=0.8, seed=None):
+                                      alpha=0.05, beta=0.8, seed=None, n_jobs=1, executor=None, batch_size=100,
+                                      search="grid", coarse_bootstrap=None, common_random_numbers=False,
+                                      simulation="responses", method="bootstrap", tolerance=None,
+                                      decision_confidence=0.99, cache=None, hook=None):
     """
     Compute the bootstrap sample size for the cohen kappa for the given questions.
 
     The kappa value is expected to be close to the reliability value.
 
+    With search="grid", every sample size from start_n to max_n with steps of n_step is evaluated with n_bootstrap
+    samples. With search="adaptive", the same sample sizes are searched in three phases:
+        1. the crossing of beta is bracketed with cheap power estimates (coarse_bootstrap samples) at sample sizes
+           doubling their distance to start_n,
+        2. the bracket is refined by bisection, still with cheap estimates,
+        3. the full n_bootstrap samples are only spent at the candidate and its neighbours, until the power is at least
+           beta at the returned sample size and below beta n_step samples before.
+    The samples of a given sample size do not depend on the search, so the rows evaluated with the full budget are
+    identical to the ones of the grid search.
+
+    With common_random_numbers=True, each bootstrap sample is drawn once at the largest sample size, and the cohen
+    kappa of every smaller sample size is read off the running contingency tables of its first subjects. The cost is
+    one simulation at max_n per bootstrap sample, and the power curve is smooth since the sample sizes share their
+    samples. To keep every prefix at the expected reliability, each answer of the retest is then copied from the
+    first test with probability reliability (make_reliable_codes with mode="bernoulli").
+
+    With simulation="tables", the contingency table of each item is drawn directly from a multinomial over its cells
+    instead of sampling the n answers, so the cost of a bootstrap sample does not depend on n and sample sizes in the
+    tens of thousands can be searched. Under H0 the cells probabilities are the products of the item marginals. Under
+    H1 the answers copied by make_reliable fall on the diagonal, and the others are independent. The distribution of
+    the kappa under each hypothesis is the same as when sampling the answers, but the H0 and H1 tables of a bootstrap
+    sample are drawn independently. This backend cannot be combined with common_random_numbers.
+
+    With method="analytic", no sample is simulated: the power of each sample size of the grid is computed from the
+    asymptotic normal distributions of the kappa, see pyretest.pooled_kappa.analytic.analytic_sample_size_cohen_kappa
+    for its validity domain. The simulation options are then ignored.
+
+    With a tolerance, the grid search is sequential: the sample sizes are simulated in rounds of one block of
+    batch_size samples, and a sample size stops once the Monte-Carlo standard error of its power is at most tolerance,
+    or once its power is on one side of beta with the given decision_confidence, n_bootstrap being the maximum number
+    of samples. Sample sizes far from the crossing of beta thus stop after a few blocks.
+
     :param questions: list of questions
     :param max_n: maximum sample size
     :param weight_type: weighting scheme to use either None, 'linear', or 'quadratic' (default: None)
@@ -66,54 +196,92 @@ def bootstrap_sample_size_cohen_kappa(questions, max_n, weight_type=None,
     :param alpha: type I error rate
     :param beta: 1 - type II error rate (power)
     :param seed: random seed
+    :param n_jobs: number of worker processes, -1 to use all the cpus (default: 1)
+    :param executor: concurrent.futures.Executor to run the blocks on, overrides n_jobs (default: None)
+    :param batch_size: number of bootstrap samples simulated per block (default: 100)
+    :param search: either 'grid' or 'adaptive' (default: 'grid')
+    :param coarse_bootstrap: number of bootstrap samples of the cheap estimates of the adaptive search
+            (default: n_bootstrap / 10, at least batch_size)
+    :param common_random_numbers: reuse the samples drawn at max_n for all the sample sizes (default: False)
+    :param simulation: either 'responses' to sample the answers, or 'tables' to sample the contingency tables
+            (default: 'responses')
+    :param method: either 'bootstrap' or 'analytic' (default: 'bootstrap')
+    :param tolerance: Monte-Carlo standard error of the power at which to stop, None to always run n_bootstrap samples
+            (default: None)
+    :param decision_confidence: confidence at which the power is known to be above or below beta, to stop before the
+            tolerance is reached, None to only stop on the tolerance (default: 0.99)
+    :param cache: ResultCache (or its directory) keeping the simulated blocks on disk, so that later calls with the
+            same configuration only simulate the missing sample sizes and samples, requires a seed (default: None)
+    :param hook: BootstrapHook receiving the progress and timings of each sample size, e.g. LoggingHook() or
+            BootstrapHook() to report nothing, None for a tqdm progress bar (default: None)
 
-    :return: namedtuple("SSInfo", "sample_size df")
+    :return: namedtuple("SSInfo", "sample_size df"), with search="adaptive" df has one row per evaluated sample size
+            and extra 'n_bootstrap' and 'refined' columns with the number of bootstrap samples of its estimate and
+            whether it is a full n_bootstrap estimate: sample_size is the smallest refined sample size with a power
+            of at least beta, while the cheap estimates of the other rows may cross beta at a different sample size
+            through Monte-Carlo noise. With a tolerance df has extra 'n_bootstrap' and 'mc_error' columns with the
+            number of bootstrap samples and the Monte-Carlo standard error of the power
     """
-    from pyretest import sample_questionnaire, make_reliable, pooled_cohen_kappa
+    if method == "analytic":
+        from pyretest.pooled_kappa.analytic import analytic_sample_size_cohen_kappa
+        return analytic_sample_size_cohen_kappa(questions, max_n, weight_type=weight_type, start_n=start_n,
+                                                n_step=n_step, reliability=reliability, alpha=alpha, beta=beta)
+    if method != "bootstrap":
+        raise ValueError("method must be 'bootstrap' or 'analytic'")
+    if search not in ["grid", "adaptive"]:
+        raise ValueError("search must be 'grid' or 'adaptive'")
+    if common_random_numbers and simulation != "responses":
+        raise ValueError("common_random_numbers requires simulation='responses'")
+    if tolerance is not None and search != "grid":
+        raise ValueError("tolerance requires search='grid'")
+    cache = _check_cache(cache, seed)
+    hook = TqdmHook() if hook is None else hook
 
-    import random
-    if seed is not None:
-        random.seed(seed)
+    n_range = range(start_n, max_n + 1, n_step)
+    description = f"Sample sizes from {start_n} to {max_n} with steps of {n_step}"
+    with _pool(n_jobs, executor) as pool:
+        if common_random_numbers:
+            simulator = _CommonRandomNumbersSimulator(questions, weight_type, reliability, batch_size,
+                                                      np.random.SeedSequence(seed), n_range, pool, cache,
+                                                      hook.profile)
+        else:
+            simulator = _BootstrapSimulator(questions, weight_type, reliability, batch_size,
+                                            np.random.SeedSequence(seed), pool, simulation, cache, hook.profile)
+        progress = _Progress(hook, simulator)
+        if search == "adaptive":
+            with _reporting(hook, f"Adaptive search of the sample sizes from {start_n} to {max_n}", None):
+                rows, sample_size = _adaptive_search(simulator, n_range, n_bootstrap, alpha, beta, coarse_bootstrap,
+                                                     progress)
+            power_by_n = _power_frame(rows, POWER_COLUMNS + ['n_bootstrap'])
+            # Only the full budget estimates decide the sample size, the cheap ones only guided the search
+            power_by_n['refined'] = power_by_n['n_bootstrap'] == n_bootstrap
+            return SSInfo(sample_size, power_by_n)
+        if tolerance is not None:
+            with _reporting(hook, f"{description} to a tolerance of {tolerance}", len(n_range)):
+                rows = _sequential_search(simulator, n_range, n_bootstrap, alpha, beta, tolerance,
+                                          decision_confidence, progress)
+            return _sample_size(_power_frame(rows, POWER_COLUMNS + ['n_bootstrap', 'mc_error']), beta)
+
+        # Compute the power to show a one sided difference of delta_kappa for different sample sizes with steps of
+        # n_step samples. The blocks of every sample size are dispatched at once, so the workers stay busy.
+        rows = np.empty((len(n_range), len(POWER_COLUMNS)))
+        with _reporting(hook, description, len(n_range)):
+            for i, (n, (cohen_kappa_bootstrap, cohen_kappa_bootstrap_reliable)) in enumerate(zip(
+                    n_range, simulator.iter_kappas(n_range, n_bootstrap))):
+                with progress.reduction(n):
+                    rows[i] = _power_row(n, cohen_kappa_bootstrap, cohen_kappa_bootstrap_reliable, alpha)
+                progress.done(n, n_bootstrap)
 
     # Create a dataframe with the power for each sample size
-    power_by_n = pd.DataFrame(columns=['n', 'power', 'upper_bound_ci', 'mean_kappa_h0', 'mean_kappa_h1'])
+    return _sample_size(_power_frame(rows, POWER_COLUMNS), beta)
 
-    # Compute the power to show a one sided difference of delta_kappa for different sample sizes with steps of n_step samples
-    n_range = range(start_n, max_n + 1, n_step)
-    for n in tqdm(n_range, desc=f"Sample sizes from {start_n} to {max_n} with steps of {n_step}"):
-        # Compute the cohen kappa for each bootstrap sample
-        cohen_kappa_bootstrap = []
-        cohen_kappa_bootstrap_reliable = []
-        for i in range(n_bootstrap):
-            samples_a = sample_questionnaire(questions, n)
-            samples_b = sample_questionnaire(questions, n)
-            cohen_kappa_bootstrap.append(
-                pooled_cohen_kappa(samples_a, samples_b, weight_type=weight_type, questions=questions))
-            # Set samples equal to each other to match reliability
-            sample_a_reliable, sample_b_reliable = make_reliable(samples_a, samples_b, reliability)
-            cohen_kappa_bootstrap_reliable.append(
-                pooled_cohen_kappa(sample_a_reliable, sample_b_reliable, weight_type=weight_type, questions=questions))
-
-        # Compute the one sided confidence interval
-        cohen_kappa_bootstrap = np.array(cohen_kappa_bootstrap)
-        cohen_kappa_bootstrap_reliable = np.array(cohen_kappa_bootstrap_reliable)
-        cohen_kappa_bootstrap.sort()
-
-        # Compute mean and confidence interval upperbound
-        mean = np.mean(cohen_kappa_bootstrap)
-
-        # Compute the upper bound of the confidence interval
-        upper_bound = cohen_kappa_bootstrap[int(n_bootstrap * (1 - alpha))]
-
-        # Compute the power in detecting the difference
-        power = np.mean(cohen_kappa_bootstrap_reliable > upper_bound)
-        mean_reliable = np.mean(cohen_kappa_bootstrap_reliable)
-
-        # Store the power and the confidence interval
-        power_by_n = pd.concat([power_by_n, pd.DataFrame([[n, power, upper_bound, mean, mean_reliable]],
-                                                         columns=['n', 'power', 'upper_bound_ci', 'mean_kappa_h0',
-                                                                  'mean_kappa_h1'])])
 
+def _sample_size(power_by_n, beta):
+    """
+    Find the smallest sample size of power_by_n with a power of at least beta.
+
+    :return: namedtuple("SSInfo", "sample_size df")
+    """
     # Find the sample size for which the power is greater or equal to beta
     power_by_n_filtered = power_by_n[power_by_n['power'] >= beta]
 
@@ -121,3 +289,503 @@ def bootstrap_sample_size_cohen_kappa(questions, max_n, weight_type=None,
         return SSInfo(None, power_by_n)
     else:
         return SSInfo(power_by_n_filtered['n'].min(), power_by_n)
+
+
+def _power_frame(rows, columns):
+    """
+    Build the dataframe of the rows of power estimates, importing pandas only once results are returned.
+
+    :param rows: np.ndarray of shape (n_rows, len(columns)), or List[List] of the values of columns
+    :return: pd.DataFrame with integer 'n' and 'n_bootstrap' columns
+    """
+    import pandas as pd
+    power_by_n = pd.DataFrame(np.asarray(rows, dtype=float).reshape(-1, len(columns)), columns=columns)
+    return power_by_n.astype({column: int for column in ['n', 'n_bootstrap'] if column in columns})
+
+
+def _power_row(n, cohen_kappa_bootstrap, cohen_kappa_bootstrap_reliable, alpha):
+    """
+    Compute the power to detect the reliability from the cohen kappa of the bootstrap samples of size n.
+
+    :return: List with the values of POWER_COLUMNS
+    """
+    # Compute the one sided confidence interval
+    cohen_kappa_bootstrap = np.sort(cohen_kappa_bootstrap)
+
+    # Compute mean and confidence interval upperbound
+    mean = np.mean(cohen_kappa_bootstrap)
+
+    # Compute the upper bound of the confidence interval
+    upper_bound = cohen_kappa_bootstrap[int(len(cohen_kappa_bootstrap) * (1 - alpha))]
+
+    # Compute the power in detecting the difference
+    power = np.mean(cohen_kappa_bootstrap_reliable > upper_bound)
+    mean_reliable = np.mean(cohen_kappa_bootstrap_reliable)
+    return [n, power, upper_bound, mean, mean_reliable]
+
+
+def _adaptive_search(simulator, n_range, n_bootstrap, alpha, beta, coarse_bootstrap=None, progress=None):
+    """
+    Search the smallest sample size of n_range with a power of at least beta, see bootstrap_sample_size_cohen_kappa.
+
+    :return: Tuple[List[List], Optional[int]] rows of POWER_COLUMNS + ['n_bootstrap'] of the evaluated sample sizes
+            sorted by n, and the sample size found (None if the power stays below beta up to max_n)
+    """
+    if coarse_bootstrap is None:
+        coarse_bootstrap = max(simulator.batch_size, n_bootstrap // 10)
+    coarse_bootstrap = min(coarse_bootstrap, n_bootstrap)
+    progress = _Progress(BootstrapHook(), simulator) if progress is None else progress
+    rows = {}
+
+    def power(i, budget):
+        n = n_range[i]
+        cohen_kappa_bootstrap, cohen_kappa_bootstrap_reliable = next(simulator.iter_kappas([n], budget))
+        with progress.reduction(n):
+            row = _power_row(n, cohen_kappa_bootstrap, cohen_kappa_bootstrap_reliable, alpha) + [budget]
+        progress.done(n, budget)
+        # Keep the most precise estimate of each sample size
+        if n not in rows or rows[n][-1] <= budget:
+            rows[n] = row
+        return row[1]
+
+    def result(i):
+        return [rows[n] for n in sorted(rows)], None if i is None else n_range[i]
+
+    if len(n_range) == 0:
+        return result(None)
+
+    # Bracket the crossing of beta with cheap estimates, doubling the distance to start_n
+    last = len(n_range) - 1
+    lower, upper = -1, last
+    i = 0
+    while True:
+        if power(i, coarse_bootstrap) >= beta:
+            upper = i
+            break
+        lower = i
+        if i == last:
+            break
+        i = min(2 * i + 1, last)
+
+    # Refine the bracket by bisection
+    while upper - lower > 1:
+        middle = (lower + upper) // 2
+        if power(middle, coarse_bootstrap) >= beta:
+            upper = middle
+        else:
+            lower = middle
+
+    # Spend the full budget near the answer, stepping up then down until the crossing is confirmed. The largest sample
+    # size known to fall short with the full budget bounds the steps down, so that it is not evaluated again
+    short = -1
+    while power(upper, n_bootstrap) < beta:
+        if upper == last:
+            return result(None)
+        short = upper
+        upper += 1
+    while upper - 1 > short and power(upper - 1, n_bootstrap) >= beta:
+        upper -= 1
+    return result(upper)
+
+
+def _sequential_search(simulator, n_range, n_bootstrap, alpha, beta, tolerance, decision_confidence, progress):
+    """
+    Estimate the power of each sample size of n_range with as few bootstrap samples as needed, see
+    bootstrap_sample_size_cohen_kappa.
+
+    :return: List[List] rows of POWER_COLUMNS + ['n_bootstrap', 'mc_error'] of each sample size of n_range
+    """
+    z = np.inf if decision_confidence is None else NormalDist().inv_cdf(decision_confidence)
+    rows = {}
+    active = list(dict.fromkeys(n_range))
+    budget = 0
+    while active:
+        # One more block for each sample size still running, dispatched at once
+        budget = min(budget + simulator.batch_size, n_bootstrap)
+        running = []
+        for n, (cohen_kappa_bootstrap, cohen_kappa_bootstrap_reliable) in zip(
+                active, simulator.iter_kappas(active, budget)):
+            with progress.reduction(n):
+                row = _power_row(n, cohen_kappa_bootstrap, cohen_kappa_bootstrap_reliable, alpha)
+                mc_error = _power_mc_error(row, cohen_kappa_bootstrap, cohen_kappa_bootstrap_reliable, alpha)
+            rows[n] = row + [budget, mc_error]
+            if budget < n_bootstrap and mc_error > tolerance and abs(row[1] - beta) < z * mc_error:
+                running.append(n)
+                progress.lap(n)
+            else:
+                progress.done(n, budget)
+        active = running
+    return [rows[n] for n in n_range]
+
+
+@contextmanager
+def _reporting(hook, description, total):
+    """
+    Start the hook, and close it at the end of the block even if it failed.
+    """
+    hook.start(description, total)
+    try:
+        yield hook
+    finally:
+        hook.close()
+
+
+class _Progress:
+    """
+    Report the sample sizes to a hook once done, with their wall time and the timings of their blocks.
+    """
+
+    def __init__(self, hook, simulator):
+        self.hook = hook
+        self.simulator = simulator
+        self.seconds = {}
+        self.timings = {}
+        self.last = time.perf_counter()
+
+    def reduction(self, n):
+        """
+        Context manager timing the reduction of the bootstrap samples of the sample size n, if the hook profiles.
+        """
+        return _phase(self.timings.setdefault(n, {}) if self.hook.profile else None, "reduction")
+
+    def lap(self, n):
+        """
+        Attribute the time since the last lap, and the timings of the blocks simulated since, to the sample size n.
+        """
+        now = time.perf_counter()
+        self.seconds[n] = self.seconds.get(n, 0) + now - self.last
+        self.last = now
+        timings = self.simulator.pop_timings()
+        if timings:
+            _add_timings(self.timings.setdefault(n, {}), timings)
+
+    def done(self, n, n_bootstrap):
+        """
+        Report the sample size n, estimated with n_bootstrap samples.
+        """
+        self.lap(n)
+        self.hook.update(PointStats(n, n_bootstrap, self.seconds.pop(n), self.timings.pop(n, {})))
+
+
+class _BootstrapSimulator:
+    """
+    Simulate the cohen kappa of bootstrap samples of any sample size, keeping the blocks already simulated.
+
+    The bootstrap samples of the sample size n are simulated in blocks of batch_size, the block b drawing from the
+    stream spawned from seed_sequence with the key (n, b). The k first bootstrap samples of a sample size are thus the
+    same whatever the other sample sizes or the number of samples requested, and with a ResultCache the blocks are
+    also kept on disk under the same key.
+    """
+
+    def __init__(self, questions, weight_type, reliability, batch_size, seed_sequence, executor=None,
+                 simulation="responses", cache=None, profile=False):
+        if simulation not in SIMULATIONS:
+            raise ValueError("simulation must be 'responses' or 'tables'")
+        from pyretest.sampler.plan import QuestionnairePlan
+        self.simulate = SIMULATIONS[simulation]
+        self.questions = questions
+        # Compiled once, and sent to the workers with every block
+        self.plan = QuestionnairePlan(questions)
+        self.weight_type = weight_type
+        self.reliability = reliability
+        self.batch_size = batch_size
+        self.seed_sequence = seed_sequence
+        self.executor = executor
+        self.blocks = {}
+        self.profile = profile
+        self.timings = {}
+        self.cache = cache
+        if cache is not None:
+            self.cache_key = cache.key(**self.configuration(), simulation=simulation)
+
+    def configuration(self):
+        """
+        Parameters of the simulation that determine the blocks, hashed to key the cache.
+        """
+        from pyretest.pooled_kappa.cache import _canonical_questions
+        return dict(simulator=type(self).__name__, questions=_canonical_questions(self.questions),
+                    weight_type=self.weight_type, reliability=self.reliability, batch_size=self.batch_size,
+                    entropy=self.seed_sequence.entropy, spawn_key=self.seed_sequence.spawn_key)
+
+    def iter_kappas(self, n_range, n_bootstrap):
+        """
+        Yield the cohen kappa of the first n_bootstrap samples of each sample size of n_range.
+
+        The missing blocks of all the sample sizes are dispatched at once, and the results are yielded as they complete.
+
+        :return: iterator over Tuple[np.ndarray, Optional[np.ndarray]] kappa of the independent samples, and kappa
+            once the samples are set to match reliability (None if reliability is None)
+        """
+        n_blocks = -(-n_bootstrap // self.batch_size)
+        tasks = []
+        cached = {}
+        for n in dict.fromkeys(n_range):
+            for block in range(len(self.blocks.setdefault(n, [])), n_blocks):
+                result = self.load(n, block)
+                if result is None:
+                    tasks.append(self.task(n, block))
+                else:
+                    cached[n, block] = result
+        results = self.map(tasks)
+
+        for n in n_range:
+            blocks = self.blocks[n]
+            while len(blocks) < n_blocks:
+                item = (n, len(blocks))
+                blocks.append(cached[item] if item in cached else self.store(next(results), *item))
+            # The bootstrap samples are along the last axis of the blocks
+            kappa_h0 = np.concatenate([kappa_h0 for kappa_h0, _ in blocks[:n_blocks]], axis=-1)[..., :n_bootstrap]
+            if self.reliability is None:
+                yield kappa_h0, None
+            else:
+                yield kappa_h0, np.concatenate([kappa_h1 for _, kappa_h1 in blocks[:n_blocks]],
+                                               axis=-1)[..., :n_bootstrap]
+
+    def task(self, n, block):
+        """
+        Task simulating the given block of bootstrap samples of size n.
+        """
+        return self.simulate, (self.plan, n, self.batch_size, self.weight_type, self.reliability,
+                               self.stream(n, block))
+
+    def stream(self, *key):
+        """
+        Seed sequence spawned from seed_sequence with the given key.
+        """
+        return np.random.SeedSequence(self.seed_sequence.entropy, spawn_key=self.seed_sequence.spawn_key + key)
+
+    def map(self, tasks):
+        """
+        Simulate the tasks in order, in the calling process or on the executor.
+        """
+        simulate = partial(_simulate_task, profile=True) if self.profile else _simulate_task
+        return map(simulate, tasks) if self.executor is None else self.executor.map(simulate, tasks)
+
+    def pop_timings(self):
+        """
+        Seconds spent in each phase by the blocks simulated since the last call, empty if not profiling.
+        """
+        timings, self.timings = self.timings, {}
+        return timings
+
+    def load(self, *item):
+        """
+        Block cached on disk under the given key, None if there is no cache or the block is not cached.
+        """
+        return None if self.cache is None else self.cache.get(self.cache_key, item)
+
+    def store(self, result, *item):
+        """
+        Cache a simulated block on disk under the given key, keeping its timings if profiling.
+
+        :return: the result
+        """
+        if self.profile:
+            result, timings = result
+            _add_timings(self.timings, timings)
+        if self.cache is not None:
+            self.cache.put(self.cache_key, item, result)
+        return result
+
+
+class _CommonRandomNumbersSimulator(_BootstrapSimulator):
+    """
+    Simulate each bootstrap sample once at the largest sample size of n_range, and read off the cohen kappa of every
+    sample size of n_range from the running contingency tables of its first subjects.
+    """
+
+    def __init__(self, questions, weight_type, reliability, batch_size, seed_sequence, n_range, executor=None,
+                 cache=None, profile=False):
+        self.n_range = sorted(set(n_range))
+        super().__init__(questions, weight_type, reliability, batch_size, seed_sequence, executor, cache=cache,
+                         profile=profile)
+        self.blocks = []
+
+    def configuration(self):
+        return dict(super().configuration(), n_range=self.n_range)
+
+    def iter_kappas(self, n_range, n_bootstrap):
+        if len(self.n_range) == 0:
+            return
+        n_blocks = -(-n_bootstrap // self.batch_size)
+        tasks = []
+        cached = {}
+        for block in range(len(self.blocks), n_blocks):
+            result = self.load(block)
+            if result is None:
+                tasks.append(self.task(block))
+            else:
+                cached[block] = result
+        results = self.map(tasks)
+        while len(self.blocks) < n_blocks:
+            block = len(self.blocks)
+            self.blocks.append(cached[block] if block in cached else self.store(next(results), block))
+
+        for n in n_range:
+            i = self.n_range.index(n)
+            kappa_h0 = np.concatenate([kappa_h0[i] for kappa_h0, _ in self.blocks[:n_blocks]])[:n_bootstrap]
+            if self.reliability is None:
+                yield kappa_h0, None
+            else:
+                yield kappa_h0, np.concatenate([kappa_h1[i] for _, kappa_h1 in self.blocks[:n_blocks]])[:n_bootstrap]
+
+    def task(self, block):
+        """
+        Task simulating the given block of bootstrap samples at the largest sample size.
+        """
+        return _simulate_prefix_block, (self.plan, self.n_range, self.batch_size, self.weight_type,
+                                        self.reliability, self.stream(self.n_range[-1], block))
+
+
+def _check_cache(cache, seed):
+    """
+    Build the ResultCache of the given directory, a cache being useless without a seed to reproduce the blocks.
+    """
+    from pyretest.pooled_kappa.cache import _as_cache
+    if cache is not None and seed is None:
+        raise ValueError("cache requires a seed")
+    return _as_cache(cache)
+
+
+@contextmanager
+def _pool(n_jobs=1, executor=None):
+    """
+    Yield the executor to simulate the blocks on: the given executor, a pool of n_jobs processes, or None to simulate
+    them in the calling process.
+    """
+    import os
+    if executor is not None:
+        yield executor
+        return
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    if n_jobs is None or n_jobs <= 1:
+        yield None
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        yield pool
+
+
+def _simulate_task(task, profile=False):
+    """
+    Unpack a task built by _BootstrapSimulator.task and simulate its block.
+
+    :param profile: if True, also return the seconds spent in each phase of the simulation
+    :return: the result of the block, or Tuple[result, Dict[str, float]] if profile is True
+    """
+    simulate, arguments = task
+    if not profile:
+        return simulate(*arguments)
+    timings = {}
+    return simulate(*arguments, timings=timings), timings
+
+
+def _simulate_block(questions, n, n_replicates, weight_type, reliability, seed_sequence, timings=None):
+    """
+    Simulate n_replicates pairs of independent samples of size n and compute their cohen kappa.
+
+    :param questions: list of questions, or their QuestionnairePlan
+    :param timings: Dict[str, float] to add the seconds spent in each phase to, None to not time them
+    :return: Tuple[np.ndarray, Optional[np.ndarray]] kappa of the independent samples, and kappa once the samples are
+        set to match reliability (None if reliability is None)
+    """
+    from pyretest.sampler import make_reliable_codes
+    from pyretest.sampler.plan import _as_plan
+
+    rng = np.random.default_rng(seed_sequence)
+    plan = _as_plan(questions)
+    with _phase(timings, "sampling"):
+        codes_a = plan.sample_codes(n, replicates=n_replicates, seed=rng)
+        codes_b = plan.sample_codes(n, replicates=n_replicates, seed=rng)
+    with _phase(timings, "scoring"):
+        kappa_h0 = plan.kappa(codes_a, codes_b, weight_type=weight_type)
+    if reliability is None:
+        return kappa_h0, None
+
+    # Set randomly placed answers equal to each other to match reliability, in all the replicates at once
+    with _phase(timings, "reliability"):
+        make_reliable_codes(codes_a, codes_b, reliability, seed=rng)
+    with _phase(timings, "scoring"):
+        kappa_h1 = plan.kappa(codes_a, codes_b, weight_type=weight_type)
+    return kappa_h0, kappa_h1
+
+
+def _simulate_prefix_block(questions, n_range, n_replicates, weight_type, reliability, seed_sequence, timings=None):
+    """
+    Simulate n_replicates pairs of independent samples of the largest size of n_range, and compute the cohen kappa of
+    their first n subjects for each n of n_range.
+
+    :param timings: Dict[str, float] to add the seconds spent in each phase to, None to not time them
+    :return: Tuple[np.ndarray, Optional[np.ndarray]] kappa of shape (len(n_range), n_replicates) of the independent
+        samples, and once each answer is copied with probability reliability (None if reliability is None)
+    """
+    from pyretest.sampler import make_reliable_codes
+    from pyretest.sampler.plan import _as_plan
+    from pyretest.pooled_kappa.contingency import _bucket_table_groups, _pooled_kappa_from_bucket_tables
+
+    rng = np.random.default_rng(seed_sequence)
+    plan = _as_plan(questions)
+    n_max = n_range[-1]
+    with _phase(timings, "sampling"):
+        codes_a = plan.sample_codes(n_max, replicates=n_replicates, seed=rng)
+        codes_b = plan.sample_codes(n_max, replicates=n_replicates, seed=rng)
+
+    def prefix_kappas(codes_a):
+        with _phase(timings, "scoring"):
+            # Running tables of shape (len(n_range), n_replicates, n_items_of_group, c, c) of groups of items of each
+            # bucket, scored one group after the other
+            tables = (group for c, items in plan.buckets
+                      for group in _bucket_table_groups(codes_a, codes_b, c, items, prefixes=n_range))
+            return _pooled_kappa_from_bucket_tables(tables, plan.n_items, weight_type=weight_type)
+
+    kappa_h0 = prefix_kappas(codes_a)
+    if reliability is None:
+        return kappa_h0, None
+
+    # Copy each answer with probability reliability, so that every prefix matches reliability
+    with _phase(timings, "reliability"):
+        make_reliable_codes(codes_a, codes_b, reliability, mode="bernoulli", seed=rng)
+    return kappa_h0, prefix_kappas(codes_a)
+
+
+def _simulate_table_block(questions, n, n_replicates, weight_type, reliability, seed_sequence, timings=None):
+    """
+    Simulate the contingency tables of n_replicates pairs of independent samples of size n, and compute their cohen
+    kappa. The table of each item is drawn from a multinomial over its cells, at a cost independent of n.
+
+    :param timings: Dict[str, float] to add the seconds spent in each phase to, None to not time them
+    :return: Tuple[np.ndarray, Optional[np.ndarray]] kappa of the independent samples, and kappa of samples set to
+        match reliability (None if reliability is None)
+    """
+    from pyretest.sampler.plan import _as_plan
+    from pyretest.pooled_kappa.contingency import pooled_kappa_from_tables
+
+    rng = np.random.default_rng(seed_sequence)
+    questions = _as_plan(questions).questions
+    n_copied = None if reliability is None else _n_copied_answers(n, len(questions), reliability)
+    tables_h0 = []
+    tables_h1 = []
+    for col, question in enumerate(questions):
+        probabilities = np.asarray(question.probabilities, dtype=float)
+        probabilities = probabilities / probabilities.sum()
+        c = len(probabilities)
+        independent = np.outer(probabilities, probabilities).ravel()
+        with _phase(timings, "sampling"):
+            tables_h0.append(rng.multinomial(n, independent, size=n_replicates).reshape(n_replicates, c, c))
+        if reliability is not None:
+            # The copied answers agree, with the marginal probabilities of the question
+            with _phase(timings, "reliability"):
+                table = rng.multinomial(n - n_copied[col], independent, size=n_replicates).reshape(-1, c, c)
+                table[:, np.arange(c), np.arange(c)] += rng.multinomial(n_copied[col], probabilities, size=n_replicates)
+            tables_h1.append(table)
+
+    with _phase(timings, "scoring"):
+        kappa_h0 = pooled_kappa_from_tables(tables_h0, weight_type=weight_type)
+        if reliability is None:
+            return kappa_h0, None
+        return kappa_h0, pooled_kappa_from_tables(tables_h1, weight_type=weight_type)
+
+
+SIMULATIONS = {"responses": _simulate_block, "tables": _simulate_table_block}
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+# Version of the simulation algorithms, part of the cache keys: bump it whenever a configuration and a seed simulate
+# different kappas than before (e.g. a change of the random draws), so that the blocks cached by the previous versions
+# are not returned. 2: random placement of the copied answers of make_reliable_codes, 3: codes sampled and scored per
+# category bucket by QuestionnairePlan
+SIMULATION_VERSION = 3
+
+
+class ResultCache:
+    """
+    Persistent on-disk cache of the cohen kappa of the simulated blocks of bootstrap samples.
+
+    A block is stored under the hash of the configuration of the simulation (questions, weights, reliability, seed,
+    batch size, backend, SIMULATION_VERSION and library version) and its position, e.g. its sample size and block
+    index. Since the blocks of a sample size are drawn from their own random streams, later runs with the same
+    configuration only simulate the blocks they do not find, e.g. when extending the range of sample sizes or the
+    number of bootstrap samples.
+
+    Each block is written to a temporary file and moved in place with os.replace, so concurrent writers never expose a
+    partial file. Once the files exceed max_bytes, the least recently used ones are evicted. The size of the cache is
+    counted once, then kept up to date by the writes of this instance, so the directory is only scanned again to evict.
+
+    Usage:
+        cache = ResultCache("~/.cache/pyretest")
+        results = bootstrap_sample_size_cohen_kappa(questions, max_n=200, seed=42, cache=cache)
+    """
+
+    def __init__(self, directory, max_bytes=2 ** 30):
+        """
+        :param directory: directory of the cache, created if needed
+        :param max_bytes: maximum size of the cached files, None to never evict them (default: 1 GiB)
+        """
+        self.directory = os.path.expanduser(str(directory))
+        self.max_bytes = max_bytes
+        # Running size of the cached files, None until first counted
+        self._size = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(**configuration):
+        """
+        Hash the configuration of a simulation, with the versions of the simulation algorithms and of the library.
+
+        :param configuration: parameters of the simulation, serializable to json (numpy values are converted)
+        :return: str hexadecimal sha256 of the canonical json of the configuration
+        """
+        from pyretest import __version__
+        configuration = dict(configuration, version=__version__, simulation_version=SIMULATION_VERSION)
+        canonical = json.dumps(configuration, sort_keys=True, separators=(",", ":"), default=_canonical)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def get(self, key, item):
+        """
+        Load a cached block, and mark it as recently used.
+
+        :param key: hash of the configuration, see key
+        :param item: Tuple[int, ...] position of the block in the simulation, e.g. (n, block)
+        :return: Tuple[np.ndarray, Optional[np.ndarray]] kappa of the independent and the reliable samples, or None if
+            the block is not cached
+        """
+        path = self._path(key, item)
+        try:
+            with np.load(path) as data:
+                result = data["kappa_h0"], data["kappa_h1"] if "kappa_h1" in data else None
+            os.utime(path)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return None
+        return result
+
+    def put(self, key, item, result):
+        """
+        Store a block atomically, then evict the least recently used blocks if the cache grew past max_bytes.
+
+        :param key: hash of the configuration, see key
+        :param item: Tuple[int, ...] position of the block in the simulation, e.g. (n, block)
+        :param result: Tuple[np.ndarray, Optional[np.ndarray]] kappa of the independent and the reliable samples
+        """
+        kappa_h0, kappa_h1 = result
+        arrays = {"kappa_h0": kappa_h0} if kappa_h1 is None else {"kappa_h0": kappa_h0, "kappa_h1": kappa_h1}
+        path = self._path(key, item)
+        fd, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                np.savez(file, **arrays)
+            written = os.path.getsize(temporary_path)
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temporary_path, path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+        if self.max_bytes is None:
+            return
+        if self._size is None:
+            self._size = self.size
+        else:
+            self._size += written - replaced
+        if self._size > self.max_bytes:
+            # Evict down to 3/4 of max_bytes, so that the directory is scanned once per many writes of a full cache
+            self.evict(self.max_bytes * 3 // 4)
+
+    @property
+    def size(self):
+        """
+        Total size in bytes of the cached blocks.
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, max_bytes=None):
+        """
+        Remove the least recently used blocks until the cache is at most max_bytes, and recount its size.
+
+        :param max_bytes: size to evict down to, default: the max_bytes of the cache
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        if max_bytes is None:
+            return
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Already evicted by another writer
+                pass
+            total -= size
+        self._size = total
+
+    def clear(self):
+        """
+        Remove all the cached blocks.
+        """
+        for path, _, _ in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._size = 0
+
+    def _path(self, key, item):
+        return os.path.join(self.directory, f"{key}-{'-'.join(str(i) for i in item)}.npz")
+
+    def _entries(self):
+        """
+        List the cached blocks as (path, size, time of last use).
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".npz"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((entry.path, stat.st_size, stat.st_mtime_ns))
+        return entries
+
+
+def _as_cache(cache):
+    """
+    Build a ResultCache from a directory, leaving None and caches as they are.
+    """
+    if cache is None or isinstance(cache, ResultCache):
+        return cache
+    return ResultCache(cache)
+
+
+def _canonical_questions(questions):
+    """
+    Convert the questions to json, keeping the type of the values (e.g. True and 1 differ) but not their numpy type.
+    """
+    return [{"values": [repr(_canonical(value)) if isinstance(value, np.generic) else repr(value)
+                        for value in question.values],
+             "probabilities": [float(p) for p in question.probabilities]} for question in questions]
+
+
+def _canonical(value):
+    """
+    Convert the values json does not serialize, e.g. numpy scalars and arrays.
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (tuple, range, np.ndarray)):
+        return list(value)
+    raise TypeError(f"cannot hash {value!r} in the cache key")
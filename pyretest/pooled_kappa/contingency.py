@@ -0,0 +1,272 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Number of cell indices or counts built at once when counting the tables of a bucket of items, see _bucket_table_groups
+CELLS_CHUNK_SIZE = 2 ** 16
+
+
+@lru_cache(maxsize=None)
+def weight_matrix(c, weight_type=None):
+    """
+    Build the c x c weight matrix used to weight the contingency table of a question with c values.
+
+    The matrices are cached per (c, weight_type) and returned read-only, so they are built once per category count.
+
+    :param c: number of values of the question
+    :param weight_type: Union[None, "linear", "quadratic"] weights type, None gives the identity matrix
+    :return: np.ndarray of shape (c, c)
+    """
+    if weight_type is None:
+        weights = np.eye(c)
+    elif weight_type not in ["linear", "quadratic"]:
+        raise Exception("weights must be None, 'linear' or 'quadratic'")
+    elif c < 2:
+        weights = np.ones((c, c))
+    else:
+        distance = np.abs(np.subtract.outer(np.arange(c), np.arange(c))) / (c - 1)
+        weights = 1 - distance if weight_type == "linear" else 1 - distance ** 2
+    weights.setflags(write=False)
+    return weights
+
+
+def contingency_table(codes_a, codes_b, c):
+    """
+    Count the joint occurrences of the codes of two raters in a single bincount pass.
+
+    :param codes_a: array-like of integer codes in [0, c) of shape (..., n) from the first rater
+    :param codes_b: array-like of integer codes in [0, c) of shape (..., n) from the second rater
+    :param c: number of values of the question
+    :return: np.ndarray of counts of shape (..., c, c), rows are the codes of the first rater
+    """
+    codes_a = np.asarray(codes_a)
+    codes_b = np.asarray(codes_b)
+    leading_shape = codes_a.shape[:-1]
+    n_tables = int(np.prod(leading_shape))
+    # Index of the (a, b) cell, offset by the position of the table in the flattened leading dimensions, computed in
+    # place in a single array of indices
+    cells = codes_a.astype(np.intp, order='C')
+    cells *= c
+    cells += codes_b
+    cells = cells.reshape(n_tables, -1)
+    cells += (np.arange(n_tables) * c * c)[:, None]
+    counts = np.bincount(cells.ravel(), minlength=n_tables * c * c)
+    return counts.reshape(leading_shape + (c, c))
+
+
+def cumulative_contingency_table(codes_a, codes_b, c, prefixes):
+    """
+    Count the joint occurrences of the codes of the first subjects of two raters, for several numbers of subjects.
+
+    The subjects are split in segments ending at each prefix, the tables of all the segments are counted in a single
+    bincount pass, and the tables of the prefixes are their running sums.
+
+    :param codes_a: array-like of integer codes in [0, c) of shape (..., n) from the first rater
+    :param codes_b: array-like of integer codes in [0, c) of shape (..., n) from the second rater
+    :param c: number of values of the question
+    :param prefixes: increasing numbers of first subjects to count, at most n
+    :return: np.ndarray of counts of shape (len(prefixes), ..., c, c)
+    """
+    codes_a = np.asarray(codes_a)
+    codes_b = np.asarray(codes_b)
+    leading_shape = codes_a.shape[:-1]
+    n_tables = int(np.prod(leading_shape))
+    n = prefixes[-1]
+    # Segment of each subject, the first subjects up to prefixes[0] being in the segment 0
+    segments = np.searchsorted(prefixes, np.arange(n), side='right')
+    cells = codes_a[..., :n].astype(np.intp, order='C')
+    cells *= c
+    cells += codes_b[..., :n]
+    cells = cells.reshape(n_tables, n)
+    cells += (np.arange(n_tables) * c * c)[:, None]
+    cells += (segments * n_tables * c * c)[None, :]
+    counts = np.bincount(cells.ravel(), minlength=len(prefixes) * n_tables * c * c)
+    counts = counts.reshape((len(prefixes),) + leading_shape + (c, c))
+    return np.cumsum(counts, axis=0, out=counts)
+
+
+def contingency_tables(codes_a, codes_b, n_categories):
+    """
+    Build the contingency table of each item.
+
+    :param codes_a: array-like of integer codes of shape (..., n, n_items) from the first rater
+    :param codes_b: array-like of integer codes of shape (..., n, n_items) from the second rater
+    :param n_categories: List[int] number of values of each item
+    :return: List[np.ndarray] with the table of shape (..., c, c) of each item
+    """
+    codes_a = np.asarray(codes_a)
+    codes_b = np.asarray(codes_b)
+    return [contingency_table(codes_a[..., col], codes_b[..., col], c) for col, c in enumerate(n_categories)]
+
+
+def category_buckets(n_categories):
+    """
+    Group the items by number of categories.
+
+    :param n_categories: List[int] number of values of each item
+    :return: List[Tuple[int, np.ndarray]] number of categories c, and indices of the items with c categories, by
+        increasing c
+    """
+    n_categories = np.asarray(n_categories, dtype=int)
+    return [(int(c), np.flatnonzero(n_categories == c)) for c in np.unique(n_categories)]
+
+
+def pooled_kappa_from_codes(codes_a, codes_b, n_categories, weight_type=None):
+    """
+    Compute the pooled Cohen's Kappa from the category codes of both raters.
+
+    The items are grouped by number of categories, see category_buckets, and the contingency tables, agreements and
+    marginal products of all the items of a group are computed with one array operation and its shared weight matrix,
+    instead of one python iteration per item.
+
+    :param codes_a: array-like of integer codes of shape (..., n, n_items) from the first rater
+    :param codes_b: array-like of integer codes of shape (..., n, n_items) from the second rater
+    :param n_categories: List[int] number of values of each item
+    :param weight_type: Union[None, "linear", "quadratic"] weights type to use for the agreement calculation
+    :return: pooled Cohen's Kappa, of shape (...) for stacked codes
+    """
+    return _pooled_kappa_from_buckets(codes_a, codes_b, category_buckets(n_categories), len(n_categories),
+                                      weight_type)
+
+
+def _pooled_kappa_from_buckets(codes_a, codes_b, buckets, n_items, weight_type=None):
+    """
+    Compute the pooled Cohen's Kappa from the codes of the items grouped by category_buckets.
+    """
+    return _pooled_kappa_from_bucket_tables((group for c, items in buckets
+                                             for group in _bucket_table_groups(codes_a, codes_b, c, items)),
+                                            n_items, weight_type)
+
+
+def bucket_contingency_tables(codes_a, codes_b, c, items, prefixes=None):
+    """
+    Count the contingency tables of the items of a bucket of category_buckets, stacked along an item axis.
+
+    :param codes_a: array-like of integer codes of shape (..., n, n_items) from the first rater
+    :param codes_b: array-like of integer codes of shape (..., n, n_items) from the second rater
+    :param c: number of values of the items of the bucket
+    :param items: indices of the items of the bucket
+    :param prefixes: if not None, increasing numbers of first subjects to count, see cumulative_contingency_table
+    :return: np.ndarray of counts of shape (..., len(items), c, c), or (len(prefixes), ..., len(items), c, c)
+    """
+    tables = list(_bucket_table_groups(codes_a, codes_b, c, items, prefixes))
+    return tables[0] if len(tables) == 1 else np.concatenate(tables, axis=-3)
+
+
+def _bucket_table_groups(codes_a, codes_b, c, items, prefixes=None):
+    """
+    Count the stacked contingency tables of the items of a bucket a group of items at a time, see
+    bucket_contingency_tables.
+
+    Each group has about CELLS_CHUNK_SIZE cell indices or counts, at least one item, so that the memory of the indices
+    (8 bytes per code, against 1 for the codes themselves) and of the tables of all the prefixes stays bounded when
+    the groups are scored one after the other.
+
+    :return: Iterator[np.ndarray] tables of shape (..., n_items_of_group, c, c) of consecutive groups of items
+    """
+    codes_a = np.asarray(codes_a)
+    codes_b = np.asarray(codes_b)
+    n_prefixes = 1 if prefixes is None else len(prefixes)
+    item_size = int(np.prod(codes_a.shape[:-2])) * max(codes_a.shape[-2], n_prefixes * c * c)
+    step = max(1, CELLS_CHUNK_SIZE // max(item_size, 1))
+    for start in range(0, len(items), step):
+        # The items are moved before the subjects
+        group_a = np.moveaxis(codes_a[..., items[start:start + step]], -1, -2)
+        group_b = np.moveaxis(codes_b[..., items[start:start + step]], -1, -2)
+        yield (contingency_table(group_a, group_b, c) if prefixes is None
+               else cumulative_contingency_table(group_a, group_b, c, prefixes))
+
+
+def _pooled_kappa_from_bucket_tables(bucket_tables, n_items, weight_type=None):
+    """
+    Compute the pooled Cohen's Kappa from stacked contingency tables of the items of the buckets of category_buckets.
+
+    :param bucket_tables: Iterable[np.ndarray] with the tables of counts of shape (..., n_items_of_group, c, c) of
+        groups of items with the same number of categories, e.g. the buckets, covering each item once
+    :param n_items: total number of items
+    """
+    accuracy = 0
+    expected_random_agreement = 0
+    for tables in bucket_tables:
+        weights = weight_matrix(tables.shape[-1], weight_type)
+        joint_probabilities = tables / tables.sum(axis=(-2, -1))[..., None, None]
+        accuracy = accuracy + np.einsum('...kij,ij->...', joint_probabilities, weights)
+        expected_random_agreement = expected_random_agreement + np.einsum(
+            '...ki,ij,...kj->...', joint_probabilities.sum(axis=-1), weights, joint_probabilities.sum(axis=-2))
+
+    # Compute pooled accuracy and pooled expected random agreement
+    average_accuracy = accuracy / n_items
+    average_expected_random_agreement = expected_random_agreement / n_items
+    return (average_accuracy - average_expected_random_agreement) / (1 - average_expected_random_agreement)
+
+
+def pooled_kappa_from_tables(tables, weight_type=None):
+    """
+    Compute the pooled Cohen's Kappa from the contingency table of each item.
+
+    The observed agreement of an item is the weighted sum of its normalized table, and its expected random agreement
+    is the weighted sum of the outer product of its marginals, i.e. O(c^2) per item once the table is built.
+
+    :param tables: List[np.ndarray] with the table of counts of shape (..., c, c) of each item
+    :param weight_type: Union[None, "linear", "quadratic"] weights type to use for the agreement calculation
+    :return: pooled Cohen's Kappa, of shape (...) for stacked tables
+    """
+    accuracies = []
+    marg_probabilities = []
+    for table in tables:
+        c = table.shape[-1]
+        weights = weight_matrix(c, weight_type)
+        joint_probabilities = table / table.sum(axis=(-2, -1))[..., None, None]
+        accuracies.append(np.einsum('...ij,ij->...', joint_probabilities, weights))
+        marg_probabilities.append(np.einsum('...i,ij,...j->...', joint_probabilities.sum(axis=-1), weights,
+                                            joint_probabilities.sum(axis=-2)))
+
+    # Compute pooled accuracy and pooled expected random agreement
+    average_accuracy = np.mean(accuracies, axis=0)
+    average_expected_random_agreement = np.mean(marg_probabilities, axis=0)
+    return (average_accuracy - average_expected_random_agreement) / (1 - average_expected_random_agreement)
+
+
+def pooled_kappa_from_packed(packed_a, packed_b):
+    """
+    Compute the pooled Cohen's Kappa of binary items from their codes packed in bits, see pyretest.sampler.pack_codes.
+
+    The contingency table of a binary item is determined by the number of ones of each rater and the number of
+    subjects answering one to both, which are bit counts of the words, their bitwise and. The kappa of all the items is
+    thus computed with a few passes over the packed words, without a loop over the items. Since the linear and
+    quadratic weights of two categories are the identity, this is also the weighted pooled kappa.
+
+    :param packed_a: namedtuple("PackedCodes", "words n") of the first rater
+    :param packed_b: namedtuple("PackedCodes", "words n") of the second rater, same subjects
+    :return: pooled Cohen's Kappa, of shape (...) for stacked codes
+    """
+    words_a, n = packed_a
+    words_b, n_b = packed_b
+    if words_a.shape != words_b.shape or n != n_b:
+        raise ValueError("packed_a and packed_b must pack the same number of subjects and items")
+    ones_a = _popcount(words_a)
+    ones_b = _popcount(words_b)
+    ones_both = _popcount(words_a & words_b)
+
+    # Agreement on ones and on zeros, and agreement expected from the marginals of each item
+    accuracies = (n - ones_a - ones_b + 2 * ones_both) / n
+    expected_random_agreements = (ones_a * ones_b + (n - ones_a) * (n - ones_b)) / n ** 2
+    average_accuracy = np.mean(accuracies, axis=-1)
+    average_expected_random_agreement = np.mean(expected_random_agreements, axis=-1)
+    return (average_accuracy - average_expected_random_agreement) / (1 - average_expected_random_agreement)
+
+
+# Number of bits set in each byte, for numpy versions without bitwise_count
+_BYTE_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+
+def _popcount(words):
+    """
+    Count the bits set in the words of each item.
+
+    :param words: np.ndarray of np.uint64 words of shape (..., n_words)
+    :return: np.ndarray of np.int64 counts of shape (...)
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    return _BYTE_POPCOUNT[words.view(np.uint8)].sum(axis=-1, dtype=np.int64)
@@ -0,0 +1,241 @@
+from statistics import NormalDist
+
+import numpy as np
+
+from pyretest.pooled_kappa.contingency import weight_matrix
+
+
+def empirical_bootstrap_confidence_interval(samples_a, samples_b, weight_type=None, questions=None, n_bootstrap=1000,
+                                            alpha=0.05, seed=None, batch_size=100, interval="percentile"):
+    """
+    Compute the bootstrap confidence interval of the pooled cohen kappa of observed test-retest data, by resampling
+    the subjects with replacement.
+
+    The pooled kappa only depends on sums over the subjects: the weighted agreement of each item and the counts of
+    each category of each rater. These contributions are computed once per subject, and a bootstrap sample only
+    weights the subjects by how many times it draws them. The kappas of a batch of bootstrap samples are thus read
+    off the products of their (batch_size, n) multinomial counts with the agreement of the subjects and the one-hot
+    indicators of their categories, instead of scoring the resampled answers.
+
+    With interval="bca", the bounds are the bias-corrected and accelerated percentiles of the bootstrap samples,
+    which correct the bias and the skewness of the kappa at small n. The acceleration comes from the jackknife kappas,
+    see jackknife_standard_error, at a cost of O(n * n_categories) on top of the bootstrap.
+
+    :param samples_a: list of samples from the first rater, of shape (n, n_items)
+    :param samples_b: list of samples from the second rater, same subjects
+    :param weight_type: Union[None, "linear", "quadratic"] weights type to use for the agreement calculation
+    :param questions: List[Question] if weights is not None, this is the list of questions and their values
+    :param n_bootstrap: number of bootstrap samples (default: 1000)
+    :param alpha: type I error rate (1-confidence) default: 0.05
+    :param seed: seed or numpy.random.Generator used to resample the subjects
+    :param batch_size: number of bootstrap samples scored per matrix product (default: 100)
+    :param interval: either 'percentile' or 'bca' (default: 'percentile')
+    :return: namedtuple("CIInfo", "mean lowerbound upperbound std")
+    :raises ValueError: if interval is 'bca' with fewer than 2 subjects
+    """
+    from pyretest.pooled_kappa.bootstrap import CIInfo, _confidence_interval
+
+    if interval not in ["percentile", "bca"]:
+        raise ValueError("interval must be 'percentile' or 'bca'")
+    contributions = SubjectContributions.from_samples(samples_a, samples_b, weight_type, questions)
+    if interval == "bca" and contributions.n < 2:
+        raise ValueError("interval='bca' needs at least 2 subjects for the jackknife acceleration")
+    cohen_kappa_bootstrap = contributions.bootstrap_kappas(n_bootstrap, seed, batch_size)
+    if interval == "percentile":
+        return _confidence_interval(cohen_kappa_bootstrap, alpha)
+
+    # Bias correction from the share of bootstrap kappas below the observed one, ties counting for half
+    kappa = contributions.kappa(contributions.totals, contributions.n)
+    below = (np.sum(cohen_kappa_bootstrap < kappa) + np.sum(cohen_kappa_bootstrap == kappa) / 2) / n_bootstrap
+    below = np.clip(below, 1 / (2 * n_bootstrap), 1 - 1 / (2 * n_bootstrap))
+    bias = NormalDist().inv_cdf(below)
+
+    # Acceleration from the skewness of the jackknife kappas
+    jackknife_kappas = contributions.jackknife_kappas()
+    deviations = np.mean(jackknife_kappas) - jackknife_kappas
+    spread = np.sum(deviations ** 2)
+    acceleration = 0 if spread == 0 else np.sum(deviations ** 3) / (6 * spread ** 1.5)
+
+    cohen_kappa_bootstrap.sort()
+    bounds = []
+    for q in [alpha / 2, 1 - alpha / 2]:
+        z = bias + NormalDist().inv_cdf(q)
+        q = NormalDist().cdf(bias + z / (1 - acceleration * z))
+        bounds.append(cohen_kappa_bootstrap[min(int(n_bootstrap * q), n_bootstrap - 1)])
+    return CIInfo(np.mean(cohen_kappa_bootstrap), bounds[0], bounds[1], np.std(cohen_kappa_bootstrap))
+
+
+def jackknife_standard_error(samples_a, samples_b, weight_type=None, questions=None):
+    """
+    Compute the jackknife standard error of the pooled cohen kappa of observed test-retest data.
+
+    The kappa without a subject is computed by subtracting the contributions of the subject from the sums of all the
+    subjects, so the n leave-one-out kappas cost O(n * n_categories) in total instead of n full recomputations.
+
+    :param samples_a: list of samples from the first rater, of shape (n, n_items)
+    :param samples_b: list of samples from the second rater, same subjects
+    :param weight_type: Union[None, "linear", "quadratic"] weights type to use for the agreement calculation
+    :param questions: List[Question] if weights is not None, this is the list of questions and their values
+    :return: jackknife standard error of the pooled cohen kappa
+    :raises ValueError: with fewer than 2 subjects
+    """
+    contributions = SubjectContributions.from_samples(samples_a, samples_b, weight_type, questions)
+    if contributions.n < 2:
+        raise ValueError("the jackknife needs at least 2 subjects")
+    kappas = contributions.jackknife_kappas()
+    n = contributions.n
+    return np.sqrt((n - 1) / n * np.sum((kappas - np.mean(kappas)) ** 2))
+
+
+class SubjectContributions:
+    """
+    Contributions of each subject to the sums the pooled cohen kappa is computed from.
+
+    The sums are the weighted agreement of the subjects summed over the items, and the counts of each category of each
+    item for the first and the second rater. Only the weighted agreement of each subject (one float) and its codes
+    (small integers) are kept, so the memory is O(n * n_items). The category counts of any weighting of the subjects
+    (e.g. the counts of bootstrap samples) are built when needed, from one-hot indicators of a group of items at a
+    time, and the kappa without a subject is computed by downdating the counts of all the subjects.
+    """
+
+    # Number of one-hot indicators built at once when summing the category counts, to bound their memory
+    chunk_size = 2 ** 22
+
+    def __init__(self, codes_a, codes_b, n_categories, weight_type=None):
+        """
+        :param codes_a: array-like of integer codes of shape (n, n_items) from the first rater
+        :param codes_b: array-like of integer codes of shape (n, n_items) from the second rater
+        :param n_categories: List[int] number of values of each item
+        :param weight_type: Union[None, "linear", "quadratic"] weights type to use for the agreement calculation
+        """
+        self.codes_a = np.asarray(codes_a)
+        self.codes_b = np.asarray(codes_b)
+        self.n_categories = list(n_categories)
+        self.weight_type = weight_type
+        self.n = self.codes_a.shape[0]
+        self.offsets = np.concatenate([[0], np.cumsum(self.n_categories)]).astype(int)
+        self.agreement = np.zeros(self.n)
+        for col, c in enumerate(self.n_categories):
+            self.agreement += weight_matrix(c, weight_type)[self.codes_a[:, col], self.codes_b[:, col]]
+
+    @classmethod
+    def from_samples(cls, samples_a, samples_b, weight_type=None, questions=None):
+        """
+        Encode the answers of both raters, as in pooled_cohen_kappa, and compute their contributions.
+        """
+        from pyretest.pooled_kappa.pooled_cohen_kappa import _encode_samples
+
+        samples_a = np.array(samples_a)
+        samples_b = np.array(samples_b)
+        if samples_a.ndim != 2 or samples_a.shape != samples_b.shape or samples_a.size == 0:
+            raise ValueError("samples_a and samples_b must be non empty and of the same shape (n, n_items)")
+        if weight_type is not None and (weight_type not in ["linear", "quadratic"] or questions is None):
+            raise ValueError("weights must be None, 'linear' or 'quadratic', and questions must be provided")
+        codes_a, codes_b, n_categories = _encode_samples(samples_a, samples_b, weight_type, questions)
+        return cls(codes_a, codes_b, n_categories, weight_type)
+
+    @property
+    def totals(self):
+        """
+        Sums of the contributions of all the subjects, see sums.
+        """
+        marginals = [np.concatenate([np.bincount(codes[:, col], minlength=c)
+                                     for col, c in enumerate(self.n_categories)]).astype(float)
+                     for codes in [self.codes_a, self.codes_b]]
+        return self.agreement.sum(), marginals[0], marginals[1]
+
+    def sums(self, weights):
+        """
+        Sum the contributions of the subjects with the given weights.
+
+        :param weights: array-like of shape (..., n) weight of each subject, e.g. the counts of bootstrap samples
+        :return: Tuple[np.ndarray, np.ndarray, np.ndarray] weighted agreement summed over the items of shape (...), and
+            weighted counts of the categories of each item of shape (..., sum(n_categories)) of both raters
+        """
+        weights = np.asarray(weights, dtype=float)
+        rows = np.arange(self.n)[:, None]
+        marginals = []
+        for codes in [self.codes_a, self.codes_b]:
+            counts = np.empty(weights.shape[:-1] + (self.offsets[-1],))
+            for start, stop in self._item_groups():
+                first = self.offsets[start]
+                indicators = np.zeros((self.n, self.offsets[stop] - first))
+                indicators[rows, self.offsets[start:stop] - first + codes[:, start:stop]] = 1
+                counts[..., first:self.offsets[stop]] = weights @ indicators
+            marginals.append(counts)
+        return weights @ self.agreement, marginals[0], marginals[1]
+
+    def kappa(self, sums, n_subjects):
+        """
+        Compute the pooled cohen kappa from sums of contributions.
+
+        :param sums: Tuple[np.ndarray, np.ndarray, np.ndarray] weighted sums of the contributions, see sums
+        :param n_subjects: total weight of the subjects of each sum, e.g. n for a bootstrap sample
+        :return: np.ndarray of shape (...) pooled cohen kappa of each sum
+        """
+        agreement, marginals_a, marginals_b = sums
+        n_items = len(self.n_categories)
+        n_subjects = np.asarray(n_subjects, dtype=float)
+        accuracy = agreement / n_items / n_subjects
+        expected_random_agreement = 0
+        for col, c in enumerate(self.n_categories):
+            start = self.offsets[col]
+            expected_random_agreement = expected_random_agreement + np.einsum(
+                '...i,ij,...j->...', marginals_a[..., start:start + c], weight_matrix(c, self.weight_type),
+                marginals_b[..., start:start + c])
+        expected_random_agreement = expected_random_agreement / n_items / n_subjects ** 2
+        return (accuracy - expected_random_agreement) / (1 - expected_random_agreement)
+
+    def jackknife_kappas(self):
+        """
+        Compute the pooled cohen kappa of the subjects without each subject, by downdating the sums of all the subjects.
+
+        The product of the counts without a subject expands into the product of the counts of all the subjects, minus
+        the row and the column of the weight matrix at the codes of the subject, plus their cell, so the n kappas cost
+        O(n * n_items) once the products of the counts of all the subjects are known.
+
+        :return: np.ndarray of shape (n,)
+        """
+        agreement, marginals_a, marginals_b = self.totals
+        n_items = len(self.n_categories)
+        accuracy = (agreement - self.agreement) / n_items / (self.n - 1)
+        expected_random_agreement = np.zeros(self.n)
+        for col, c in enumerate(self.n_categories):
+            weights = weight_matrix(c, self.weight_type)
+            marginal_a = marginals_a[self.offsets[col]:self.offsets[col + 1]]
+            marginal_b = marginals_b[self.offsets[col]:self.offsets[col + 1]]
+            codes_a = self.codes_a[:, col]
+            codes_b = self.codes_b[:, col]
+            expected_random_agreement += (marginal_a @ weights @ marginal_b - (weights @ marginal_b)[codes_a]
+                                          - (marginal_a @ weights)[codes_b] + weights[codes_a, codes_b])
+        expected_random_agreement = expected_random_agreement / n_items / (self.n - 1) ** 2
+        return (accuracy - expected_random_agreement) / (1 - expected_random_agreement)
+
+    def bootstrap_kappas(self, n_bootstrap, seed=None, batch_size=100):
+        """
+        Compute the pooled cohen kappa of bootstrap samples of the subjects.
+
+        :return: np.ndarray of shape (n_bootstrap,)
+        """
+        rng = np.random.default_rng(seed)
+        probabilities = np.full(self.n, 1 / self.n)
+        kappas = np.empty(n_bootstrap)
+        for start in range(0, n_bootstrap, batch_size):
+            counts = rng.multinomial(self.n, probabilities, size=min(batch_size, n_bootstrap - start))
+            kappas[start:start + len(counts)] = self.kappa(self.sums(counts), self.n)
+        return kappas
+
+    def _item_groups(self):
+        """
+        Split the items in groups of consecutive items with about chunk_size one-hot indicators, at least one item each.
+
+        :return: List[Tuple[int, int]] first and last (excluded) item of each group
+        """
+        groups = []
+        start = 0
+        n_items = len(self.n_categories)
+        for stop in range(1, n_items + 1):
+            if stop == n_items or self.n * (self.offsets[stop + 1] - self.offsets[start]) > self.chunk_size:
+                groups.append((start, stop))
+                start = stop
+        return groups
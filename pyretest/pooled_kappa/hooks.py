@@ -0,0 +1,147 @@
+import logging
+import time
+from collections import namedtuple
+from contextlib import contextmanager, nullcontext
+
+# Phases timed when a hook profiles the simulation
+PHASES = ("sampling", "reliability", "scoring", "reduction")
+
+# Progress of a sample size: the number of bootstrap samples of its estimate, the wall time spent on it, and with a
+# profiling hook the seconds spent in each phase of PHASES (summed over the workers, blocks found in a cache excluded)
+PointStats = namedtuple("PointStats", "n n_bootstrap seconds timings")
+
+
+class BootstrapHook:
+    """
+    Hook receiving the progress of the bootstrap functions, which does nothing.
+
+    Subclasses override start, update and close, e.g. to send metrics. The phases are only timed if profile is True,
+    otherwise the timings of PointStats are empty and the hook costs a few function calls per sample size.
+
+    Usage:
+        class MetricsHook(BootstrapHook):
+            profile = True
+
+            def update(self, stats):
+                send_metric("pyretest.samples_per_second", stats.n_bootstrap / stats.seconds)
+
+        results = bootstrap_sample_size_cohen_kappa(questions, max_n=200, hook=MetricsHook())
+    """
+    profile = False
+
+    def start(self, description, total):
+        """
+        Called before the first sample size.
+
+        :param description: description of the run
+        :param total: number of sample sizes to evaluate, None if unknown (e.g. with search="adaptive")
+        """
+
+    def update(self, stats):
+        """
+        Called once the estimate of a sample size is done.
+
+        :param stats: namedtuple("PointStats", "n n_bootstrap seconds timings")
+        """
+
+    def close(self):
+        """
+        Called at the end of the run, even if it failed.
+        """
+
+
+class TqdmHook(BootstrapHook):
+    """
+    Show a tqdm progress bar over the sample sizes.
+    """
+
+    def __init__(self, **tqdm_kwargs):
+        """
+        :param tqdm_kwargs: arguments of tqdm, e.g. file or disable
+        """
+        self.tqdm_kwargs = tqdm_kwargs
+        self.bar = None
+
+    def start(self, description, total):
+        from tqdm import tqdm
+        self.bar = tqdm(total=total, desc=description, **self.tqdm_kwargs)
+
+    def update(self, stats):
+        self.bar.update()
+
+    def close(self):
+        if self.bar is not None:
+            self.bar.close()
+            self.bar = None
+
+
+class LoggingHook(BootstrapHook):
+    """
+    Log the wall time, throughput and time per phase of each sample size, and a summary at the end of the run.
+    """
+    profile = True
+
+    def __init__(self, logger=None, level=logging.INFO):
+        """
+        :param logger: logging.Logger to log to (default: the logger of this module)
+        :param level: logging level of the messages (default: logging.INFO)
+        """
+        self.logger = logging.getLogger(__name__) if logger is None else logger
+        self.level = level
+        self.description = None
+        self.stats = []
+
+    def start(self, description, total):
+        self.description = description
+        self.stats = []
+        self.logger.log(self.level, "%s: %s sample sizes", description, "unknown" if total is None else total)
+
+    def update(self, stats):
+        self.stats.append(stats)
+        self.logger.log(self.level, "n=%d: %d bootstrap samples in %.3fs (%.0f samples/s)%s", stats.n,
+                        stats.n_bootstrap, stats.seconds, _throughput(stats.n_bootstrap, stats.seconds),
+                        _format_timings(stats.timings))
+
+    def close(self):
+        n_bootstrap = sum(stats.n_bootstrap for stats in self.stats)
+        seconds = sum(stats.seconds for stats in self.stats)
+        timings = {}
+        for stats in self.stats:
+            _add_timings(timings, stats.timings)
+        self.logger.log(self.level, "%s: %d sample sizes, %d bootstrap samples in %.3fs (%.0f samples/s)%s",
+                        self.description, len(self.stats), n_bootstrap, seconds, _throughput(n_bootstrap, seconds),
+                        _format_timings(timings))
+
+
+def _phase(timings, name):
+    """
+    Context manager adding the duration of its block to timings[name], doing nothing if timings is None.
+    """
+    if timings is None:
+        return nullcontext()
+    return _timed(timings, name)
+
+
+@contextmanager
+def _timed(timings, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0) + time.perf_counter() - start
+
+
+def _add_timings(timings, other):
+    for phase, seconds in other.items():
+        timings[phase] = timings.get(phase, 0) + seconds
+    return timings
+
+
+def _throughput(n_bootstrap, seconds):
+    return n_bootstrap / seconds if seconds > 0 else float("inf")
+
+
+def _format_timings(timings):
+    if not timings:
+        return ""
+    return ", " + ", ".join(f"{phase} {timings[phase]:.3f}s" for phase in PHASES if phase in timings)
@@ -18,7 +18,8 @@ def pooled_cohen_kappa(samples_a, samples_b, weight_type=None, questions=None):
 
     A weighted version of the pooled Cohen's Kappa is also available in which the contingency table is weighted using
     either quadratic or linear weights. If weight_type is None, then the weight matrix is the identity matrix.
-    To compute the weighted Cohen's Kappa, the questions parameter must be provided.
+    To compute the weighted Cohen's Kappa, the questions parameter must be provided, and every answer must be one of
+    the values of its question: a ValueError is raised otherwise, rather than leaving the answer out of the agreement.
 
     :param samples_a: list of samples from the first rater
     :param samples_b: list of samples from the second rater
@@ -37,89 +38,91 @@ def pooled_cohen_kappa(samples_a, samples_b, weight_type=None, questions=None):
         raise Exception("weights must be None, 'linear' or 'quadratic'")
 
     import numpy as np
+    from pyretest.pooled_kappa.contingency import pooled_kappa_from_codes
     # Convert to numpy arrays
     samples_a = np.array(samples_a)
     samples_b = np.array(samples_b)
 
-    def weight(i, j, c):
-        """
-        Compute the weight for a pair of values.
-        """
-        if weight_type == "linear":
-            return 1 - (abs(i - j) / (c - 1))
-        elif weight_type == "quadratic":
-            return 1 - (abs(i - j) / (c - 1)) ** 2
-        else:
-            return 1 if i == j else 0
-
-    def agreement(colum_a, colum_b, values=None):
-        """
-        Compute the agreement between two columns.
-        """
-        if weight_type is not None:
-            # Build the contingency table
-            c = len(values)
-            contingency_table = np.zeros((c, c))
-
-            for i, value_a in enumerate(values):
-                for j, value_b in enumerate(values):
-                    contingency_table[i, j] = np.mean(
-                        weight(i, j, c) * (colum_a == value_a) * (colum_b == value_b))
-
-            # Compute the agreement
-            return np.sum(contingency_table)
-        else:
-            return np.mean(colum_a == colum_b)
-
-    def expected_random_agreement(colum_a, colum_b, values=None):
-        """
-        Compute the expected random agreement between two columns.
-        """
-        if weight_type is not None:
-            # Build the contingency table
-            c = len(values)
-            contingency_table = np.zeros((c, c))
-
-            for i, value_a in enumerate(values):
-                for j, value_b in enumerate(values):
-                    contingency_table[i, j] = np.sum((colum_a == value_a) * (colum_b == value_b))
-
-            # Compute row and column sums
-            row_sums = np.sum(contingency_table, axis=1)
-            col_sums = np.sum(contingency_table, axis=0)
-
-            # Build the expected contingency table if independent
-            expected_contingency_table = np.zeros((c, c))
-            for i in range(c):
-                for j in range(c):
-                    expected_contingency_table[i, j] = weight(i,j,c) * (row_sums[i] * col_sums[j]) / n**2
-
-            # Compute the expected random agreement
-            return np.sum(expected_contingency_table)
-        else:
-            # For each potential value of the column, compute the marginal probability of each rater
-            unique_values = np.unique(np.concatenate((colum_a, colum_b)))
-            expected_independent_agreement = []
-            for value in unique_values:
-                marg_probabilities_a = np.mean(samples_a[:, col] == value)
-                marg_probabilities_b = np.mean(samples_b[:, col] == value)
-                expected_independent_agreement.append(marg_probabilities_a * marg_probabilities_b)
-            # Compute the expected random agreement
-            return np.sum(expected_independent_agreement)
-
-    # Compute accuracy (joint probability of agreement) and marginal probability of agreement on each column between samples_a and samples_b
-    accuracies = np.zeros(ncols)
-    marg_probabilities = np.zeros(ncols)
-    for col in range(ncols):
-        values = None if weight_type is None or questions is None else questions[col].values
-        accuracies[col] = agreement(samples_a[:, col], samples_b[:, col], values=values)
-        marg_probabilities[col] = expected_random_agreement(samples_a[:, col], samples_b[:, col], values=values)
-
-    # Compute pooled accuracy
-    average_accuracy = np.mean(accuracies)
-    # Compute pooled expected random agreement
-    average_expected_random_agreement = np.mean(marg_probabilities)
-    # Compute pooled Cohen's Kappa
-    pooled_cohen_kappa = (average_accuracy - average_expected_random_agreement) / (
-            1 - average_expected_random_agreement)
-    return pooled_cohen_kappa
+    # Encode the answers as category codes and compute the pooled kappa from the contingency table of each column,
+    # the columns with the same number of categories at once
+    codes_a, codes_b, n_categories = _encode_samples(samples_a, samples_b, weight_type, questions)
+    if max(n_categories) <= 2:
+        return _binary_pooled_kappa(codes_a, codes_b)
+    return pooled_kappa_from_codes(codes_a, codes_b, n_categories, weight_type=weight_type)
+
+
+def _encode_samples(samples_a, samples_b, weight_type=None, questions=None):
+    """
+    Encode the answers of both raters as category codes.
+
+    Without weights, the categories of a column are the values observed in either rater. With weights, the order of
+    the categories matters and is given by the values of the questions.
+
+    :return: Tuple[np.ndarray, np.ndarray, List[int]] codes of both raters and number of categories of each column
+    """
+    import numpy as np
+    from pyretest.sampler import encode_responses
+    if weight_type is not None:
+        n_categories = [len(question.values) for question in questions]
+        return encode_responses(samples_a, questions), encode_responses(samples_b, questions), n_categories
+
+    # The codes are stored in the smallest dtype holding them, widened if a column has more than 256 categories
+    codes_a = np.empty(samples_a.shape, dtype=np.uint8)
+    codes_b = np.empty(samples_b.shape, dtype=np.uint8)
+    n_categories = []
+    for col in range(samples_a.shape[-1]):
+        values, codes = np.unique(np.stack((samples_a[..., col], samples_b[..., col])), return_inverse=True)
+        codes = codes.reshape((2,) + samples_a.shape[:-1])
+        if not np.can_cast(np.min_scalar_type(len(values) - 1), codes_a.dtype):
+            codes_a = codes_a.astype(np.min_scalar_type(len(values) - 1))
+            codes_b = codes_b.astype(codes_a.dtype)
+        codes_a[..., col] = codes[0]
+        codes_b[..., col] = codes[1]
+        n_categories.append(len(values))
+    return codes_a, codes_b, n_categories
+
+
+def batched_pooled_cohen_kappa(samples_a, samples_b, weight_type=None, questions=None):
+    """
+    Compute the pooled Cohen's Kappa for a stack of paired samples, e.g. bootstrap replicates.
+
+    Equivalent to calling pooled_cohen_kappa on each replicate, but the contingency tables, the agreement and the
+    marginal products are computed with array operations across all replicates at once.
+
+    :param samples_a: array-like of shape (n_replicates, n_subjects, n_items) of answers from the first rater
+    :param samples_b: array-like of shape (n_replicates, n_subjects, n_items) of answers from the second rater
+    :param weight_type: Union[None, "linear", "quadratic"] weights type to use for the agreement calculation
+    :param questions: List[Question] if weights is not None, this is the list of questions and their values, every
+        answer being one of the values of its question (a ValueError is raised otherwise)
+    :return: np.ndarray of shape (n_replicates,) with the pooled Cohen's Kappa of each replicate
+    """
+    import numpy as np
+    samples_a = np.asarray(samples_a)
+    samples_b = np.asarray(samples_b)
+    if samples_a.ndim != 3:
+        raise Exception("samples_a and samples_b must be of shape (n_replicates, n_subjects, n_items)")
+    if samples_a.shape != samples_b.shape:
+        raise Exception("samples_a and samples_b must have the same length")
+    if weight_type is not None and (weight_type not in ["linear", "quadratic"] or questions is None):
+        raise Exception("weights must be None, 'linear' or 'quadratic'")
+
+    n_replicates, n, ncols = samples_a.shape
+    if n == 0 or ncols == 0:
+        return np.zeros(n_replicates)
+
+    from pyretest.pooled_kappa.contingency import pooled_kappa_from_codes
+    # Build the (n_replicates, c, c) contingency tables of the columns, one bincount pass per number of categories
+    codes_a, codes_b, n_categories = _encode_samples(samples_a, samples_b, weight_type, questions)
+    if max(n_categories) <= 2:
+        return _binary_pooled_kappa(codes_a, codes_b)
+    return pooled_kappa_from_codes(codes_a, codes_b, n_categories, weight_type=weight_type)
+
+
+def _binary_pooled_kappa(codes_a, codes_b):
+    """
+    Compute the pooled Cohen's Kappa of items with at most two categories from their codes packed in bits, with a
+    few passes over all the items at once instead of a contingency table per item.
+    """
+    from pyretest.sampler import pack_codes
+    from pyretest.pooled_kappa.contingency import pooled_kappa_from_packed
+    return pooled_kappa_from_packed(pack_codes(codes_a), pack_codes(codes_b))
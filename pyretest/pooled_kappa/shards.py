@@ -0,0 +1,170 @@
+import json
+from collections import namedtuple
+
+import numpy as np
+
+from pyretest.pooled_kappa.bootstrap import POWER_COLUMNS, _BootstrapSimulator, _power_frame, _power_row, \
+    _sample_size, _simulate_task
+
+_WORK_UNIT_FIELDS = ["questions", "weight_type", "reliability", "simulation", "batch_size", "entropy", "spawn_key", "n",
+                     "replicates"]
+
+
+class WorkUnit(namedtuple("WorkUnit", _WORK_UNIT_FIELDS)):
+    """
+    Self-contained part of a bootstrap sample size search: the bootstrap samples replicates=(start, stop) of the
+    sample size n, for the simulation configured by the other fields.
+
+    The replicates are simulated in the blocks of batch_size of bootstrap_sample_size_cohen_kappa, each drawn from the
+    stream spawned from numpy.random.SeedSequence(entropy, spawn_key=spawn_key) with the key (n, block), so a unit can
+    run on any machine and gives the same kappas wherever it runs. Units are picklable, and serializable to json with
+    to_json if the values of the questions are.
+    """
+    __slots__ = ()
+
+    @property
+    def blocks(self):
+        """
+        Range of the blocks of batch_size bootstrap samples covering the replicates of the unit.
+        """
+        start, stop = self.replicates
+        return range(start // self.batch_size, -(-stop // self.batch_size))
+
+    def simulator(self, cache=None):
+        """
+        Build the simulator of the configuration of the unit, storing its blocks in cache.
+        """
+        return _BootstrapSimulator(self.questions, self.weight_type, self.reliability, self.batch_size,
+                                   np.random.SeedSequence(self.entropy, spawn_key=self.spawn_key),
+                                   simulation=self.simulation, cache=cache)
+
+    def to_json(self):
+        """
+        Serialize the unit to json.
+        """
+        from pyretest.pooled_kappa.cache import _canonical
+        unit = self._asdict()
+        unit["questions"] = [{"values": list(question.values), "probabilities": list(question.probabilities)}
+                             for question in self.questions]
+        return json.dumps(unit, default=_canonical)
+
+    @classmethod
+    def from_json(cls, text):
+        """
+        Load a unit serialized with to_json.
+        """
+        from pyretest.sampler import Question
+        unit = json.loads(text)
+        unit["questions"] = [Question(question["values"], question["probabilities"]) for question in unit["questions"]]
+        unit["spawn_key"] = tuple(unit["spawn_key"])
+        unit["replicates"] = tuple(unit["replicates"])
+        return cls(**unit)
+
+
+def plan_work_units(questions, max_n, weight_type=None, start_n=10, n_step=10, reliability=0.1, n_bootstrap=1000,
+                    seed=None, batch_size=100, simulation="responses", replicates_per_unit=None):
+    """
+    Split the bootstrap sample size search of bootstrap_sample_size_cohen_kappa into work units, to simulate them on
+    several machines with run_work_unit and combine their results with reduce_work_units.
+
+    The units draw from the same streams as bootstrap_sample_size_cohen_kappa, so once all the units are run, the
+    reduced power of each sample size is identical to the one of the call with the same arguments, whatever
+    replicates_per_unit and wherever the units ran. Without a seed, fresh entropy is drawn and kept in the units. The
+    samples of common_random_numbers span all the sample sizes, so this mode cannot be split.
+
+    :param questions: list of questions
+    :param max_n: maximum sample size
+    :param weight_type: weighting scheme to use either None, 'linear', or 'quadratic' (default: None)
+    :param start_n: starting sample size (default: 10)
+    :param n_step: step in the sample sizes tested (default: 10)
+    :param reliability: reliability of the retest, see bootstrap_sample_size_cohen_kappa
+    :param n_bootstrap: number of bootstrap samples of each sample size
+    :param seed: random seed, None to draw fresh entropy
+    :param batch_size: number of bootstrap samples simulated per block (default: 100)
+    :param simulation: either 'responses' or 'tables', see bootstrap_sample_size_cohen_kappa (default: 'responses')
+    :param replicates_per_unit: number of bootstrap samples of each unit, rounded up to a multiple of batch_size,
+            None for one unit per sample size (default: None)
+    :return: List[WorkUnit]
+    """
+    if simulation not in ["responses", "tables"]:
+        raise ValueError("simulation must be 'responses' or 'tables'")
+    if reliability is None:
+        raise ValueError("reliability must be given to search the sample size")
+    if replicates_per_unit is None:
+        replicates_per_unit = n_bootstrap
+    # Units of whole blocks, so that no block is simulated by two units
+    replicates_per_unit = max(1, -(-replicates_per_unit // batch_size)) * batch_size
+    seed_sequence = np.random.SeedSequence(seed)
+    return [WorkUnit(list(questions), weight_type, reliability, simulation, batch_size, seed_sequence.entropy,
+                     seed_sequence.spawn_key, n, (start, min(start + replicates_per_unit, n_bootstrap)))
+            for n in range(start_n, max_n + 1, n_step) for start in range(0, n_bootstrap, replicates_per_unit)]
+
+
+def run_work_unit(unit, directory):
+    """
+    Simulate the blocks of a work unit, and store them in directory.
+
+    The blocks are stored as in a ResultCache, each written to a temporary file moved in place, so any number of
+    machines can share the directory (e.g. on a network filesystem), and the blocks already stored are skipped, e.g.
+    when a unit is run again after a failure.
+
+    :param unit: WorkUnit to run
+    :param directory: directory of the results, created if needed
+    :return: number of blocks simulated
+    """
+    from pyretest.pooled_kappa.cache import ResultCache
+    simulator = unit.simulator(ResultCache(directory, max_bytes=None))
+    n_simulated = 0
+    for block in unit.blocks:
+        if simulator.load(unit.n, block) is None:
+            simulator.store(_simulate_task(simulator.task(unit.n, block)), unit.n, block)
+            n_simulated += 1
+    return n_simulated
+
+
+def reduce_work_units(units, directory, alpha=0.05, beta=0.8):
+    """
+    Compute the power of each sample size from the results of the work units found in directory.
+
+    Any subset of the units can be reduced, e.g. while the others are still running: the blocks not found are skipped,
+    and the power of each sample size is computed from the bootstrap samples of its units found, in the order of the
+    replicates. Sample sizes without any result are left out.
+
+    :param units: List[WorkUnit] of the same search, e.g. as returned by plan_work_units
+    :param directory: directory the units stored their results in with run_work_unit
+    :param alpha: type I error rate
+    :param beta: 1 - type II error rate (power)
+    :return: namedtuple("SSInfo", "sample_size df"), df has an extra 'n_bootstrap' column with the number of bootstrap
+            samples found for each sample size
+    """
+    from pyretest.pooled_kappa.cache import ResultCache
+    units = list(units)
+    keys = {ResultCache.key(**unit.simulator().configuration(), simulation=unit.simulation) for unit in units}
+    if len(keys) > 1:
+        raise ValueError("units must come from the same search")
+    # Each unit once, the units of a search only differing by their sample size and replicates
+    units = list({(unit.n, unit.replicates): unit for unit in units}.values())
+
+    # The bootstrap samples found for each sample size, in the order of the replicates
+    found = {}
+    if units:
+        simulator = units[0].simulator(ResultCache(directory, max_bytes=None))
+        for unit in sorted(units, key=lambda unit: (unit.n, unit.replicates)):
+            start, stop = unit.replicates
+            for block in unit.blocks:
+                result = simulator.load(unit.n, block)
+                if result is None:
+                    continue
+                # Only the replicates of the unit in the block, the last block of a sample size being cut
+                first = max(start - block * unit.batch_size, 0)
+                last = min(stop - block * unit.batch_size, unit.batch_size)
+                kappas_h0, kappas_h1 = found.setdefault(unit.n, ([], []))
+                kappas_h0.append(result[0][first:last])
+                kappas_h1.append(result[1][first:last])
+
+    rows = []
+    for n, (kappas_h0, kappas_h1) in sorted(found.items()):
+        cohen_kappa_bootstrap = np.concatenate(kappas_h0)
+        rows.append(_power_row(n, cohen_kappa_bootstrap, np.concatenate(kappas_h1), alpha)
+                    + [len(cohen_kappa_bootstrap)])
+    return _sample_size(_power_frame(rows, POWER_COLUMNS + ['n_bootstrap']), beta)
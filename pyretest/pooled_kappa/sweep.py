@@ -0,0 +1,161 @@
+from collections import namedtuple
+from itertools import product
+
+import numpy as np
+
+from pyretest.pooled_kappa.bootstrap import POWER_COLUMNS, _BootstrapSimulator, _Progress, _check_cache, _pool, \
+    _power_row, _reporting
+from pyretest.pooled_kappa.hooks import TqdmHook, _phase
+
+SweepInfo = namedtuple("SweepInfo", ["sample_sizes", "df"])
+
+SCENARIO_COLUMNS = ['reliability', 'weight_type', 'alpha']
+
+
+def bootstrap_power_surface(questions, max_n, reliabilities, weight_types=(None,), alphas=(0.05,), betas=(0.8,),
+                            start_n=10, n_step=10, n_bootstrap=1000, seed=None, n_jobs=1, executor=None,
+                            batch_size=100, cache=None, hook=None):
+    """
+    Compute the bootstrap power of every combination of reliability, weighting and type I error rate for the given
+    questions, and the sample size reaching each power of betas, in a single run.
+
+    Calling bootstrap_sample_size_cohen_kappa once per scenario simulates the same independent samples every time.
+    Here the bootstrap samples of each sample size are simulated once: the independent samples give the kappa under
+    H0 of every weighting, since the contingency tables do not depend on the weights, and the copied answers of every
+    reliability are read off a single draw of random ranks, so that a higher reliability copies the answers of a lower
+    one and more. The cost is one simulation per sample size, plus a copy and a count of the contingency tables per
+    reliability, whatever the number of scenarios: the tables are only weighted once per weighting, at O(c^2) per item.
+
+    The blocks draw from the same streams as bootstrap_sample_size_cohen_kappa with simulation="responses", so for a
+    given seed and batch_size the power of each scenario is identical to the one of a separate call.
+
+    :param questions: list of questions
+    :param max_n: maximum sample size
+    :param reliabilities: List[float] reliabilities of the retest, see bootstrap_sample_size_cohen_kappa
+    :param weight_types: List of weighting schemes, each either None, 'linear' or 'quadratic' (default: (None,))
+    :param alphas: List[float] type I error rates (default: (0.05,))
+    :param betas: List[float] powers to reach (default: (0.8,))
+    :param start_n: starting sample size (default: 10)
+    :param n_step: step in the sample sizes tested (default: 10)
+    :param n_bootstrap: number of bootstrap samples
+    :param seed: random seed
+    :param n_jobs: number of worker processes, -1 to use all the cpus (default: 1)
+    :param executor: concurrent.futures.Executor to run the blocks on, overrides n_jobs (default: None)
+    :param batch_size: number of bootstrap samples simulated per block (default: 100)
+    :param cache: ResultCache (or its directory) keeping the simulated blocks on disk, requires a seed (default: None)
+    :param hook: BootstrapHook receiving the progress and timings of each sample size, None for a tqdm progress bar
+            (default: None)
+
+    :return: namedtuple("SweepInfo", "sample_sizes df"), df is the power surface with one row per scenario and sample
+            size, with the columns 'reliability', 'weight_type', 'alpha' and those of
+            bootstrap_sample_size_cohen_kappa, and sample_sizes has one row per scenario and beta with the columns
+            'reliability', 'weight_type', 'alpha', 'beta' and 'sample_size' (None if the power stays below beta up to
+            max_n)
+    """
+    reliabilities = [float(reliability) for reliability in reliabilities]
+    weight_types = list(weight_types)
+    if len(reliabilities) == 0 or len(weight_types) == 0 or len(alphas) == 0 or len(betas) == 0:
+        raise ValueError("reliabilities, weight_types, alphas and betas must not be empty")
+    if any(reliability < 0 or reliability > 1 for reliability in reliabilities):
+        raise ValueError("reliabilities must be in [0,1]")
+    if any(weight_type not in [None, "linear", "quadratic"] for weight_type in weight_types):
+        raise ValueError("weight_types must be None, 'linear' or 'quadratic'")
+    cache = _check_cache(cache, seed)
+    hook = TqdmHook() if hook is None else hook
+
+    n_range = range(start_n, max_n + 1, n_step)
+    description = (f"Power surface of {len(reliabilities) * len(weight_types) * len(alphas)} scenarios, sample sizes "
+                   f"from {start_n} to {max_n} with steps of {n_step}")
+    # The power rows of each scenario, in the order of the grids, and of each sample size
+    scenarios = list(product(reliabilities, weight_types, alphas))
+    power = np.empty((len(scenarios), len(n_range), len(POWER_COLUMNS)))
+    with _pool(n_jobs, executor) as pool:
+        simulator = _SweepSimulator(questions, weight_types, reliabilities, batch_size, np.random.SeedSequence(seed),
+                                    pool, cache, hook.profile)
+        progress = _Progress(hook, simulator)
+        with _reporting(hook, description, len(n_range)):
+            for k, (n, (kappa_h0, kappa_h1)) in enumerate(zip(n_range, simulator.iter_kappas(n_range, n_bootstrap))):
+                with progress.reduction(n):
+                    for s, (i, j, alpha) in enumerate(product(range(len(reliabilities)), range(len(weight_types)),
+                                                              alphas)):
+                        power[s, k] = _power_row(n, kappa_h0[j], kappa_h1[i, j], alpha)
+                progress.done(n, n_bootstrap)
+
+    # Find the smallest sample size of each scenario with a power of at least each beta
+    sample_sizes = []
+    for scenario, rows in zip(scenarios, power):
+        for beta in betas:
+            reached = np.flatnonzero(rows[:, 1] >= beta)
+            sample_sizes.append(scenario + (beta, None if len(reached) == 0 else int(rows[reached, 0].min())))
+
+    power_surface = _frame([scenario for scenario in scenarios for _ in n_range], SCENARIO_COLUMNS)
+    for column, values in zip(POWER_COLUMNS, power.reshape(-1, len(POWER_COLUMNS)).T):
+        power_surface[column] = values.astype(int) if column == 'n' else values
+    return SweepInfo(_frame(sample_sizes, SCENARIO_COLUMNS + ['beta', 'sample_size']), power_surface)
+
+
+def _frame(rows, columns):
+    """
+    Build a dataframe from rows, importing pandas only once results are returned, and keeping the None of the
+    'weight_type' and 'sample_size' columns instead of NaN.
+    """
+    import pandas as pd
+    return pd.DataFrame({column: pd.Series([row[i] for row in rows],
+                                           dtype=object if column in ['weight_type', 'sample_size'] else None)
+                         for i, column in enumerate(columns)})
+
+
+class _SweepSimulator(_BootstrapSimulator):
+    """
+    Simulate the cohen kappa of bootstrap samples of any sample size for several weightings and reliabilities at once.
+
+    The blocks are those of _BootstrapSimulator, with weight_type the list of weightings and reliability the list of
+    reliabilities, and the kappa of shape (n_weight_types, n_bootstrap) under H0 and (n_reliabilities, n_weight_types,
+    n_bootstrap) under H1.
+    """
+
+    def __init__(self, questions, weight_types, reliabilities, batch_size, seed_sequence, executor=None, cache=None,
+                 profile=False):
+        super().__init__(questions, list(weight_types), list(reliabilities), batch_size, seed_sequence, executor,
+                         cache=cache, profile=profile)
+        self.simulate = _simulate_sweep_block
+
+
+def _simulate_sweep_block(questions, n, n_replicates, weight_types, reliabilities, seed_sequence, timings=None):
+    """
+    Simulate n_replicates pairs of independent samples of size n, and compute their cohen kappa for each weighting,
+    and for each reliability once the samples are set to match it.
+
+    The random draws are those of _simulate_block, the copied answers of every reliability being read off the same
+    ranks, so the kappa of each (reliability, weighting) is the one _simulate_block returns for the same stream.
+
+    :param timings: Dict[str, float] to add the seconds spent in each phase to, None to not time them
+    :return: Tuple[np.ndarray, np.ndarray] kappa of shape (len(weight_types), n_replicates) of the independent samples,
+        and of shape (len(reliabilities), len(weight_types), n_replicates) of the reliable samples
+    """
+    from pyretest.pooled_kappa.contingency import _bucket_table_groups, _pooled_kappa_from_bucket_tables
+    from pyretest.sampler.plan import _as_plan
+    from pyretest.sampler.sample_questionnaire import _copy_ranks, _n_copied_answers
+
+    rng = np.random.default_rng(seed_sequence)
+    plan = _as_plan(questions)
+    with _phase(timings, "sampling"):
+        codes_a = plan.sample_codes(n, replicates=n_replicates, seed=rng)
+        codes_b = plan.sample_codes(n, replicates=n_replicates, seed=rng)
+
+    def kappas(codes_a):
+        with _phase(timings, "scoring"):
+            # The tables of the items of each bucket are counted once, then weighted by each weighting
+            tables = [group for c, items in plan.buckets for group in _bucket_table_groups(codes_a, codes_b, c, items)]
+            return np.stack([_pooled_kappa_from_bucket_tables(tables, plan.n_items, weight_type=weight_type)
+                             for weight_type in weight_types])
+
+    kappa_h0 = kappas(codes_a)
+    with _phase(timings, "reliability"):
+        ranks = _copy_ranks(codes_a.shape, rng)
+    kappa_h1 = []
+    for reliability in reliabilities:
+        with _phase(timings, "reliability"):
+            reliable_a = np.where(ranks < _n_copied_answers(n, plan.n_items, reliability), codes_b, codes_a)
+        kappa_h1.append(kappas(reliable_a))
+    return kappa_h0, np.stack(kappa_h1)
@@ -1 +1,4 @@
-from pyretest.sampler.sample_questionnaire import sample_questionnaire, Question, make_reliable
+from pyretest.sampler.sample_questionnaire import sample_questionnaire, sample_questionnaire_codes, \
+    encode_responses, decode_responses, Question, make_reliable, make_reliable_codes, PackedCodes, pack_codes, \
+    unpack_codes
+from pyretest.sampler.plan import QuestionnairePlan
@@ -0,0 +1,119 @@
+import numpy as np
+
+
+class QuestionnairePlan:
+    """
+    Questionnaire compiled once for sampling and scoring arrays of codes, reusable across replicates and sample sizes.
+
+    The items are grouped by number of categories into buckets, each with the indices of its items and the
+    normalized cumulative distributions of their answers stacked in a (n_items_of_bucket, c) table. The codes of the
+    items of a bucket are then drawn with one array operation, and their kappa is scored with one contingency table
+    pass and the weight matrix of the bucket, see pyretest.pooled_kappa.contingency.pooled_kappa_from_codes. The cost
+    in python iterations depends on the number of distinct category counts, e.g. 3 for a questionnaire mixing yes/no,
+    5-point and 7-point items, instead of the number of items.
+
+    Usage:
+        plan = QuestionnairePlan(questions)
+        codes_a = plan.sample_codes(n=100, replicates=1000, seed=1)
+        codes_b = plan.sample_codes(n=100, replicates=1000, seed=2)
+        kappas = plan.kappa(codes_a, codes_b, weight_type="quadratic")
+    """
+
+    # Number of random numbers drawn at once when sampling, to bound the memory of the draws (8 bytes each)
+    chunk_size = 2 ** 16
+
+    def __init__(self, questions):
+        """
+        :param questions: list of Question List[Question] with Question a namedtuple("Question", "values probabilities")
+        """
+        from pyretest.pooled_kappa.contingency import category_buckets
+        from pyretest.sampler.sample_questionnaire import _code_dtype
+        self.questions = list(questions)
+        self.n_items = len(self.questions)
+        self.n_categories = [len(question.values) for question in self.questions]
+        self.code_dtype = _code_dtype(self.questions)
+        self.buckets = category_buckets(self.n_categories)
+        self.cdfs = []
+        for c, items in self.buckets:
+            cdfs = np.empty((len(items), c))
+            for row, item in enumerate(items):
+                cdf = np.cumsum(np.asarray(self.questions[item].probabilities, dtype=float))
+                cdfs[row] = cdf / cdf[-1]
+            self.cdfs.append(cdfs)
+
+    def sample_codes(self, n=1, replicates=None, seed=None):
+        """
+        Generate n samples of the questionnaire as a matrix of integer category codes, see sample_questionnaire_codes
+        which draws the same codes for the same seed.
+
+        :param n: number of samples to generate
+        :param replicates: if not None, number of independent (n, n_items) samples to stack
+        :param seed: seed or numpy.random.Generator used to draw the samples
+        :return: np.ndarray of codes of shape (n, n_items), or (replicates, n, n_items) if replicates is not None
+        """
+        rng = np.random.default_rng(seed)
+        shape = (n,) if replicates is None else (replicates, n)
+        codes = np.empty(shape + (self.n_items,), dtype=self.code_dtype)
+        size = int(np.prod(shape))
+        if size > self.chunk_size and len(shape) > 1:
+            # The uniform numbers of an item do not fit in a chunk: they are drawn item after item, in chunks of
+            # replicates, which draws the same numbers in the same order
+            item_cdfs = {item: cdf for (_, items), cdfs in zip(self.buckets, self.cdfs)
+                         for item, cdf in zip(items, cdfs)}
+            rows = max(1, self.chunk_size // (size // shape[0]))
+            for item in range(self.n_items):
+                for start in range(0, shape[0], rows):
+                    stop = min(start + rows, shape[0])
+                    codes[start:stop, ..., item] = self._draw_codes(rng.random((stop - start,) + shape[1:]),
+                                                                    item_cdfs[item])
+            return codes
+        # The uniform numbers of the items are drawn item after item, in chunks of items
+        chunk = max(1, self.chunk_size // max(size, 1))
+        for start in range(0, self.n_items, chunk):
+            stop = min(start + chunk, self.n_items)
+            uniforms = rng.random((stop - start,) + shape)
+            for (c, items), cdfs in zip(self.buckets, self.cdfs):
+                if stop - start < self.n_items:
+                    selected = (items >= start) & (items < stop)
+                    if not selected.any():
+                        continue
+                    items, cdfs = items[selected], cdfs[selected]
+                # A bucket of consecutive items is a view of the uniform numbers rather than a copy
+                consecutive = items[-1] - items[0] + 1 == len(items)
+                draws = uniforms[items[0] - start:items[-1] + 1 - start] if consecutive else uniforms[items - start]
+                bucket_codes = self._draw_codes(draws, cdfs.reshape((-1,) + (1,) * len(shape) + (c,)))
+                codes[..., slice(None) if len(items) == self.n_items else items] = np.moveaxis(bucket_codes, 0, -1)
+        return codes
+
+    def _draw_codes(self, draws, cdfs):
+        """
+        Find the category of uniform numbers: the number of cumulative probabilities at most the uniform number, as
+        with numpy.searchsorted(cdf, uniform, side='right'), for all the items of a bucket at once.
+
+        :param draws: np.ndarray of uniform numbers
+        :param cdfs: np.ndarray of cumulative distributions of shape (..., c), broadcasting against draws
+        :return: np.ndarray of codes of the shape of draws
+        """
+        codes = np.zeros(draws.shape, dtype=self.code_dtype)
+        for category in range(cdfs.shape[-1] - 1):
+            codes += draws >= cdfs[..., category]
+        return codes
+
+    def kappa(self, codes_a, codes_b, weight_type=None):
+        """
+        Compute the pooled Cohen's Kappa of codes of the questionnaire.
+
+        :param codes_a: array-like of integer codes of shape (..., n, n_items) from the first rater
+        :param codes_b: array-like of integer codes of shape (..., n, n_items) from the second rater
+        :param weight_type: Union[None, "linear", "quadratic"] weights type to use for the agreement calculation
+        :return: pooled Cohen's Kappa, of shape (...) for stacked codes
+        """
+        from pyretest.pooled_kappa.contingency import _pooled_kappa_from_buckets
+        return _pooled_kappa_from_buckets(codes_a, codes_b, self.buckets, self.n_items, weight_type)
+
+
+def _as_plan(questions):
+    """
+    Compile the questions into a QuestionnairePlan, leaving plans as they are.
+    """
+    return questions if isinstance(questions, QuestionnairePlan) else QuestionnairePlan(questions)
@@ -2,6 +2,9 @@ from collections import namedtuple
 
 Question = namedtuple('Question', ['values', 'probabilities'])
 
+# Binary codes of n subjects packed in 64 bits words, words being of shape (..., n_items, ceil(n / 64)), see pack_codes
+PackedCodes = namedtuple('PackedCodes', ['words', 'n'])
+
 
 def sample_questionnaire(questions, n=1, seed=None):
     """
@@ -26,10 +29,135 @@ def sample_questionnaire(questions, n=1, seed=None):
     return samples
 
 
+def sample_questionnaire_codes(questions, n=1, replicates=None, seed=None):
+    """
+    Generate n samples of the questionnaire as a matrix of integer category codes.
+
+    The code of an answer is the index of its value in question.values. Each question is sampled for all subjects
+    (and replicates) at once by inverting its cumulative distribution, the questions with the same number of values
+    all at once, see QuestionnairePlan to reuse the compiled questionnaire across calls.
+
+    :param questions: list of Question List[Question] with Question a namedtuple("Question", "values probabilities")
+    :param n: number of samples to generate
+    :param replicates: if not None, number of independent (n, n_items) samples to stack
+    :param seed: seed or numpy.random.Generator used to draw the samples
+    :return: np.ndarray of codes of shape (n, n_items), or (replicates, n, n_items) if replicates is not None
+    """
+    from pyretest.sampler.plan import _as_plan
+    return _as_plan(questions).sample_codes(n, replicates=replicates, seed=seed)
+
+
+def decode_responses(codes, questions):
+    """
+    Map integer category codes back to the values of the questions.
+
+    :param codes: array-like of codes of shape (..., n_items), e.g. as returned by sample_questionnaire_codes
+    :param questions: list of Question List[Question] with Question a namedtuple("Question", "values probabilities")
+    :return: np.ndarray of the same shape as codes holding question.values[code] for each answer
+    """
+    import numpy as np
+    codes = np.asarray(codes)
+    labels = [np.asarray(question.values) for question in questions]
+    # Keep a compact dtype unless the questions mix kinds of values, e.g. booleans and strings
+    if len(set(values.dtype.kind for values in labels)) == 1:
+        dtype = np.result_type(*labels)
+    else:
+        dtype = object
+    responses = np.empty(codes.shape, dtype=dtype)
+    for col, values in enumerate(labels):
+        responses[..., col] = values[codes[..., col]]
+    return responses
+
+
+def encode_responses(responses, questions):
+    """
+    Map the answers to integer category codes, the code of an answer being the index of its value in question.values.
+
+    :param responses: array-like of answers of shape (..., n_items), e.g. as returned by sample_questionnaire
+    :param questions: list of Question List[Question] with Question a namedtuple("Question", "values probabilities")
+    :return: np.ndarray of codes of the same shape as responses
+    :raises ValueError: if an answer is not one of the values of its question
+    """
+    import numpy as np
+    responses = np.asarray(responses)
+    codes = np.empty(responses.shape, dtype=_code_dtype(questions))
+    for col, question in enumerate(questions):
+        # Look up each distinct answer once, then broadcast the codes back with the inverse indices
+        answers, inverse = np.unique(responses[..., col], return_inverse=True)
+        lookup = {value: code for code, value in enumerate(question.values)}
+        # np.array turns the answers of mixed questions (e.g. booleans and strings) into strings
+        for code, value in enumerate(question.values):
+            lookup.setdefault(str(value), code)
+        try:
+            answer_codes = np.array([lookup[answer] for answer in answers.tolist()], dtype=codes.dtype)
+        except KeyError as e:
+            raise ValueError(f"answer {e} is not one of the values of question {col}")
+        codes[..., col] = answer_codes[inverse].reshape(responses.shape[:-1])
+    return codes
+
+
+def pack_codes(codes):
+    """
+    Pack binary codes (0 or 1, e.g. the codes of questions with two values) in bits, 64 subjects per word.
+
+    The answers of each item are packed along the subjects, so an item of n subjects takes ceil(n / 64) words, 8 times
+    less memory than uint8 codes and 64 times less than int64 codes. The contingency table of an unweighted binary item
+    is then read off bit counts of the words, see pooled_kappa_from_packed.
+
+    :param codes: array-like of codes in {0, 1} of shape (..., n, n_items), e.g. as returned by
+        sample_questionnaire_codes
+    :return: namedtuple("PackedCodes", "words n") with words the np.uint64 array of shape (..., n_items, n_words),
+        the bits past the n subjects being 0
+    """
+    import numpy as np
+    codes = np.asarray(codes)
+    if codes.ndim < 2:
+        raise ValueError("codes must be of shape (..., n, n_items)")
+    if codes.size and (codes.min() < 0 or codes.max() > 1):
+        raise ValueError("only binary codes (0 or 1) can be packed")
+    codes = codes.astype(np.uint8, copy=False)
+    n, n_items = codes.shape[-2:]
+    # Pack along the subjects in the layout of the codes, or-ing each of 8 consecutive subjects in its bit of a byte
+    # (numpy.packbits is much slower on an axis other than the last), with the bytes padded to whole 64 bits words
+    n_full = n // 8 * 8
+    bits = np.zeros(codes.shape[:-2] + (-(-n // 64) * 8, n_items), dtype=np.uint8)
+    groups = codes[..., :n_full, :].reshape(codes.shape[:-2] + (n_full // 8, 8, n_items))
+    for bit in range(8):
+        bits[..., :n_full // 8, :] |= groups[..., bit, :] << (7 - bit)
+    if n_full < n:
+        bits[..., n_full // 8, :] = np.packbits(codes[..., n_full:, :], axis=-2)[..., 0, :]
+    # Move the 8 times smaller bytes of each item together
+    return PackedCodes(np.ascontiguousarray(np.moveaxis(bits, -2, -1)).view(np.uint64), n)
+
+
+def unpack_codes(packed):
+    """
+    Unpack the codes packed by pack_codes.
+
+    :param packed: namedtuple("PackedCodes", "words n")
+    :return: np.ndarray of uint8 codes of shape (..., n, n_items)
+    """
+    import numpy as np
+    words, n = packed
+    bits = np.unpackbits(np.ascontiguousarray(words).view(np.uint8), axis=-1, count=n)
+    return np.moveaxis(bits, -1, -2)
+
+
+def _code_dtype(questions):
+    """
+    Smallest unsigned integer dtype able to hold the category codes of all the questions.
+    """
+    import numpy as np
+    return np.min_scalar_type(max([len(question.values) for question in questions] + [1]) - 1)
+
+
 def make_reliable(samples_a, samples_b, reliability):
     """
     Make the samples reliable by setting N*reliability elements of samples_a and samples_b to the same value.
 
+    The answers of the first samples are copied, see make_reliable_codes to copy randomly placed answers of arrays of
+    codes in place.
+
     :param samples_a: List[List[Any]]
         list of lists of answers
     :param samples_b: List[List[Any]]
@@ -51,8 +179,74 @@ def make_reliable(samples_a, samples_b, reliability):
     n_sample_same = int(n_same / n_questions)
     n_rest = n_same % n_questions
 
-    # Set the same value to the appropriate number of answers
+    # Set the same value to the appropriate number of answers, the rest being the first answers of the next sample
     samples_a[:n_sample_same] = samples_b[:n_sample_same]
-    samples_a[n_sample_same+1][:n_rest] = samples_b[n_sample_same+1][:n_rest]
+    if n_rest > 0:
+        samples_a[n_sample_same][:n_rest] = samples_b[n_sample_same][:n_rest]
 
     return samples_a, samples_b
+
+
+def make_reliable_codes(codes_a, codes_b, reliability, mode="exact", seed=None):
+    """
+    Make arrays of codes reliable in place, by copying randomly placed answers of codes_b into codes_a.
+
+    The copy mask of all the replicates is drawn at once, and the answers are copied with a single numpy.copyto.
+
+    With mode="exact", each item gets exactly the number of copied answers of make_reliable, i.e.
+    int(reliability * n_items * n) answers spread as evenly as possible over the items, at randomly drawn subjects.
+    With mode="bernoulli", each answer is copied independently with probability reliability, so that the first
+    subjects of a sample are also at the expected reliability.
+
+    :param codes_a: np.ndarray of codes of shape (..., n, n_items), e.g. (replicates, n, n_items), modified in place
+    :param codes_b: np.ndarray of codes of the same shape, copied from
+    :param reliability: float in [0,1] reliability of the test
+    :param mode: either 'exact' or 'bernoulli' (default: 'exact')
+    :param seed: seed or numpy.random.Generator used to place the copied answers
+    :return: np.ndarray boolean mask of the copied answers, of the shape of codes_a
+    """
+    import numpy as np
+    if reliability < 0 or reliability > 1:
+        raise ValueError("reliability must be in [0,1]")
+    if codes_a.shape != codes_b.shape or codes_a.ndim < 2:
+        raise ValueError("codes_a and codes_b must have the same shape (..., n, n_items)")
+    rng = np.random.default_rng(seed)
+    if mode == "bernoulli":
+        copied = rng.random(codes_a.shape) < reliability
+    elif mode == "exact":
+        n, n_items = codes_a.shape[-2:]
+        copied = _copy_ranks(codes_a.shape, rng) < _n_copied_answers(n, n_items, reliability)
+    else:
+        raise ValueError("mode must be 'exact' or 'bernoulli'")
+    np.copyto(codes_a, codes_b, where=copied)
+    return copied
+
+
+def _copy_ranks(shape, rng):
+    """
+    Draw a random rank of each subject within each item, the subjects ranked below the number of copied answers of the
+    item being copied by make_reliable_codes in exact mode. The copied answers of a higher reliability thus include
+    the ones of a lower reliability drawn from the same ranks.
+
+    :param shape: shape of the codes (..., n, n_items)
+    :param rng: numpy.random.Generator
+    :return: np.ndarray of shape shape, each column a permutation of range(n)
+    """
+    import numpy as np
+    n = shape[-2]
+    ranks = np.broadcast_to(np.arange(n, dtype=np.min_scalar_type(max(n - 1, 0)))[:, None], shape)
+    return rng.permuted(ranks, axis=-2)
+
+
+def _n_copied_answers(n, n_items, reliability):
+    """
+    Number of answers of each item copied by make_reliable (and make_reliable_codes in exact mode) for n samples of
+    n_items answers.
+
+    :return: np.ndarray of shape (n_items,)
+    """
+    import numpy as np
+    n_same = int(reliability * n_items * n)
+    n_sample_same = int(n_same / n_items)
+    n_rest = n_same % n_items
+    return n_sample_same + (np.arange(n_items) < n_rest)
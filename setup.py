@@ -6,7 +6,7 @@ with open("README.md", "r") as fh:
 setup(
     name='pyretest',
     version='1.3',
-    packages=['pyretest', 'pyretest.sampler', 'pyretest.pooled_kappa'],
+    packages=['pyretest', 'pyretest.sampler', 'pyretest.pooled_kappa', 'pyretest.io'],
     url='https://github.com/albertbuchard/pyretest',
     license='MIT',
     author='Albert Buchard',
@@ -24,4 +24,11 @@ setup(
         'pandas',
         'tqdm'
     ],
+    extras_require={
+        'parquet': ['pyarrow'],
+        'yaml': ['pyyaml'],
+    },
+    entry_points={
+        'console_scripts': ['pyretest=pyretest.cli:main'],
+    },
 )
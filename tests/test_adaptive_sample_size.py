@@ -0,0 +1,82 @@
+import unittest
+
+import numpy as np
+
+from pyretest import bootstrap_sample_size_cohen_kappa, Question
+from pyretest.pooled_kappa.bootstrap import _adaptive_search
+
+
+class _StepSimulator:
+    # Power of 1 from the sample size crossing, 0 below, except the coarse estimates which cross one step earlier
+    batch_size = 10
+
+    def __init__(self, crossing, coarse_crossing, n_bootstrap):
+        self.crossing = crossing
+        self.coarse_crossing = coarse_crossing
+        self.n_bootstrap = n_bootstrap
+        self.evaluated = []
+
+    def iter_kappas(self, n_range, budget):
+        for n in n_range:
+            self.evaluated.append((n, budget))
+            crossing = self.crossing if budget == self.n_bootstrap else self.coarse_crossing
+            yield np.zeros(budget), np.full(budget, 1.0 if n >= crossing else 0.0)
+
+    def pop_timings(self):
+        return {}
+
+
+class TestAdaptiveSampleSize(unittest.TestCase):
+    def setUp(self):
+        self.questions = [
+            Question(["a", "b", "c", "d", "e"], [1 / 5] * 5),
+            Question(["a", "b", "c", "d", "e"], [1 / 5] * 5),
+            Question(["a", "b", "c", "d", "e"], [1 / 5] * 5),
+            Question(["a", "b", "c", "d", "e"], [1 / 5] * 5),
+        ]
+        self.kwargs = dict(max_n=100, start_n=10, n_step=10, reliability=0.1, n_bootstrap=1000, alpha=0.05, beta=0.8,
+                           seed=0)
+
+    def test_matches_grid(self):
+        results_grid = bootstrap_sample_size_cohen_kappa(self.questions, **self.kwargs)
+        results = bootstrap_sample_size_cohen_kappa(self.questions, search="adaptive", **self.kwargs)
+
+        self.assertEqual(list(results.df.columns),
+                         ['n', 'power', 'upper_bound_ci', 'mean_kappa_h0', 'mean_kappa_h1', 'n_bootstrap', 'refined'])
+        self.assertTrue(results.sample_size == 40 or results.sample_size == 50)
+        self.assertTrue(results.df['n'].is_monotonic_increasing)
+
+        # The rows evaluated with the full budget are the ones of the grid search
+        full = results.df[results.df['refined']].set_index('n')
+        np.testing.assert_array_equal(full['n_bootstrap'], 1000)
+        grid = results_grid.df.set_index('n').loc[full.index]
+        np.testing.assert_array_equal(full['power'].values, grid['power'].values)
+        self.assertTrue(full.loc[results.sample_size, 'power'] >= 0.8)
+        self.assertTrue(full.loc[results.sample_size - 10, 'power'] < 0.8)
+        # The sample size is the crossing of beta of the refined rows
+        self.assertEqual(full.index[full['power'] >= 0.8].min(), results.sample_size)
+
+        # The full budget is only spent near the answer
+        self.assertTrue(results.df['n_bootstrap'].sum() < 1000 * results_grid.df.shape[0])
+
+    def test_known_short_not_evaluated_again(self):
+        simulator = _StepSimulator(crossing=60, coarse_crossing=50, n_bootstrap=100)
+        rows, sample_size = _adaptive_search(simulator, list(range(10, 110, 10)), 100, 0.05, 0.8)
+        self.assertEqual(sample_size, 60)
+        # 50 falls short with the full budget when stepping up, and is not evaluated again when stepping down
+        full = [n for n, budget in simulator.evaluated if budget == 100]
+        self.assertEqual(full, [50, 60])
+        self.assertEqual([row[0] for row in rows if row[-1] == 100], [50, 60])
+
+    def test_power_never_reached(self):
+        results = bootstrap_sample_size_cohen_kappa(self.questions, search="adaptive", **dict(self.kwargs, max_n=20))
+        self.assertIsNone(results.sample_size)
+        self.assertTrue(all(results.df['power'] < 0.8))
+
+    def test_wrong_search(self):
+        with self.assertRaises(ValueError):
+            bootstrap_sample_size_cohen_kappa(self.questions, search="linear", **self.kwargs)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import warnings
+
+import numpy as np
+
+from pyretest import bootstrap_sample_size_cohen_kappa, bootstrap_confidence_interval, Question
+from pyretest.pooled_kappa import pooled_kappa_asymptotic_variance, analytic_power
+
+
+class TestAnalytic(unittest.TestCase):
+    def setUp(self):
+        self.questions = [
+            Question(["a", "b", "c", "d", "e"], [1 / 5] * 5),
+            Question(["a", "b", "c", "d", "e"], [1 / 5] * 5),
+            Question(["a", "b", "c", "d", "e"], [1 / 5] * 5),
+            Question(["a", "b", "c", "d", "e"], [1 / 5] * 5),
+        ]
+        self.mixed_questions = [
+            Question(["a", "b", "c", "d", "e", "f", "g"], [0.05, 0.1, 0.2, 0.3, 0.2, 0.1, 0.05]),
+            Question(["a", "b", "c", "d", "e"], [0.1, 0.2, 0.3, 0.2, 0.2]),
+            Question([True, False], [0.3, 0.7]),
+        ]
+
+    def test_variance(self):
+        # For independent raters on uniform items the variance is 1 / (n * n_items * (c - 1))
+        kappa, variance = pooled_kappa_asymptotic_variance(self.questions, 100)
+        self.assertAlmostEqual(kappa, 0, places=10)
+        self.assertAlmostEqual(np.sqrt(variance), 0.025, places=10)
+
+        kappa, _ = pooled_kappa_asymptotic_variance(self.questions, 100, reliability=0.1)
+        self.assertAlmostEqual(kappa, 0.1, places=10)
+
+    def test_confidence_interval(self):
+        for weight_type in [None, "linear", "quadratic"]:
+            results = bootstrap_confidence_interval(self.mixed_questions, n=200, weight_type=weight_type,
+                                                    method="analytic")
+            results_bootstrap = bootstrap_confidence_interval(self.mixed_questions, n=200, weight_type=weight_type,
+                                                              n_bootstrap=10000, seed=0, simulation="tables")
+            self.assertAlmostEqual(results.std / results_bootstrap.std, 1, delta=0.03)
+            self.assertAlmostEqual(results.lowerbound, results_bootstrap.lowerbound, delta=0.005)
+            self.assertAlmostEqual(results.upperbound, results_bootstrap.upperbound, delta=0.005)
+
+    def test_power(self):
+        for n in [60, 150]:
+            power = analytic_power(self.mixed_questions, n, weight_type="quadratic", reliability=0.15)[1]
+            results = bootstrap_sample_size_cohen_kappa(self.mixed_questions, max_n=n, start_n=n,
+                                                        weight_type="quadratic", reliability=0.15, n_bootstrap=10000,
+                                                        seed=0, simulation="tables")
+            self.assertAlmostEqual(power, results.df['power'].iloc[0], delta=0.02)
+
+    def test_sample_size(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            results = bootstrap_sample_size_cohen_kappa(self.questions, max_n=100, start_n=10, n_step=10,
+                                                        reliability=0.1, alpha=0.05, beta=0.8, method="analytic")
+        df_cols = ['n', 'power', 'upper_bound_ci', 'mean_kappa_h0', 'mean_kappa_h1']
+        self.assertTrue(all(df_cols == results.df.columns))
+        self.assertTrue(results.sample_size == 40 or results.sample_size == 50)
+        self.assertTrue(results.df['power'].is_monotonic_increasing)
+        # Sample sizes below 50 are outside of the validity domain
+        self.assertEqual(len(caught), 1 if results.sample_size < 50 else 0)
+
+    def test_wrong_method(self):
+        with self.assertRaises(ValueError):
+            bootstrap_confidence_interval(self.questions, n=10, method="exact")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+
+from pyretest import sample_questionnaire, pooled_cohen_kappa, batched_pooled_cohen_kappa, Question
+
+
+class TestBatchedPooledKappa(unittest.TestCase):
+    def setUp(self):
+        self.questions = [
+            Question(["a", "b", "c", "d", "e"], np.random.rand(5)),
+            Question(["a", "b", "c"], np.random.rand(3)),
+            Question([True, False], np.random.rand(2)),
+            Question(["a", "b", "c", "d", "e", "f", "g"], np.random.rand(7)),
+        ]
+        self.samples_a = [sample_questionnaire(self.questions, n=50) for _ in range(20)]
+        self.samples_b = [sample_questionnaire(self.questions, n=50) for _ in range(20)]
+        # Make half of the replicates partially reliable
+        for replicate in range(10):
+            self.samples_a[replicate][:10] = self.samples_b[replicate][:10]
+
+    def assert_matches_scalar(self, weight_type):
+        kappas = batched_pooled_cohen_kappa(self.samples_a, self.samples_b, weight_type=weight_type,
+                                            questions=self.questions)
+        self.assertEqual(kappas.shape, (20,))
+        for replicate in range(20):
+            k1 = pooled_cohen_kappa(self.samples_a[replicate], self.samples_b[replicate], weight_type=weight_type,
+                                    questions=self.questions)
+            self.assertAlmostEqual(kappas[replicate], k1, places=10)
+
+    def test_unweighted(self):
+        self.assert_matches_scalar(None)
+
+    def test_linear(self):
+        self.assert_matches_scalar("linear")
+
+    def test_quadratic(self):
+        self.assert_matches_scalar("quadratic")
+
+    def test_wrong_shape(self):
+        with self.assertRaises(Exception):
+            batched_pooled_cohen_kappa(self.samples_a[0], self.samples_b[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,19 @@
+import unittest
+
+from benchmarks.run import iter_benchmarks, measure
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_benchmarks_run(self):
+        # Run the first parameter combination of each benchmark, so that the suite follows the API
+        seen = set()
+        for name, cls, method_name, params in iter_benchmarks():
+            if (cls, method_name) in seen or not method_name.startswith("peakmem_"):
+                continue
+            seen.add((cls, method_name))
+            self.assertGreater(measure(cls, method_name, params), 0, name)
+        self.assertGreaterEqual(len(seen), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
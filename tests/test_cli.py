@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from pyretest import Question, bootstrap_sample_size_cohen_kappa, bootstrap_confidence_interval, BootstrapHook
+from pyretest.cli import main, load_spec
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.questions = [{"values": [1, 2, 3], "probabilities": [0.2, 0.3, 0.5]} for _ in range(3)]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def write_spec(self, jobs, name="jobs.json", **spec):
+        with open(self.path(name), "w") as file:
+            json.dump(dict(spec, questions=self.questions, jobs=jobs), file)
+        return self.path(name)
+
+    def checkpoints(self, job):
+        return sorted(name for name in os.listdir(self.path(os.path.join("jobs.checkpoint", job)))
+                      if name.endswith(".npz"))
+
+    def test_resume(self):
+        job = {"name": "power", "output": "power.csv", "max_n": 60, "start_n": 20, "n_step": 20, "n_bootstrap": 100,
+               "batch_size": 50, "seed": 3}
+        spec = self.write_spec([job])
+        self.assertEqual(main(["run", spec, "--quiet"]), 0)
+        checkpoints = self.checkpoints("power")
+        self.assertEqual(len(checkpoints), 3 * 2)
+
+        # A longer run resumes from the checkpoints of the first one
+        spec = self.write_spec([dict(job, max_n=100)])
+        self.assertEqual(main(["run", spec, "--quiet"]), 0)
+        self.assertEqual(len(self.checkpoints("power")), 5 * 2)
+        self.assertTrue(set(checkpoints) <= set(self.checkpoints("power")))
+
+        expected = bootstrap_sample_size_cohen_kappa([Question(**question) for question in self.questions], 100,
+                                                     start_n=20, n_step=20, n_bootstrap=100, batch_size=50, seed=3,
+                                                     hook=BootstrapHook())
+        power = pd.read_csv(self.path("power.csv"))
+        self.assertEqual(power.columns.tolist(), expected.df.columns.tolist())
+        pd.testing.assert_frame_equal(power, expected.df)
+
+    def test_concurrent_jobs(self):
+        jobs = [{"output": "power.parquet", "max_n": 40, "n_bootstrap": 100, "seed": 1},
+                {"type": "confidence_interval", "output": "out/ci.csv", "n": 50, "n_bootstrap": 200}]
+        spec = self.write_spec(jobs, workers=2)
+        self.assertEqual(main(["run", spec, "--quiet"]), 0)
+        self.assertEqual(len(pd.read_parquet(self.path("power.parquet"))), 4)
+        ci = pd.read_csv(self.path("out/ci.csv"))
+        self.assertEqual(ci.columns.tolist(), ["mean", "lowerbound", "upperbound", "std"])
+
+        # The seed drawn for the interval is kept in its checkpoint
+        with open(self.path("jobs.checkpoint/1/seed.json")) as file:
+            seed = json.load(file)["seed"]
+        expected = bootstrap_confidence_interval([Question(**question) for question in self.questions], 50,
+                                                 n_bootstrap=200, seed=seed, hook=BootstrapHook())
+        self.assertAlmostEqual(ci["upperbound"].item(), expected.upperbound)
+        self.assertEqual(main(["run", spec, "--quiet", "--jobs", "1"]), 0)
+        pd.testing.assert_frame_equal(pd.read_csv(self.path("out/ci.csv")), ci)
+
+    def test_spec_errors(self):
+        with open(self.path("questions.yaml"), "w") as file:
+            file.write("- values: [yes, no]\n  probabilities: [0.5, 0.5]\n")
+        with open(self.path("jobs.yaml"), "w") as file:
+            file.write("questionnaire: questions.yaml\njobs:\n  - output: power.csv\n    max_n: 20\n")
+        spec = load_spec(self.path("jobs.yaml"))
+        self.assertEqual(spec["questions"], [Question([True, False], [0.5, 0.5])])
+        self.assertEqual(spec["jobs"][0]["output"], self.path("power.csv"))
+        self.assertEqual(spec["checkpoint"], self.path("jobs.checkpoint"))
+
+        self.assertEqual(main(["run", self.write_spec([{"type": "unknown", "output": "a.csv"}]), "--quiet"]), 2)
+        self.assertEqual(main(["run", self.write_spec([{"output": "a.csv", "max_n": 20, "unknown": 1}]),
+                               "--quiet"]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+import numpy as np
+
+from pyretest import bootstrap_sample_size_cohen_kappa, sample_questionnaire_codes, Question
+from pyretest.pooled_kappa.contingency import contingency_table, cumulative_contingency_table
+
+
+class TestCommonRandomNumbers(unittest.TestCase):
+    def setUp(self):
+        self.questions = [
+            Question(["a", "b", "c", "d", "e"], [1 / 5] * 5),
+            Question(["a", "b", "c", "d", "e"], [1 / 5] * 5),
+            Question(["a", "b", "c", "d", "e"], [1 / 5] * 5),
+            Question(["a", "b", "c", "d", "e"], [1 / 5] * 5),
+        ]
+
+    def test_cumulative_contingency_table(self):
+        codes_a = sample_questionnaire_codes(self.questions, n=100, replicates=3, seed=0)[..., 0]
+        codes_b = sample_questionnaire_codes(self.questions, n=100, replicates=3, seed=1)[..., 0]
+        prefixes = [10, 11, 50, 90]
+        tables = cumulative_contingency_table(codes_a, codes_b, 5, prefixes)
+        self.assertEqual(tables.shape, (4, 3, 5, 5))
+        for i, n in enumerate(prefixes):
+            np.testing.assert_array_equal(tables[i], contingency_table(codes_a[:, :n], codes_b[:, :n], 5))
+
+    def test_sample_size(self):
+        kwargs = dict(max_n=100, start_n=10, n_step=10, reliability=0.1, n_bootstrap=1000, alpha=0.05, beta=0.8,
+                      seed=0, common_random_numbers=True)
+        results = bootstrap_sample_size_cohen_kappa(self.questions, **kwargs)
+        df_cols = ['n', 'power', 'upper_bound_ci', 'mean_kappa_h0', 'mean_kappa_h1']
+        self.assertTrue(all(df_cols == results.df.columns))
+        self.assertEqual(results.df.shape[0], 10)
+        self.assertTrue(results.sample_size == 40 or results.sample_size == 50)
+        np.testing.assert_allclose(results.df['mean_kappa_h1'].iloc[-5:], 0.1, atol=0.01)
+
+        # Reproducible whatever the number of workers, and usable by the adaptive search
+        results_pool = bootstrap_sample_size_cohen_kappa(self.questions, n_jobs=2, **kwargs)
+        self.assertTrue(results.df.equals(results_pool.df))
+        results_adaptive = bootstrap_sample_size_cohen_kappa(self.questions, search="adaptive", **kwargs)
+        self.assertEqual(results.sample_size, results_adaptive.sample_size)
+
+
+if __name__ == '__main__':
+    unittest.main()
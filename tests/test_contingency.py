@@ -0,0 +1,74 @@
+import unittest
+
+import numpy as np
+
+from pyretest import sample_questionnaire_codes, encode_responses, decode_responses, contingency_tables, \
+    pooled_kappa_from_tables, Question
+from pyretest.pooled_kappa import weight_matrix
+from pyretest.pooled_kappa.contingency import contingency_table
+
+
+def naive_weighted_kappa(codes_a, codes_b, n_categories, weight_type):
+    accuracies = []
+    marg_probabilities = []
+    for col, c in enumerate(n_categories):
+        table = np.zeros((c, c))
+        for a, b in zip(codes_a[:, col], codes_b[:, col]):
+            table[a, b] += 1
+        table /= table.sum()
+        weights = np.array([[1 - (abs(i - j) / (c - 1)) ** (1 if weight_type == "linear" else 2)
+                             for j in range(c)] for i in range(c)])
+        accuracies.append(np.sum(weights * table))
+        marg_probabilities.append(np.sum(weights * np.outer(table.sum(axis=1), table.sum(axis=0))))
+    return (np.mean(accuracies) - np.mean(marg_probabilities)) / (1 - np.mean(marg_probabilities))
+
+
+class TestContingency(unittest.TestCase):
+    def setUp(self):
+        self.questions = [
+            Question(["a", "b", "c", "d", "e", "f", "g"], np.random.rand(7)),
+            Question([True, False], np.random.rand(2)),
+            Question(list(range(11)), np.random.rand(11)),
+        ]
+        self.n_categories = [len(question.values) for question in self.questions]
+
+    def test_weight_matrix(self):
+        np.testing.assert_array_equal(weight_matrix(3), np.eye(3))
+        np.testing.assert_allclose(weight_matrix(3, "linear"), [[1, 0.5, 0], [0.5, 1, 0.5], [0, 0.5, 1]])
+        np.testing.assert_allclose(weight_matrix(3, "quadratic"), [[1, 0.75, 0], [0.75, 1, 0.75], [0, 0.75, 1]])
+        # Built once per category count and read-only
+        self.assertIs(weight_matrix(7, "linear"), weight_matrix(7, "linear"))
+        with self.assertRaises(ValueError):
+            weight_matrix(7, "linear")[0, 0] = 0
+
+    def test_contingency_table(self):
+        codes_a = sample_questionnaire_codes(self.questions, n=200, replicates=4, seed=0)
+        codes_b = sample_questionnaire_codes(self.questions, n=200, replicates=4, seed=1)
+        tables = contingency_tables(codes_a, codes_b, self.n_categories)
+        for col, c in enumerate(self.n_categories):
+            self.assertEqual(tables[col].shape, (4, c, c))
+            for replicate in range(4):
+                np.testing.assert_array_equal(
+                    tables[col][replicate],
+                    contingency_table(codes_a[replicate, :, col], codes_b[replicate, :, col], c))
+                self.assertEqual(tables[col][replicate, 1, 0],
+                                 np.sum((codes_a[replicate, :, col] == 1) & (codes_b[replicate, :, col] == 0)))
+
+    def test_weighted_kappa(self):
+        codes_a = sample_questionnaire_codes(self.questions, n=300, seed=2)
+        codes_b = sample_questionnaire_codes(self.questions, n=300, seed=3)
+        codes_a[:100] = codes_b[:100]
+        tables = contingency_tables(codes_a, codes_b, self.n_categories)
+        for weight_type in ["linear", "quadratic"]:
+            self.assertAlmostEqual(pooled_kappa_from_tables(tables, weight_type=weight_type),
+                                   naive_weighted_kappa(codes_a, codes_b, self.n_categories, weight_type), places=10)
+
+    def test_encode_responses(self):
+        codes = sample_questionnaire_codes(self.questions, n=100, seed=4)
+        np.testing.assert_array_equal(encode_responses(decode_responses(codes, self.questions), self.questions), codes)
+        with self.assertRaises(ValueError):
+            encode_responses([["z", True, 1]], self.questions)
+
+
+if __name__ == '__main__':
+    unittest.main()
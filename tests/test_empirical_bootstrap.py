@@ -0,0 +1,67 @@
+import unittest
+
+import numpy as np
+
+from pyretest import sample_questionnaire_codes, decode_responses, pooled_cohen_kappa, Question, \
+    empirical_bootstrap_confidence_interval
+from pyretest.pooled_kappa.empirical import SubjectContributions
+
+
+class TestEmpiricalBootstrap(unittest.TestCase):
+    def setUp(self):
+        self.questions = [
+            Question(["a", "b", "c", "d", "e"], np.random.rand(5)),
+            Question([1, 2, 3], np.random.rand(3)),
+            Question([True, False], np.random.rand(2)),
+        ]
+        codes_a = sample_questionnaire_codes(self.questions, n=300, seed=0)
+        codes_b = sample_questionnaire_codes(self.questions, n=300, seed=1)
+        codes_b[:90] = codes_a[:90]
+        self.samples_a = decode_responses(codes_a, self.questions)
+        self.samples_b = decode_responses(codes_b, self.questions)
+
+    def test_resampled_kappa(self):
+        rng = np.random.default_rng(0)
+        counts = rng.multinomial(300, np.full(300, 1 / 300), size=5)
+        for weight_type in [None, "linear", "quadratic"]:
+            contributions = SubjectContributions.from_samples(self.samples_a, self.samples_b, weight_type,
+                                                              self.questions)
+            self.assertAlmostEqual(contributions.kappa(contributions.totals, 300),
+                                   pooled_cohen_kappa(self.samples_a, self.samples_b, weight_type, self.questions),
+                                   places=10)
+            # Weighting the subjects by their counts is the same as scoring the resampled answers
+            kappas = contributions.kappa(contributions.sums(counts), 300)
+            for kappa, subject_counts in zip(kappas, counts):
+                resampled_a = np.repeat(self.samples_a, subject_counts, axis=0)
+                resampled_b = np.repeat(self.samples_b, subject_counts, axis=0)
+                self.assertAlmostEqual(kappa, pooled_cohen_kappa(resampled_a, resampled_b, weight_type,
+                                                                 self.questions), places=10)
+            # The same counts when the indicators are built item by item
+            expected = contributions.sums(counts)
+            contributions.chunk_size = 1
+            for sums, expected_sums in zip(contributions.sums(counts), expected):
+                np.testing.assert_array_equal(sums, expected_sums)
+            self.assertEqual(len(contributions._item_groups()), 3)
+
+    def test_confidence_interval(self):
+        kappa = pooled_cohen_kappa(self.samples_a, self.samples_b)
+        ci = empirical_bootstrap_confidence_interval(self.samples_a, self.samples_b, n_bootstrap=2000, seed=0)
+        self.assertLess(ci.lowerbound, kappa)
+        self.assertLess(kappa, ci.upperbound)
+        self.assertAlmostEqual(ci.mean, kappa, delta=0.01)
+        self.assertGreater(ci.std, 0)
+        # Reproducible and independent of the batch size
+        same = empirical_bootstrap_confidence_interval(self.samples_a, self.samples_b, n_bootstrap=2000, seed=0,
+                                                       batch_size=2000)
+        self.assertEqual(ci, same)
+
+        weighted = empirical_bootstrap_confidence_interval(self.samples_a.tolist(), self.samples_b.tolist(),
+                                                           weight_type="quadratic", questions=self.questions,
+                                                           n_bootstrap=500, seed=1)
+        self.assertLess(weighted.lowerbound, weighted.upperbound)
+        with self.assertRaises(ValueError):
+            empirical_bootstrap_confidence_interval(self.samples_a, self.samples_b, weight_type="quadratic")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import io
+import logging
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from pyretest import Question, bootstrap_sample_size_cohen_kappa, bootstrap_confidence_interval, BootstrapHook, \
+    TqdmHook, LoggingHook
+
+
+class RecordingHook(BootstrapHook):
+    def __init__(self, profile=True):
+        self.profile = profile
+        self.events = []
+        self.stats = []
+
+    def start(self, description, total):
+        self.events.append(("start", total))
+
+    def update(self, stats):
+        self.stats.append(stats)
+
+    def close(self):
+        self.events.append(("close", len(self.stats)))
+
+
+class TestHooks(unittest.TestCase):
+    def setUp(self):
+        self.questions = [Question([1, 2, 3, 4, 5], [0.1, 0.2, 0.4, 0.2, 0.1]) for _ in range(4)]
+        self.options = dict(max_n=100, start_n=20, n_step=20, n_bootstrap=200, reliability=0.1, seed=2)
+
+    def test_profiling(self):
+        hook = RecordingHook()
+        results = bootstrap_sample_size_cohen_kappa(self.questions, **self.options, hook=hook)
+        self.assertEqual(hook.events, [("start", 5), ("close", 5)])
+        self.assertEqual([stats.n for stats in hook.stats], [20, 40, 60, 80, 100])
+        for stats in hook.stats:
+            self.assertEqual(stats.n_bootstrap, 200)
+            self.assertGreater(stats.seconds, 0)
+            self.assertEqual(set(stats.timings), {"sampling", "reliability", "scoring", "reduction"})
+            self.assertLessEqual(sum(stats.timings.values()), stats.seconds)
+
+        # The hooks do not change the results, and without profiling no phase is timed
+        hook = RecordingHook(profile=False)
+        same = bootstrap_sample_size_cohen_kappa(self.questions, **self.options, hook=hook)
+        np.testing.assert_array_equal(same.df.to_numpy(), results.df.to_numpy())
+        self.assertTrue(all(stats.timings == {} for stats in hook.stats))
+
+    def test_modes(self):
+        hook = RecordingHook()
+        results = bootstrap_sample_size_cohen_kappa(self.questions, **self.options, search="adaptive", hook=hook)
+        self.assertEqual(hook.events[0], ("start", None))
+        # Each estimate is reported, the coarse ones included
+        budgets = {}
+        for stats in hook.stats:
+            budgets[stats.n] = max(budgets.get(stats.n, 0), stats.n_bootstrap)
+        self.assertEqual(budgets, dict(zip(results.df['n'], results.df['n_bootstrap'])))
+
+        hook = RecordingHook()
+        results = bootstrap_sample_size_cohen_kappa(self.questions, **self.options, tolerance=0.05, hook=hook)
+        self.assertEqual(sorted(stats.n for stats in hook.stats), list(results.df['n']))
+        self.assertEqual({stats.n: stats.n_bootstrap for stats in hook.stats},
+                         dict(zip(results.df['n'], results.df['n_bootstrap'])))
+
+        hook = RecordingHook()
+        bootstrap_sample_size_cohen_kappa(self.questions, **self.options, common_random_numbers=True, hook=hook)
+        self.assertIn("sampling", hook.stats[0].timings)
+
+        hook = RecordingHook()
+        bootstrap_confidence_interval(self.questions, 50, n_bootstrap=200, seed=1, simulation="tables", hook=hook)
+        self.assertEqual(hook.events, [("start", 1), ("close", 1)])
+        self.assertEqual(set(hook.stats[0].timings), {"sampling", "scoring", "reduction"})
+
+    def test_executor(self):
+        hook = RecordingHook()
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            results = bootstrap_sample_size_cohen_kappa(self.questions, **self.options, executor=executor,
+                                                        hook=hook)
+        self.assertEqual(len(hook.stats), 5)
+        self.assertGreater(hook.stats[0].timings["sampling"], 0)
+        same = bootstrap_sample_size_cohen_kappa(self.questions, **self.options, hook=BootstrapHook())
+        np.testing.assert_array_equal(same.df.to_numpy(), results.df.to_numpy())
+
+    def test_sinks(self):
+        with self.assertLogs("pyretest.pooled_kappa.hooks", level=logging.INFO) as logs:
+            bootstrap_sample_size_cohen_kappa(self.questions, **self.options, hook=LoggingHook())
+        self.assertEqual(len(logs.output), 1 + 5 + 1)
+        self.assertIn("n=20: 200 bootstrap samples", logs.output[1])
+        self.assertIn("sampling", logs.output[-1])
+
+        output = io.StringIO()
+        bootstrap_sample_size_cohen_kappa(self.questions, **self.options, hook=TqdmHook(file=output))
+        self.assertIn("5/5", output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+import unittest
+
+# Seconds importing pyretest may take once numpy is imported, far above the tens of milliseconds it takes, so that
+# only an eager import of a heavy dependency (e.g. pandas, ~0.5s) fails the test
+IMPORT_BUDGET = 0.3
+
+SCRIPT = """
+import sys, time
+import numpy
+start = time.perf_counter()
+import pyretest
+import pyretest.io
+print(time.perf_counter() - start)
+print(" ".join(sorted({name.split(".")[0] for name in sys.modules} - set(sys.stdlib_module_names))))
+"""
+
+
+class TestImportTime(unittest.TestCase):
+    def test_only_numpy_at_import(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run([sys.executable, "-c", SCRIPT], capture_output=True, text=True, check=True,
+                                cwd=root).stdout
+        seconds, modules = output.splitlines()
+        for module in ["pandas", "tqdm", "pyarrow", "scipy"]:
+            self.assertNotIn(module, modules.split())
+        self.assertLess(float(seconds), IMPORT_BUDGET)
+
+    def test_power_frame(self):
+        from pyretest import Question, bootstrap_sample_size_cohen_kappa, BootstrapHook
+        results = bootstrap_sample_size_cohen_kappa([Question([1, 2], [0.5, 0.5])] * 2, 30, n_bootstrap=100,
+                                                    seed=0, hook=BootstrapHook())
+        self.assertEqual(results.df['n'].tolist(), [10, 20, 30])
+        self.assertEqual(results.df['n'].dtype.kind, "i")
+
+
+if __name__ == '__main__':
+    unittest.main()
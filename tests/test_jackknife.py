@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+
+from pyretest import sample_questionnaire_codes, decode_responses, pooled_cohen_kappa, Question, \
+    empirical_bootstrap_confidence_interval, jackknife_standard_error
+from pyretest.pooled_kappa.empirical import SubjectContributions
+
+
+class TestJackknife(unittest.TestCase):
+    def setUp(self):
+        self.questions = [
+            Question(["a", "b", "c", "d", "e"], np.random.rand(5)),
+            Question([0, 1], [0.8, 0.2]),
+            Question([True, False], np.random.rand(2)),
+        ]
+        codes_a = sample_questionnaire_codes(self.questions, n=60, seed=0)
+        codes_b = sample_questionnaire_codes(self.questions, n=60, seed=1)
+        codes_b[:20] = codes_a[:20]
+        self.samples_a = decode_responses(codes_a, self.questions)
+        self.samples_b = decode_responses(codes_b, self.questions)
+
+    def test_leave_one_out(self):
+        for weight_type in [None, "quadratic"]:
+            contributions = SubjectContributions.from_samples(self.samples_a, self.samples_b, weight_type,
+                                                              self.questions)
+            expected = [pooled_cohen_kappa(np.delete(self.samples_a, i, axis=0), np.delete(self.samples_b, i, axis=0),
+                                           weight_type, self.questions) for i in range(60)]
+            np.testing.assert_allclose(contributions.jackknife_kappas(), expected, atol=1e-12)
+
+    def test_standard_error(self):
+        standard_error = jackknife_standard_error(self.samples_a, self.samples_b)
+        ci = empirical_bootstrap_confidence_interval(self.samples_a, self.samples_b, n_bootstrap=4000, seed=0)
+        self.assertAlmostEqual(standard_error, ci.std, delta=0.15 * ci.std)
+        with self.assertRaises(ValueError):
+            jackknife_standard_error(self.samples_a[:1], self.samples_b[:1])
+
+    def test_bca(self):
+        percentile = empirical_bootstrap_confidence_interval(self.samples_a, self.samples_b, n_bootstrap=2000, seed=0)
+        bca = empirical_bootstrap_confidence_interval(self.samples_a, self.samples_b, n_bootstrap=2000, seed=0,
+                                                      interval="bca")
+        kappa = pooled_cohen_kappa(self.samples_a, self.samples_b)
+        self.assertEqual((bca.mean, bca.std), (percentile.mean, percentile.std))
+        self.assertLess(bca.lowerbound, kappa)
+        self.assertLess(kappa, bca.upperbound)
+        # The corrections move the bounds by a fraction of the width of the interval
+        width = percentile.upperbound - percentile.lowerbound
+        self.assertLess(abs(bca.lowerbound - percentile.lowerbound), width / 4)
+        self.assertLess(abs(bca.upperbound - percentile.upperbound), width / 4)
+        with self.assertRaises(ValueError):
+            empirical_bootstrap_confidence_interval(self.samples_a, self.samples_b, interval="normal")
+        with self.assertRaises(ValueError):
+            empirical_bootstrap_confidence_interval(self.samples_a[:1], self.samples_b[:1], interval="bca")
+
+
+if __name__ == '__main__':
+    unittest.main()
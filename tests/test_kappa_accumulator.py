@@ -0,0 +1,58 @@
+import pickle
+import unittest
+
+import numpy as np
+
+from pyretest import sample_questionnaire_codes, decode_responses, pooled_cohen_kappa, KappaAccumulator, Question
+
+
+class TestKappaAccumulator(unittest.TestCase):
+    def setUp(self):
+        self.questions = [
+            Question(["a", "b", "c", "d", "e"], np.random.rand(5)),
+            Question(["a", "b", "c"], np.random.rand(3)),
+            Question([True, False], np.random.rand(2)),
+        ]
+        self.codes_a = sample_questionnaire_codes(self.questions, n=1000, seed=0)
+        self.codes_b = sample_questionnaire_codes(self.questions, n=1000, seed=1)
+        self.codes_a[:200] = self.codes_b[:200]
+        self.samples_a = decode_responses(self.codes_a, self.questions)
+        self.samples_b = decode_responses(self.codes_b, self.questions)
+
+    def test_chunks(self):
+        accumulator = KappaAccumulator(self.questions)
+        self.assertEqual(accumulator.kappa(), 0)
+        for start in range(0, 1000, 128):
+            accumulator.update(self.samples_a[start:start + 128], self.samples_b[start:start + 128])
+        self.assertEqual(accumulator.n, 1000)
+        for weight_type in [None, "linear", "quadratic"]:
+            self.assertAlmostEqual(accumulator.kappa(weight_type=weight_type),
+                                   pooled_cohen_kappa(self.samples_a, self.samples_b, weight_type=weight_type,
+                                                      questions=self.questions), places=10)
+
+    def test_merge(self):
+        full = KappaAccumulator(self.questions).update_codes(self.codes_a, self.codes_b)
+        shards = [KappaAccumulator(n_categories=[5, 3, 2]).update_codes(self.codes_a[start:start + 300],
+                                                                        self.codes_b[start:start + 300])
+                  for start in range(0, 1000, 300)]
+        # Accumulators can be sent across processes
+        shards = [pickle.loads(pickle.dumps(shard)) for shard in shards]
+        merged = KappaAccumulator(n_categories=[5, 3, 2])
+        for shard in shards:
+            merged.merge(shard)
+        self.assertEqual(merged.n, 1000)
+        self.assertEqual(merged.kappa(weight_type="quadratic"), full.kappa(weight_type="quadratic"))
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            KappaAccumulator()
+        with self.assertRaises(ValueError):
+            KappaAccumulator(n_categories=[5, 3, 2]).update(self.samples_a, self.samples_b)
+        with self.assertRaises(ValueError):
+            KappaAccumulator(self.questions).update_codes(self.codes_a, self.codes_b[:10])
+        with self.assertRaises(ValueError):
+            KappaAccumulator(self.questions).merge(KappaAccumulator(n_categories=[5, 3]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from pyretest import make_reliable, make_reliable_codes, sample_questionnaire_codes, batched_pooled_cohen_kappa, \
+    Question
+from pyretest.sampler.sample_questionnaire import _n_copied_answers
+
+
+class TestMakeReliable(unittest.TestCase):
+    def test_make_reliable_edges(self):
+        # The remaining answers are copied in the sample following the fully copied ones
+        samples_a = np.zeros((4, 3), dtype=int)
+        make_reliable(samples_a, np.ones((4, 3), dtype=int), 0.5)
+        np.testing.assert_array_equal(samples_a, [[1, 1, 1], [1, 1, 1], [0, 0, 0], [0, 0, 0]])
+        samples_a = np.zeros((4, 3), dtype=int)
+        make_reliable(samples_a, np.ones((4, 3), dtype=int), 0.45)
+        np.testing.assert_array_equal(samples_a, [[1, 1, 1], [1, 1, 0], [0, 0, 0], [0, 0, 0]])
+        # Copying every sample but the last used to index past the end
+        samples_a = [[0, 0], [0, 0]]
+        make_reliable(samples_a, [[1, 1], [1, 1]], 0.5)
+        self.assertEqual(samples_a, [[1, 1], [0, 0]])
+        samples_a = [[0, 0], [0, 0]]
+        make_reliable(samples_a, [[1, 1], [1, 1]], 1)
+        self.assertEqual(samples_a, [[1, 1], [1, 1]])
+
+    def test_exact(self):
+        codes_a = np.zeros((50, 37, 4), dtype=np.uint8)
+        codes_b = np.ones((50, 37, 4), dtype=np.uint8)
+        copied = make_reliable_codes(codes_a, codes_b, 0.25, seed=0)
+        np.testing.assert_array_equal(codes_a, copied)
+        # Same number of answers per item as make_reliable, at random subjects
+        expected = _n_copied_answers(37, 4, 0.25)
+        np.testing.assert_array_equal(codes_a.sum(axis=1), np.broadcast_to(expected, (50, 4)))
+        self.assertGreater(codes_a[:, -1].sum(), 0)
+        self.assertGreater(len(np.unique(codes_a[:, :, 0], axis=0)), 1)
+
+    def test_bernoulli(self):
+        codes_a = np.zeros((200, 100, 5), dtype=np.uint8)
+        make_reliable_codes(codes_a, np.ones_like(codes_a), 0.3, mode="bernoulli", seed=0)
+        self.assertAlmostEqual(codes_a.mean(), 0.3, delta=0.005)
+        with self.assertRaises(ValueError):
+            make_reliable_codes(codes_a, codes_a, 0.3, mode="prefix")
+        with self.assertRaises(ValueError):
+            make_reliable_codes(codes_a, codes_a, 1.5)
+
+    def test_reliability(self):
+        questions = [Question(["a", "b", "c", "d"], [0.1, 0.2, 0.3, 0.4])] * 5
+        codes_a = sample_questionnaire_codes(questions, n=500, replicates=200, seed=0)
+        codes_b = sample_questionnaire_codes(questions, n=500, replicates=200, seed=1)
+        for mode in ["exact", "bernoulli"]:
+            reliable_a = codes_a.copy()
+            make_reliable_codes(reliable_a, codes_b, 0.2, mode=mode, seed=2)
+            self.assertAlmostEqual(np.mean(batched_pooled_cohen_kappa(reliable_a, codes_b)), 0.2, delta=0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+
+from pyretest import Question, pack_codes, unpack_codes, pooled_kappa_from_packed, pooled_cohen_kappa, \
+    batched_pooled_cohen_kappa, contingency_tables, pooled_kappa_from_tables, sample_questionnaire_codes
+
+
+class TestPackedCodes(unittest.TestCase):
+    def test_round_trip(self):
+        rng = np.random.default_rng(0)
+        for shape in [(0, 3), (1, 1), (7, 2), (64, 3), (65, 4), (3, 130, 7)]:
+            codes = rng.integers(0, 2, shape, dtype=np.uint8)
+            packed = pack_codes(codes)
+            self.assertEqual(packed.words.dtype, np.uint64)
+            self.assertEqual(packed.words.shape, shape[:-2] + (shape[-1], -(-shape[-2] // 64)))
+            np.testing.assert_array_equal(unpack_codes(packed), codes)
+        with self.assertRaises(ValueError):
+            pack_codes(np.array([[0, 2]]))
+        with self.assertRaises(ValueError):
+            pack_codes(np.array([0, 1]))
+
+    def test_same_as_tables(self):
+        questions = [Question([0, 1], [p, 1 - p]) for p in np.linspace(0.05, 0.95, 300)]
+        codes_a = sample_questionnaire_codes(questions, 101, replicates=20, seed=0)
+        codes_b = sample_questionnaire_codes(questions, 101, replicates=20, seed=1)
+        copied = np.random.default_rng(2).random(codes_a.shape) < 0.3
+        codes_b[copied] = codes_a[copied]
+        expected = pooled_kappa_from_tables(contingency_tables(codes_a, codes_b, [2] * len(questions)))
+        kappas = pooled_kappa_from_packed(pack_codes(codes_a), pack_codes(codes_b))
+        np.testing.assert_allclose(kappas, expected, atol=1e-12)
+        self.assertEqual(pack_codes(codes_a).words.nbytes, 20 * 300 * 2 * 8)
+        with self.assertRaises(ValueError):
+            pooled_kappa_from_packed(pack_codes(codes_a), pack_codes(codes_b[:, :100]))
+
+    def test_binary_answers(self):
+        # Binary answers of any type take the packed path of pooled_cohen_kappa
+        rng = np.random.default_rng(3)
+        codes_a = rng.integers(0, 2, (4, 50, 30))
+        codes_b = np.where(rng.random(codes_a.shape) < 0.5, codes_a, rng.integers(0, 2, codes_a.shape))
+        samples_a = np.where(codes_a == 1, "yes", "no")
+        samples_b = np.where(codes_b == 1, "yes", "no")
+        expected = pooled_kappa_from_tables(contingency_tables(codes_a, codes_b, [2] * 30))
+        self.assertAlmostEqual(pooled_cohen_kappa(samples_a[0].tolist(), samples_b[0].tolist()), expected[0])
+        np.testing.assert_allclose(batched_pooled_cohen_kappa(samples_a, samples_b), expected)
+        questions = [Question(["no", "yes"], [0.5, 0.5])] * 30
+        np.testing.assert_allclose(batched_pooled_cohen_kappa(samples_a, samples_b, "quadratic", questions), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from pyretest import sample_questionnaire_codes, decode_responses, pooled_cohen_kappa, Question
+from pyretest.io import read_responses, iter_paired_codes, accumulate_paired_files, save_paired_codes, \
+    load_paired_codes
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class TestPairedResponses(unittest.TestCase):
+    def setUp(self):
+        self.questions = [
+            Question(["a", "b", "c", "d", "e"], np.random.rand(5)),
+            Question([1, 2, 3], np.random.rand(3)),
+            Question([True, False], np.random.rand(2)),
+        ]
+        self.codes_a = sample_questionnaire_codes(self.questions, n=500, seed=0)
+        self.codes_b = sample_questionnaire_codes(self.questions, n=500, seed=1)
+        self.codes_b[:150] = self.codes_a[:150]
+        self.samples_a = decode_responses(self.codes_a, self.questions)
+        self.samples_b = decode_responses(self.codes_b, self.questions)
+        self.ids = np.arange(1000, 1500)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def frames(self):
+        """
+        Test and retest dataframes, the retest being shuffled and missing some subjects of the test.
+        """
+        columns = ["q1", "q2", "q3"]
+        test = pd.DataFrame({column: self.samples_a[:, col].tolist() for col, column in enumerate(columns)})
+        test.insert(0, "subject", self.ids)
+        retest = pd.DataFrame({column: self.samples_b[:, col].tolist() for col, column in enumerate(columns)})
+        retest.insert(0, "subject", self.ids)
+        retest = retest.sample(frac=1, random_state=0).iloc[:450]
+        kept = np.isin(self.ids, retest["subject"].to_numpy())
+        return test, retest, kept
+
+    def assert_same_kappa(self, accumulator, kept):
+        self.assertEqual(accumulator.n, kept.sum())
+        for weight_type in [None, "quadratic"]:
+            self.assertAlmostEqual(accumulator.kappa(weight_type=weight_type),
+                                   pooled_cohen_kappa(self.samples_a[kept], self.samples_b[kept],
+                                                      weight_type=weight_type, questions=self.questions), places=10)
+
+    def test_csv(self):
+        test, retest, kept = self.frames()
+        test_path = os.path.join(self.directory.name, "test.csv")
+        retest_path = os.path.join(self.directory.name, "retest.csv")
+        test.to_csv(test_path, index=False)
+        retest.to_csv(retest_path, index=False)
+
+        chunks = list(read_responses(test_path, self.questions, id_column="subject", chunksize=128))
+        self.assertEqual(len(chunks), 4)
+        np.testing.assert_array_equal(np.concatenate([codes for _, codes in chunks]), self.codes_a)
+        np.testing.assert_array_equal(np.concatenate([ids for ids, _ in chunks]), self.ids)
+
+        accumulator = accumulate_paired_files(test_path, retest_path, self.questions, id_column="subject",
+                                              chunksize=128)
+        self.assert_same_kappa(accumulator, kept)
+
+    @unittest.skipUnless(pyarrow, "pyarrow is not installed")
+    def test_parquet(self):
+        test, retest, kept = self.frames()
+        test_path = os.path.join(self.directory.name, "test.parquet")
+        retest_path = os.path.join(self.directory.name, "retest.parquet")
+        test.to_parquet(test_path, index=False)
+        retest.to_parquet(retest_path, index=False)
+        accumulator = accumulate_paired_files(test_path, retest_path, self.questions, id_column="subject",
+                                              item_columns=["q1", "q2", "q3"], chunksize=100)
+        self.assert_same_kappa(accumulator, kept)
+
+    def test_npy_by_position(self):
+        questions = [Question([1, 2, 3, 4, 5], np.random.rand(5)), Question([0, 1], np.random.rand(2))]
+        codes_a = sample_questionnaire_codes(questions, n=300, seed=2)
+        codes_b = sample_questionnaire_codes(questions, n=300, seed=3)
+        test_path = os.path.join(self.directory.name, "test.npy")
+        retest_path = os.path.join(self.directory.name, "retest.npy")
+        np.save(test_path, decode_responses(codes_a, questions))
+        np.save(retest_path, decode_responses(codes_b, questions))
+        accumulator = accumulate_paired_files(test_path, retest_path, questions, chunksize=64)
+        self.assertEqual(accumulator.n, 300)
+        self.assertAlmostEqual(accumulator.kappa(),
+                               pooled_cohen_kappa(decode_responses(codes_a, questions),
+                                                  decode_responses(codes_b, questions)), places=10)
+
+    def test_save_load(self):
+        test, retest, kept = self.frames()
+        test_path = os.path.join(self.directory.name, "test.csv")
+        retest_path = os.path.join(self.directory.name, "retest.csv")
+        test.to_csv(test_path, index=False)
+        retest.to_csv(retest_path, index=False)
+        paired_path = os.path.join(self.directory.name, "paired.npy")
+
+        n = save_paired_codes(paired_path, iter_paired_codes(test_path, retest_path, self.questions,
+                                                             id_column="subject", chunksize=128))
+        self.assertEqual(n, kept.sum())
+        codes_a, codes_b = load_paired_codes(paired_path)
+        self.assertIsInstance(codes_a.base, np.memmap)
+        self.assertEqual(codes_a.dtype, np.uint8)
+        # The pairs are kept, in the order of the retest
+        self.assertEqual(sorted(map(tuple, np.hstack([codes_a, codes_b]))),
+                         sorted(map(tuple, np.hstack([self.codes_a[kept], self.codes_b[kept]]))))
+
+    def test_duplicate_ids(self):
+        test, retest, _ = self.frames()
+        test["subject"] = 0
+        test_path = os.path.join(self.directory.name, "test.csv")
+        test.to_csv(test_path, index=False)
+        retest.to_csv(os.path.join(self.directory.name, "retest.csv"), index=False)
+        with self.assertRaisesRegex(ValueError, "subject id 0 is repeated in .*test.csv"):
+            list(iter_paired_codes(test_path, os.path.join(self.directory.name, "retest.csv"), self.questions,
+                                   id_column="subject"))
+
+    def test_duplicate_retest_ids(self):
+        test, retest, _ = self.frames()
+        test_path = os.path.join(self.directory.name, "test.csv")
+        retest_path = os.path.join(self.directory.name, "retest.csv")
+        test.to_csv(test_path, index=False)
+        subjects = retest["subject"].to_numpy()
+        # Repeated in the same chunk, in two chunks, and among the subjects missing from the test
+        for rows, subject in [([0, 1], subjects[0]), ([0, 300], subjects[0]), ([0, 300], 5000)]:
+            duplicated = retest.copy()
+            duplicated.iloc[rows, 0] = subject
+            duplicated.to_csv(retest_path, index=False)
+            with self.assertRaisesRegex(ValueError, f"subject id {subject} is repeated in .*retest.csv"):
+                list(iter_paired_codes(test_path, retest_path, self.questions, id_column="subject", chunksize=200))
+
+    def test_save_empty(self):
+        paired_path = os.path.join(self.directory.name, "paired.npy")
+        self.assertEqual(save_paired_codes(paired_path, iter([])), 0)
+        codes_a, codes_b = load_paired_codes(paired_path)
+        self.assertEqual(codes_a.shape, (0, 0))
+
+        chunks = [(self.codes_a[start:start + 64], self.codes_b[start:start + 64]) for start in range(0, 500, 64)]
+        self.assertEqual(save_paired_codes(paired_path, iter(chunks)), 500)
+        codes_a, codes_b = load_paired_codes(paired_path)
+        np.testing.assert_array_equal(codes_a, self.codes_a)
+        np.testing.assert_array_equal(codes_b, self.codes_b)
+        with self.assertRaises(ValueError):
+            save_paired_codes(paired_path, iter([(self.codes_a, self.codes_b), (self.codes_a[:, :2], self.codes_b)]))
+
+    def test_ids_of_different_types(self):
+        # Integer ids in the test, and the same ids as strings in the retest
+        questions = [Question([1, 2, 3, 4, 5], np.random.rand(5)), Question([0, 1], np.random.rand(2))]
+        codes_a = sample_questionnaire_codes(questions, n=200, seed=2)
+        codes_b = sample_questionnaire_codes(questions, n=200, seed=3)
+        samples_a = decode_responses(codes_a, questions)
+        samples_b = decode_responses(codes_b, questions)
+        ids = np.arange(1000, 1200)
+        test_path = os.path.join(self.directory.name, "test.npy")
+        retest_path = os.path.join(self.directory.name, "retest.npy")
+        np.save(test_path, np.column_stack([ids, samples_a]))
+        np.save(retest_path, np.column_stack([ids, samples_b]).astype(str)[::-1])
+        accumulator = accumulate_paired_files(test_path, retest_path, questions, id_column=0, chunksize=64)
+        self.assertEqual(accumulator.n, 200)
+        self.assertAlmostEqual(accumulator.kappa(), pooled_cohen_kappa(samples_a, samples_b), places=10)
+
+        # No subject in common
+        np.save(retest_path, np.column_stack([ids + 1000, samples_b]))
+        with self.assertRaises(ValueError):
+            list(iter_paired_codes(test_path, retest_path, questions, id_column=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import random
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from pyretest import bootstrap_sample_size_cohen_kappa, bootstrap_confidence_interval, Question
+
+
+class TestParallelBootstrap(unittest.TestCase):
+    def setUp(self):
+        self.questions = [
+            Question(["a", "b", "c", "d", "e"], [1 / 5] * 5),
+            Question(["a", "b", "c"], [0.2, 0.5, 0.3]),
+            Question([True, False], [0.1, 0.9]),
+        ]
+
+    def test_confidence_interval_reproducible(self):
+        results = bootstrap_confidence_interval(self.questions, n=50, n_bootstrap=300, seed=1)
+        results_pool = bootstrap_confidence_interval(self.questions, n=50, n_bootstrap=300, seed=1, n_jobs=2)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results_executor = bootstrap_confidence_interval(self.questions, n=50, n_bootstrap=300, seed=1,
+                                                             executor=executor)
+        self.assertEqual(results, results_pool)
+        self.assertEqual(results, results_executor)
+        self.assertNotEqual(results, bootstrap_confidence_interval(self.questions, n=50, n_bootstrap=300, seed=2))
+
+    def test_sample_size_reproducible(self):
+        kwargs = dict(max_n=60, start_n=20, n_step=20, weight_type="linear", n_bootstrap=250, seed=3)
+        results = bootstrap_sample_size_cohen_kappa(self.questions, **kwargs)
+        results_pool = bootstrap_sample_size_cohen_kappa(self.questions, n_jobs=2, **kwargs)
+        self.assertEqual(results.sample_size, results_pool.sample_size)
+        self.assertTrue(results.df.equals(results_pool.df))
+
+        # The samples of a given sample size do not depend on the rest of the grid
+        results_40 = bootstrap_sample_size_cohen_kappa(self.questions, **dict(kwargs, start_n=40, max_n=40))
+        self.assertTrue(np.array_equal(results_40.df.values[0], results.df.values[1]))
+
+    def test_global_random_state_untouched(self):
+        random.seed(0)
+        np.random.seed(0)
+        state = random.getstate()
+        np_state = np.random.get_state()
+        bootstrap_confidence_interval(self.questions, n=20, n_bootstrap=100, seed=5)
+        bootstrap_sample_size_cohen_kappa(self.questions, max_n=20, n_bootstrap=100, seed=5)
+        self.assertEqual(state, random.getstate())
+        self.assertTrue(all(np.array_equal(a, b) for a, b in zip(np_state, np.random.get_state())))
+
+
+if __name__ == '__main__':
+    unittest.main()
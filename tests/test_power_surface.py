@@ -0,0 +1,89 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from pyretest import Question, bootstrap_sample_size_cohen_kappa, bootstrap_power_surface, BootstrapHook
+from pyretest.pooled_kappa import contingency
+from pyretest.pooled_kappa.sweep import _simulate_sweep_block
+
+
+class CountingExecutor:
+    """
+    Executor running the tasks in the calling process, counting them.
+    """
+
+    def __init__(self):
+        self.n_tasks = 0
+
+    def map(self, fn, tasks):
+        tasks = list(tasks)
+        self.n_tasks += len(tasks)
+        return map(fn, tasks)
+
+
+class TestPowerSurface(unittest.TestCase):
+    def setUp(self):
+        self.questions = [Question([1, 2, 3, 4], [0.1, 0.2, 0.3, 0.4]) for _ in range(4)]
+        self.reliabilities = [0.1, 0.3]
+        self.weight_types = [None, "quadratic"]
+        self.alphas = [0.05, 0.01]
+        self.betas = [0.8, 0.9]
+
+    def surface(self, **kwargs):
+        return bootstrap_power_surface(self.questions, 100, self.reliabilities, self.weight_types, self.alphas,
+                                       self.betas, start_n=20, n_step=20, n_bootstrap=200, seed=5, batch_size=50,
+                                       hook=BootstrapHook(), **kwargs)
+
+    def test_same_as_separate_calls(self):
+        results = self.surface()
+        self.assertEqual(len(results.df), 2 * 2 * 2 * 5)
+        self.assertEqual(len(results.sample_sizes), 2 * 2 * 2 * 2)
+        for reliability in self.reliabilities:
+            for weight_type in self.weight_types:
+                for alpha in self.alphas:
+                    expected = bootstrap_sample_size_cohen_kappa(self.questions, 100, weight_type, start_n=20,
+                                                                 n_step=20, reliability=reliability, n_bootstrap=200,
+                                                                 alpha=alpha, seed=5, batch_size=50,
+                                                                 hook=BootstrapHook())
+                    scenario = results.df[(results.df['reliability'] == reliability)
+                                          & (results.df['weight_type'].map(lambda value: value == weight_type))
+                                          & (results.df['alpha'] == alpha)]
+                    np.testing.assert_array_equal(scenario[expected.df.columns].to_numpy(),
+                                                  expected.df.to_numpy())
+                    sample_sizes = results.sample_sizes[
+                        (results.sample_sizes['reliability'] == reliability)
+                        & (results.sample_sizes['weight_type'].map(lambda value: value == weight_type))
+                        & (results.sample_sizes['alpha'] == alpha) & (results.sample_sizes['beta'] == 0.8)]
+                    self.assertEqual(sample_sizes['sample_size'].item(), expected.sample_size)
+
+    def test_one_simulation_per_block(self):
+        executor = CountingExecutor()
+        results = self.surface(executor=executor)
+        self.assertEqual(executor.n_tasks, 5 * 4)
+        self.assertIsNone(results.df['weight_type'].iloc[0])
+        # The power grows with the reliability and the sample size
+        power = results.df.set_index(['reliability', 'n'])['power']
+        self.assertTrue((power.loc[0.3].to_numpy() >= power.loc[0.1].to_numpy()).all())
+        self.assertIsNotNone(results.sample_sizes['sample_size'].iloc[-1])
+
+    def test_tables_counted_once_per_code_set(self):
+        # One bucket of items, counted for the independent samples and for each reliability, whatever the weightings
+        for weight_types in [[None], [None, "linear", "quadratic"]]:
+            with mock.patch.object(contingency, "contingency_table", wraps=contingency.contingency_table) as count:
+                kappa_h0, kappa_h1 = _simulate_sweep_block(self.questions, 30, 20, weight_types, self.reliabilities,
+                                                           np.random.SeedSequence(0))
+            self.assertEqual(count.call_count, 1 + len(self.reliabilities))
+            self.assertEqual(kappa_h1.shape, (len(self.reliabilities), len(weight_types), 20))
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            bootstrap_power_surface(self.questions, 100, [])
+        with self.assertRaises(ValueError):
+            bootstrap_power_surface(self.questions, 100, [1.5])
+        with self.assertRaises(ValueError):
+            bootstrap_power_surface(self.questions, 100, [0.1], weight_types=["cubic"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from pyretest import Question, QuestionnairePlan, sample_questionnaire_codes, contingency_tables, \
+    pooled_kappa_from_tables, pooled_kappa_from_codes
+from pyretest.pooled_kappa import category_buckets, bucket_contingency_tables
+from pyretest.pooled_kappa.contingency import cumulative_contingency_table
+
+
+def _mixed_questions(n_items, seed=0):
+    rng = np.random.default_rng(seed)
+    questions = []
+    for c in rng.choice([1, 2, 5, 7], n_items):
+        probabilities = rng.random(c) * (rng.random(c) > 0.2)
+        probabilities[rng.integers(c)] += 0.1
+        questions.append(Question(list(range(c)), list(probabilities)))
+    return questions
+
+
+def _reference_codes(questions, n, replicates, seed):
+    # Item after item, the category of each uniform number found in the cumulative distribution of the item
+    rng = np.random.default_rng(seed)
+    codes = np.empty((replicates, n, len(questions)), dtype=int)
+    for i, question in enumerate(questions):
+        cdf = np.cumsum(question.probabilities)
+        codes[..., i] = np.searchsorted(cdf / cdf[-1], rng.random((replicates, n)), side='right')
+    return codes
+
+
+class TestQuestionnairePlan(unittest.TestCase):
+    def test_category_buckets(self):
+        buckets = category_buckets([5, 2, 5, 7, 2, 5])
+        self.assertEqual([c for c, _ in buckets], [2, 5, 7])
+        for (_, items), expected in zip(buckets, [[1, 4], [0, 2, 5], [3]]):
+            np.testing.assert_array_equal(items, expected)
+        self.assertEqual(category_buckets([]), [])
+
+    def test_same_draws(self):
+        questions = _mixed_questions(40)
+        expected = _reference_codes(questions, 50, 7, seed=3)
+        plan = QuestionnairePlan(questions)
+        np.testing.assert_array_equal(plan.sample_codes(50, replicates=7, seed=3), expected)
+        np.testing.assert_array_equal(sample_questionnaire_codes(questions, 50, replicates=7, seed=3), expected)
+        # Drawn in several chunks of items
+        plan.chunk_size = 1000
+        np.testing.assert_array_equal(plan.sample_codes(50, replicates=7, seed=3), expected)
+        # Drawn in several chunks of replicates of each item
+        plan.chunk_size = 120
+        np.testing.assert_array_equal(plan.sample_codes(50, replicates=7, seed=3), expected)
+        self.assertEqual(plan.sample_codes(50, seed=3).shape, (50, 40))
+        # Zero-probability categories are never drawn
+        for question, codes in zip(questions, np.moveaxis(expected, -1, 0)):
+            self.assertTrue(np.all(np.asarray(question.probabilities)[codes] > 0))
+
+    def test_kappa(self):
+        questions = _mixed_questions(30, seed=1)
+        plan = QuestionnairePlan(questions)
+        codes_a = plan.sample_codes(60, replicates=5, seed=1)
+        codes_b = plan.sample_codes(60, replicates=5, seed=2)
+        copied = np.random.default_rng(3).random(codes_a.shape) < 0.4
+        codes_b[copied] = codes_a[copied]
+        for weight_type in [None, "linear", "quadratic"]:
+            expected = pooled_kappa_from_tables(contingency_tables(codes_a, codes_b, plan.n_categories), weight_type)
+            np.testing.assert_allclose(plan.kappa(codes_a, codes_b, weight_type), expected, atol=1e-12)
+            np.testing.assert_allclose(pooled_kappa_from_codes(codes_a, codes_b, plan.n_categories, weight_type),
+                                       expected, atol=1e-12)
+            # The plan is reused for other sample sizes
+            self.assertAlmostEqual(plan.kappa(codes_a[0, :10], codes_b[0, :10], weight_type),
+                                   pooled_kappa_from_tables(contingency_tables(codes_a[0, :10], codes_b[0, :10],
+                                                                               plan.n_categories), weight_type))
+
+    def test_bucket_contingency_tables(self):
+        questions = _mixed_questions(30, seed=2)
+        plan = QuestionnairePlan(questions)
+        codes_a = plan.sample_codes(40, replicates=3, seed=1)
+        codes_b = plan.sample_codes(40, replicates=3, seed=2)
+        for c, items in plan.buckets:
+            expected = np.stack([contingency_tables(codes_a, codes_b, plan.n_categories)[item] for item in items], -3)
+            expected_prefixes = np.stack([cumulative_contingency_table(codes_a[..., item], codes_b[..., item], c,
+                                                                       [10, 25, 40]) for item in items], -3)
+            # Counted all at once, and one item at a time
+            for chunk_size in [2 ** 18, 1]:
+                with mock.patch("pyretest.pooled_kappa.contingency.CELLS_CHUNK_SIZE", chunk_size):
+                    np.testing.assert_array_equal(bucket_contingency_tables(codes_a, codes_b, c, items), expected)
+                    np.testing.assert_array_equal(bucket_contingency_tables(codes_a, codes_b, c, items,
+                                                                            prefixes=[10, 25, 40]), expected_prefixes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from pyretest import Question, bootstrap_sample_size_cohen_kappa, bootstrap_confidence_interval, ResultCache
+from pyretest.pooled_kappa.cache import SIMULATION_VERSION
+
+
+class CountingExecutor:
+    """
+    Executor running the tasks in the calling process, counting them.
+    """
+
+    def __init__(self):
+        self.n_tasks = 0
+
+    def map(self, fn, tasks):
+        tasks = list(tasks)
+        self.n_tasks += len(tasks)
+        return map(fn, tasks)
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.questions = [Question([1, 2, 3, 4, 5], [0.1, 0.2, 0.4, 0.2, 0.1]) for _ in range(3)]
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def sample_size(self, max_n, n_bootstrap=200, **kwargs):
+        executor = CountingExecutor()
+        results = bootstrap_sample_size_cohen_kappa(self.questions, max_n, start_n=20, n_step=20,
+                                                    n_bootstrap=n_bootstrap, seed=11, executor=executor,
+                                                    batch_size=50, cache=self.cache, **kwargs)
+        return results, executor.n_tasks
+
+    def test_reuse(self):
+        first, n_tasks = self.sample_size(100)
+        self.assertEqual(n_tasks, 5 * 4)
+        second, n_tasks = self.sample_size(100)
+        self.assertEqual(n_tasks, 0)
+        np.testing.assert_array_equal(first.df.to_numpy(), second.df.to_numpy())
+
+        # Only the new sample sizes and the new samples are simulated
+        extended, n_tasks = self.sample_size(140)
+        self.assertEqual(n_tasks, 2 * 4)
+        np.testing.assert_array_equal(extended.df.to_numpy()[:5], first.df.to_numpy())
+        _, n_tasks = self.sample_size(140, n_bootstrap=300)
+        self.assertEqual(n_tasks, 7 * 2)
+
+        uncached = bootstrap_sample_size_cohen_kappa(self.questions, 140, start_n=20, n_step=20, n_bootstrap=200,
+                                                     seed=11, batch_size=50)
+        np.testing.assert_array_equal(extended.df.to_numpy(), uncached.df.to_numpy())
+
+    def test_configuration(self):
+        self.sample_size(60)
+        _, n_tasks = self.sample_size(60, reliability=0.2)
+        self.assertEqual(n_tasks, 3 * 4)
+        _, n_tasks = self.sample_size(60, weight_type="linear")
+        self.assertEqual(n_tasks, 3 * 4)
+        _, n_tasks = self.sample_size(60, common_random_numbers=True)
+        self.assertEqual(n_tasks, 4)
+        _, n_tasks = self.sample_size(60, common_random_numbers=True)
+        self.assertEqual(n_tasks, 0)
+        self.assertNotEqual(ResultCache.key(questions=[[1, 2]], seed=1), ResultCache.key(questions=[[1, 2]], seed=2))
+        self.assertEqual(ResultCache.key(a=1, b=np.int64(2)), ResultCache.key(b=2, a=1))
+
+    def test_confidence_interval(self):
+        first = bootstrap_confidence_interval(self.questions, 50, n_bootstrap=200, seed=3, cache=self.directory.name)
+        executor = CountingExecutor()
+        second = bootstrap_confidence_interval(self.questions, 50, n_bootstrap=200, seed=3, executor=executor,
+                                               cache=self.directory.name)
+        self.assertEqual(executor.n_tasks, 0)
+        self.assertEqual(first, second)
+        with self.assertRaises(ValueError):
+            bootstrap_confidence_interval(self.questions, 50, cache=self.cache)
+
+    def test_eviction(self):
+        block = np.zeros(100), np.ones(100)
+        for i in range(5):
+            self.cache.put("key", (i,), block)
+            os.utime(os.path.join(self.directory.name, f"key-{i}.npz"), ns=(i * 10 ** 9, i * 10 ** 9))
+        block_size = self.cache.size / 5
+
+        # Reading a block marks it as recently used, so it survives the eviction
+        kappa_h0, kappa_h1 = self.cache.get("key", (0,))
+        np.testing.assert_array_equal(kappa_h1, block[1])
+        self.cache.max_bytes = int(2.5 * block_size)
+        self.cache.evict()
+        self.assertLessEqual(self.cache.size, self.cache.max_bytes)
+        self.assertEqual([self.cache.get("key", (i,)) is not None for i in range(5)],
+                         [True, False, False, False, True])
+        self.assertFalse([name for name in os.listdir(self.directory.name) if name.endswith(".tmp")])
+        self.cache.clear()
+        self.assertEqual(self.cache.size, 0)
+
+    def test_running_size(self):
+        block = np.zeros(100), np.ones(100)
+        self.cache.put("key", (0,), block)
+        block_size = self.cache.size
+        self.cache.max_bytes = int(4.5 * block_size)
+        # The directory is only scanned to count the size once, and to evict down to 3/4 of max_bytes
+        with mock.patch.object(self.cache, "_entries", wraps=self.cache._entries) as entries:
+            for i in range(1, 4):
+                self.cache.put("key", (i,), block)
+            self.cache.put("key", (0,), block)
+            self.assertEqual(entries.call_count, 0)
+            for i in range(4, 10):
+                self.cache.put("key", (i,), block)
+            self.assertEqual(entries.call_count, 3)
+        self.assertLessEqual(self.cache.size, self.cache.max_bytes)
+        self.assertEqual(len(os.listdir(self.directory.name)), 4)
+
+    def test_simulation_version(self):
+        key = ResultCache.key(questions=[[1, 2]], seed=1)
+        with mock.patch("pyretest.pooled_kappa.cache.SIMULATION_VERSION", SIMULATION_VERSION + 1):
+            self.assertNotEqual(ResultCache.key(questions=[[1, 2]], seed=1), key)
+
+if __name__ == '__main__':
+    unittest.main()
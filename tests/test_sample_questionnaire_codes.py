@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+
+from pyretest import sample_questionnaire_codes, decode_responses, pooled_cohen_kappa, Question
+
+
+class TestSampleQuestionnaireCodes(unittest.TestCase):
+    def setUp(self):
+        self.questions = [
+            Question(["a", "b", "c", "d", "e"], [0.1, 0.2, 0.3, 0.3, 0.1]),
+            Question([True, False], [0.1, 0.9]),
+            Question(["a", "b", "c"], [2, 1, 1]),
+        ]
+
+    def test_shape_and_dtype(self):
+        codes = sample_questionnaire_codes(self.questions, n=100)
+        self.assertEqual(codes.shape, (100, 3))
+        self.assertEqual(codes.dtype, np.uint8)
+
+        codes = sample_questionnaire_codes(self.questions, n=100, replicates=7)
+        self.assertEqual(codes.shape, (7, 100, 3))
+        for col, question in enumerate(self.questions):
+            self.assertTrue(codes[..., col].max() < len(question.values))
+
+    def test_marginals(self):
+        codes = sample_questionnaire_codes(self.questions, n=100000, seed=0)
+        for col, question in enumerate(self.questions):
+            probabilities = np.asarray(question.probabilities, dtype=float)
+            frequencies = np.bincount(codes[:, col], minlength=len(question.values)) / codes.shape[0]
+            np.testing.assert_allclose(frequencies, probabilities / probabilities.sum(), atol=0.01)
+
+    def test_seed(self):
+        codes_1 = sample_questionnaire_codes(self.questions, n=100, replicates=3, seed=42)
+        codes_2 = sample_questionnaire_codes(self.questions, n=100, replicates=3, seed=42)
+        np.testing.assert_array_equal(codes_1, codes_2)
+
+        rng = np.random.default_rng(42)
+        codes_3 = sample_questionnaire_codes(self.questions, n=100, replicates=3, seed=rng)
+        codes_4 = sample_questionnaire_codes(self.questions, n=100, replicates=3, seed=rng)
+        np.testing.assert_array_equal(codes_1, codes_3)
+        self.assertFalse(np.array_equal(codes_3, codes_4))
+
+    def test_decode(self):
+        codes = sample_questionnaire_codes(self.questions, n=1000, seed=1)
+        responses = decode_responses(codes, self.questions)
+        self.assertEqual(responses.shape, codes.shape)
+        for col, question in enumerate(self.questions):
+            self.assertTrue(all(responses[i, col] == question.values[codes[i, col]] for i in range(1000)))
+
+        # Decoded responses can be scored like the ones of sample_questionnaire
+        responses_b = decode_responses(sample_questionnaire_codes(self.questions, n=1000, seed=2), self.questions)
+        self.assertAlmostEqual(pooled_cohen_kappa(responses, responses_b), 0, delta=0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+
+from pyretest import Question, bootstrap_sample_size_cohen_kappa, bootstrap_confidence_interval
+
+
+class TestSequentialBootstrap(unittest.TestCase):
+    def setUp(self):
+        self.questions = [Question([1, 2, 3, 4, 5], [0.1, 0.2, 0.4, 0.2, 0.1]) for _ in range(5)]
+
+    def test_zero_tolerance_runs_full_budget(self):
+        grid = bootstrap_sample_size_cohen_kappa(self.questions, 100, start_n=20, n_step=20, n_bootstrap=300,
+                                                 seed=3)
+        sequential = bootstrap_sample_size_cohen_kappa(self.questions, 100, start_n=20, n_step=20, n_bootstrap=300,
+                                                       seed=3, tolerance=0, decision_confidence=None)
+        self.assertEqual(sequential.sample_size, grid.sample_size)
+        self.assertTrue((sequential.df['n_bootstrap'] == 300).all())
+        np.testing.assert_array_equal(sequential.df[grid.df.columns].to_numpy(), grid.df.to_numpy())
+
+    def test_stops_early(self):
+        grid = bootstrap_sample_size_cohen_kappa(self.questions, 300, start_n=20, n_step=20, n_bootstrap=2000,
+                                                 seed=5)
+        sequential = bootstrap_sample_size_cohen_kappa(self.questions, 300, start_n=20, n_step=20,
+                                                       n_bootstrap=2000, seed=5, tolerance=0.01)
+        df = sequential.df
+        self.assertEqual(list(df['n']), list(grid.df['n']))
+        self.assertLess(df['n_bootstrap'].sum(), 0.25 * 2000 * len(df))
+        self.assertLessEqual(abs(sequential.sample_size - grid.sample_size), 20)
+        # Every sample size stopped on the precision, on a clear decision, or on the budget
+        stopped = (df['mc_error'] <= 0.01) | ((df['power'] - 0.8).abs() >= 2.3 * df['mc_error']) \
+            | (df['n_bootstrap'] == 2000)
+        self.assertTrue(stopped.all())
+
+    def test_confidence_interval(self):
+        full = bootstrap_confidence_interval(self.questions, 100, n_bootstrap=500, seed=7)
+        same = bootstrap_confidence_interval(self.questions, 100, n_bootstrap=500, seed=7, tolerance=0)
+        self.assertEqual(same.n_bootstrap, 500)
+        self.assertEqual(tuple(same[:4]), tuple(full))
+
+        sequential = bootstrap_confidence_interval(self.questions, 100, n_bootstrap=5000, seed=7, tolerance=0.005)
+        self.assertLess(sequential.n_bootstrap, 5000)
+        self.assertLessEqual(sequential.mc_error, 0.005)
+        self.assertAlmostEqual(sequential.lowerbound, full.lowerbound, delta=0.02)
+        self.assertAlmostEqual(sequential.upperbound, full.upperbound, delta=0.02)
+
+    def test_requires_grid(self):
+        with self.assertRaises(ValueError):
+            bootstrap_sample_size_cohen_kappa(self.questions, 100, search="adaptive", tolerance=0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
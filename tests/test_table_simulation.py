@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from pyretest import bootstrap_sample_size_cohen_kappa, bootstrap_confidence_interval, Question
+from pyretest.pooled_kappa.bootstrap import _n_copied_answers
+from pyretest.sampler import make_reliable
+
+
+class TestTableSimulation(unittest.TestCase):
+    def setUp(self):
+        self.questions = [
+            Question(["a", "b", "c", "d", "e"], [1 / 5] * 5),
+            Question(["a", "b", "c", "d", "e"], [0.1, 0.2, 0.3, 0.2, 0.2]),
+            Question(["a", "b", "c"], [0.5, 0.3, 0.2]),
+            Question([True, False], [0.3, 0.7]),
+        ]
+
+    def test_n_copied_answers(self):
+        for n, reliability in [(10, 0.1), (37, 0.25), (100, 0.33)]:
+            samples_a = np.zeros((n, len(self.questions)), dtype=int)
+            samples_b = np.ones((n, len(self.questions)), dtype=int)
+            make_reliable(samples_a, samples_b, reliability)
+            np.testing.assert_array_equal(_n_copied_answers(n, len(self.questions), reliability),
+                                          samples_a.sum(axis=0))
+
+    def test_confidence_interval(self):
+        for weight_type in [None, "quadratic"]:
+            results = bootstrap_confidence_interval(self.questions, n=100, weight_type=weight_type, n_bootstrap=3000,
+                                                    seed=0)
+            results_tables = bootstrap_confidence_interval(self.questions, n=100, weight_type=weight_type,
+                                                           n_bootstrap=3000, seed=0, simulation="tables")
+            self.assertAlmostEqual(results.mean, results_tables.mean, delta=0.005)
+            self.assertAlmostEqual(results.std, results_tables.std, delta=0.003)
+            self.assertAlmostEqual(results.lowerbound, results_tables.lowerbound, delta=0.01)
+            self.assertAlmostEqual(results.upperbound, results_tables.upperbound, delta=0.01)
+
+    def test_sample_size(self):
+        questions = [Question(["a", "b", "c", "d", "e"], [1 / 5] * 5)] * 4
+        results = bootstrap_sample_size_cohen_kappa(questions, max_n=100, start_n=10, n_step=10, reliability=0.1,
+                                                    seed=0, simulation="tables")
+        self.assertTrue(results.sample_size == 40 or results.sample_size == 50)
+
+        # The cost does not depend on n
+        results = bootstrap_sample_size_cohen_kappa(questions, max_n=40000, start_n=10000, n_step=10000,
+                                                    reliability=0.02, n_bootstrap=500, seed=0, simulation="tables")
+        np.testing.assert_allclose(results.df['mean_kappa_h1'], 0.02, atol=0.002)
+
+    def test_wrong_simulation(self):
+        with self.assertRaises(ValueError):
+            bootstrap_confidence_interval(self.questions, n=10, simulation="answers")
+        with self.assertRaises(ValueError):
+            bootstrap_sample_size_cohen_kappa(self.questions, max_n=10, simulation="tables",
+                                              common_random_numbers=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,7 @@ import unittest
 
 import numpy as np
 
-from pyretest import sample_questionnaire, pooled_cohen_kappa, Question
+from pyretest import sample_questionnaire, pooled_cohen_kappa, batched_pooled_cohen_kappa, Question
 
 
 class TestWeightedPooledKappa(unittest.TestCase):
@@ -79,6 +79,18 @@ class TestWeightedPooledKappa(unittest.TestCase):
         self.assertTrue(abs(k1_unweighted) < abs(k1_quadratic))
         self.assertTrue(abs(k1_unweighted) < abs(k1_linear))
 
+    def test_answer_not_in_values(self):
+        questions = [Question(["a", "b", "c"], [0.2, 0.3, 0.5]), Question(["a", "b", "c"], [0.2, 0.3, 0.5])]
+        samples_a = [["a", "b"], ["c", "a"], ["b", "b"]]
+        samples_b = [["a", "b"], ["c", "d"], ["b", "a"]]
+        # Unweighted, the categories are the values observed
+        pooled_cohen_kappa(samples_a, samples_b)
+        for weight_type in ["linear", "quadratic"]:
+            with self.assertRaises(ValueError):
+                pooled_cohen_kappa(samples_a, samples_b, weight_type=weight_type, questions=questions)
+            with self.assertRaises(ValueError):
+                batched_pooled_cohen_kappa([samples_a], [samples_b], weight_type=weight_type, questions=questions)
+
 
 if __name__ == '__main__':
     unittest.main()
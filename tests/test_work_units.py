@@ -0,0 +1,59 @@
+import pickle
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from pyretest import Question, bootstrap_sample_size_cohen_kappa, BootstrapHook, WorkUnit, plan_work_units, \
+    run_work_unit, reduce_work_units
+
+
+class TestWorkUnits(unittest.TestCase):
+    def setUp(self):
+        self.questions = [Question(["a", "b", "c"], [0.2, 0.3, 0.5]) for _ in range(4)]
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def plan(self, **kwargs):
+        return plan_work_units(self.questions, 80, start_n=20, n_step=20, n_bootstrap=250, seed=4, batch_size=50,
+                               **kwargs)
+
+    def test_same_as_single_run(self):
+        expected = bootstrap_sample_size_cohen_kappa(self.questions, 80, start_n=20, n_step=20, n_bootstrap=250,
+                                                     seed=4, batch_size=50, hook=BootstrapHook())
+        for replicates_per_unit in [None, 50, 120]:
+            with tempfile.TemporaryDirectory() as directory:
+                units = self.plan(replicates_per_unit=replicates_per_unit)
+                # Units sent to other processes or machines, and run in any order
+                units = [pickle.loads(pickle.dumps(WorkUnit.from_json(unit.to_json()))) for unit in units]
+                random.Random(0).shuffle(units)
+                for unit in units:
+                    run_work_unit(unit, directory)
+                results = reduce_work_units(units, directory)
+            np.testing.assert_array_equal(results.df[expected.df.columns].to_numpy(), expected.df.to_numpy())
+            self.assertEqual(results.df['n_bootstrap'].tolist(), [250] * 4)
+            self.assertEqual(results.sample_size, expected.sample_size)
+
+    def test_partial_results(self):
+        units = self.plan(replicates_per_unit=100)
+        self.assertEqual(len(units), 4 * 3)
+        self.assertEqual([unit.replicates for unit in units[:3]], [(0, 100), (100, 200), (200, 250)])
+        self.assertEqual(list(units[2].blocks), [4])
+        for unit in units[:4]:
+            self.assertGreater(run_work_unit(unit, self.directory.name), 0)
+        # Units already run are skipped
+        self.assertEqual(run_work_unit(units[0], self.directory.name), 0)
+
+        results = reduce_work_units(units, self.directory.name)
+        self.assertEqual(results.df['n'].tolist(), [20, 40])
+        self.assertEqual(results.df['n_bootstrap'].tolist(), [250, 100])
+        self.assertEqual(len(reduce_work_units([], self.directory.name).df), 0)
+        with self.assertRaises(ValueError):
+            reduce_work_units(units + self.plan(reliability=0.2), self.directory.name)
+
+
+if __name__ == '__main__':
+    unittest.main()